@@ -0,0 +1,269 @@
+import argparse
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDRegressor
+
+from cohort import base_expectancies, health_scores, health_term, read_cohort, synthetic_cohort
+from health import CHOICE_DEFAULTS, HEALTH_WEIGHTS
+from reference import current_reference
+
+COMPRESSED = (".gz", ".bz2", ".zip", ".xz", ".zst")
+# Uma linha a cada HOLDOUT_EVERY fica fora do treino para medir o erro, até
+# HOLDOUT_ROWS linhas por processo
+HOLDOUT_EVERY = 20
+HOLDOUT_ROWS = 50_000
+# Passo constante com média dos coeficientes a partir de AVERAGE_AFTER
+# linhas de cada processo: o passo decrescente (invscaling) com a média desde
+# a primeira linha puxava os pesos para zero, ainda mais com faixas pequenas
+LEARNING_RATE = 0.01
+AVERAGE_AFTER = 5_000
+
+
+def _features():
+    # Uma coluna por fator sim/não e por nível; a opção padrão dos fatores de
+    # múltipla escolha fica fora, valendo 0 anos, como em HEALTH_WEIGHTS
+    features = []
+    for factor, points in HEALTH_WEIGHTS.items():
+        if isinstance(points, dict):
+            features += [(factor, level) for level in points if level != CHOICE_DEFAULTS.get(factor)]
+        else:
+            features.append((factor, None))
+    return features
+
+
+FEATURES = _features()
+
+
+def design_matrix(frame):
+    """Matriz 0/1 de FEATURES, com as mesmas regras de padrão de calculate_health_score"""
+    matrix = np.empty((len(frame), len(FEATURES)))
+    for index, (factor, level) in enumerate(FEATURES):
+        points = 1.0 if level is None else {name: float(name == level) for name in HEALTH_WEIGHTS[factor]}
+        matrix[:, index] = health_term(frame.get, factor, points)
+    return matrix
+
+
+def targets(frame, reference):
+    """Anos vividos além da expectativa base do país e gênero, que o score de saúde deve explicar"""
+    return frame["age"].to_numpy(dtype=np.float64) - base_expectancies(frame["country"], frame["gender"], reference)
+
+
+def weights_from(coefficients):
+    """Coeficientes na ordem de FEATURES no formato de HEALTH_WEIGHTS"""
+    weights = {factor: dict.fromkeys(points, 0.0) if isinstance(points, dict) else 0.0
+               for factor, points in HEALTH_WEIGHTS.items()}
+    for (factor, level), value in zip(FEATURES, coefficients):
+        if level is None:
+            weights[factor] = round(float(value), 2)
+        else:
+            weights[factor][level] = round(float(value), 2)
+    return weights
+
+
+class _ByteRange(io.RawIOBase):
+    """O cabeçalho de um CSV e as linhas que começam entre os bytes ``start`` e ``end``.
+
+    Cada trabalhador lê só a sua faixa do mesmo arquivo, sem cópia: uma
+    linha cortada no começo fica com a faixa anterior, e a última linha é
+    lida até o fim mesmo passando de ``end``.
+    """
+
+    def __init__(self, path, start, end):
+        self._file = open(path, "rb")
+        self._pending = self._file.readline()
+        if start > self._file.tell():
+            self._file.seek(start - 1)
+            self._file.readline()
+        self._end = end
+        self._last = b"\n"
+        self._finished = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self._pending:
+            left = self._end - self._file.tell()
+            if left > 0:
+                self._pending = self._file.read(min(len(buffer), left))
+            elif not self._finished:
+                self._finished = True
+                if self._last != b"\n":
+                    self._pending = self._file.readline()
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        if size:
+            self._last = self._pending[size - 1:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def shards(path, jobs):
+    """Faixas de bytes (start, end) de até ``jobs`` partes do CSV, ou [None] se ele não dá para dividir"""
+    if jobs <= 1 or path.endswith(COMPRESSED):
+        return [None]
+    with open(path, "rb") as handle:
+        first = len(handle.readline())
+    bounds = np.linspace(first, os.path.getsize(path), jobs + 1).astype(np.int64)
+    return [(int(start), int(end)) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+
+def _chunks(path, shard, chunk_size):
+    if shard is None:
+        for chunk, _ in read_cohort(path, chunk_size):
+            yield chunk
+        return
+    with io.BufferedReader(_ByteRange(path, *shard), 1 << 20) as source:
+        for chunk, _ in read_cohort(source, chunk_size, None):
+            yield chunk
+
+
+def _fit_shard(path, shard, reference, chunk_size, epochs, seed):
+    """Treina um regressor só na faixa ``shard`` do arquivo, bloco a bloco com partial_fit.
+
+    Sem intercepto: os alvos já descontam a expectativa base, e o score de
+    saúde é só a soma dos pesos. As linhas separadas para validação não
+    entram no treino e voltam junto com os coeficientes.
+    """
+    model = SGDRegressor(fit_intercept=False, learning_rate="constant", eta0=LEARNING_RATE, alpha=1e-6,
+                         average=AVERAGE_AFTER, random_state=seed)
+    rows = 0
+    holdout_features = []
+    holdout_targets = []
+    for epoch in range(epochs):
+        # As mesmas linhas ficam de fora em todas as épocas
+        position = 0
+        held_rows = 0
+        for chunk in _chunks(path, shard, chunk_size):
+            features = design_matrix(chunk)
+            target = targets(chunk, reference)
+            held = np.arange(position, position + len(target)) % HOLDOUT_EVERY == 0
+            held &= held_rows + np.cumsum(held) <= HOLDOUT_ROWS
+            position += len(target)
+            held_rows += int(held.sum())
+            if epoch == 0 and held.any():
+                holdout_features.append(features[held].astype(np.uint8))
+                holdout_targets.append(target[held])
+            if not held.all():
+                model.partial_fit(features[~held], target[~held])
+                rows += int((~held).sum())
+    return {
+        "coefficients": model.coef_.copy() if rows else np.zeros(len(FEATURES)),
+        "rows": rows // epochs,
+        "holdout_features": np.concatenate(holdout_features) if holdout_features else None,
+        "holdout_targets": np.concatenate(holdout_targets) if holdout_targets else None,
+    }
+
+
+def calibrate(path, jobs=None, chunk_size=200_000, epochs=1, seed=0):
+    """Aprende os pesos do score de saúde de um CSV de desfechos, sem carregá-lo inteiro.
+
+    O CSV tem as colunas do CSV de coorte, uma pessoa já falecida por
+    linha, com ``age`` sendo a idade ao morrer. O arquivo é dividido em
+    faixas de bytes, um processo por faixa treina um SGDRegressor com
+    ``partial_fit`` bloco a bloco, e os coeficientes finais são a média
+    dos processos, pesada pelas linhas de cada um. ``rmse`` é o erro dos
+    pesos finais numa linha a cada HOLDOUT_EVERY, que fica fora do
+    treino. Devolve um dicionário pronto para salvar com ``save_weights``.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    reference = current_reference()
+    parts = shards(path, jobs)
+    start = time.perf_counter()
+    if len(parts) == 1:
+        results = [_fit_shard(path, parts[0], reference, chunk_size, epochs, seed)]
+    else:
+        with ProcessPoolExecutor(len(parts)) as pool:
+            results = list(pool.map(_fit_shard, [path] * len(parts), parts, [reference] * len(parts),
+                                    [chunk_size] * len(parts), [epochs] * len(parts),
+                                    range(seed, seed + len(parts))))
+    elapsed = time.perf_counter() - start
+
+    rows = np.array([result["rows"] for result in results], dtype=np.float64)
+    share = rows / rows.sum()
+    coefficients = sum(result["coefficients"] * part for result, part in zip(results, share))
+    errors = [result["holdout_features"] @ coefficients - result["holdout_targets"]
+              for result in results if result["holdout_targets"] is not None]
+    error = np.concatenate(errors) if errors else np.zeros(0)
+    return {
+        "weights": weights_from(coefficients),
+        "rows": int(rows.sum()),
+        "holdout_rows": len(error),
+        "rmse": round(float(np.sqrt(error @ error / len(error))), 3) if len(error) else None,
+        "reference_version": reference.version,
+        "jobs": len(parts),
+        "epochs": epochs,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(rows.sum() * epochs / elapsed),
+    }
+
+
+def save_weights(result, path):
+    """Salva o resultado de ``calibrate`` trocando o arquivo de uma vez, para a recarga não ler pela metade"""
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as handle:
+        json.dump(result, handle, ensure_ascii=False, indent=4)
+    os.replace(temporary, path)
+
+
+def generate_outcomes(path, rows, weights=HEALTH_WEIGHTS, noise=8.0, seed=0, chunk_size=500_000):
+    """Escreve um CSV de desfechos sintético em que a idade ao morrer segue ``weights`` com ruído"""
+    rng = np.random.default_rng(seed)
+    reference = current_reference()
+    written = 0
+    with open(path, "w", newline="") as handle:
+        while written < rows:
+            size = min(chunk_size, rows - written)
+            frame = synthetic_cohort(rng, size)
+            columns = frame.drop(columns="age").astype("category")
+            lifespan = base_expectancies(columns["country"], columns["gender"], reference)
+            lifespan += health_scores(columns, weights) + rng.normal(0.0, noise, size)
+            frame["age"] = np.clip(lifespan, 0, 130).round(1)
+            frame.to_csv(handle, header=written == 0, index=False)
+            written += size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibra os pesos do score de saúde com um CSV de desfechos")
+    parser.add_argument("csv", help="desfechos (.csv ou .csv.gz): colunas da coorte, age = idade ao morrer")
+    parser.add_argument("--output", default="health_weights.json",
+                        help="arquivo de pesos; data/health_weights.json passa a valer no app sem reiniciar")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="processos (padrão: um por núcleo)")
+    parser.add_argument("--chunk-size", type=int, default=200_000)
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--generate", type=int, metavar="LINHAS",
+                        help="em vez de calibrar, escreve um CSV sintético com este número de linhas")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_outcomes(args.csv, args.generate)
+        return
+
+    result = calibrate(args.csv, args.jobs, args.chunk_size, args.epochs)
+    save_weights(result, args.output)
+    print(f"{result['rows']} pessoas x {result['epochs']} época(s) em {result['seconds']} s com "
+          f"{result['jobs']} processo(s): {result['rows_per_second']:,} linhas/s; "
+          f"erro (RMSE) em {result['holdout_rows']} linhas de validação: {result['rmse']} anos")
+    current = current_reference().health_weights
+    table = []
+    for factor, points in result["weights"].items():
+        levels = points if isinstance(points, dict) else {"": points}
+        for level, value in levels.items():
+            before = current[factor][level] if level else current[factor]
+            table.append({"fator": factor, "nível": level, "atual": before, "calibrado": value})
+    print(pd.DataFrame(table).to_string(index=False))
+    print(f"Pesos salvos em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,518 @@
+import argparse
+import datetime
+import time
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+from hazard import CHOICE_HAZARD_RATIOS, GENDERS, HAZARD_RATIOS
+from health import CHOICE_DEFAULTS, HEALTH_WEIGHTS, INTENSITY_COLUMNS
+from models import MODELS
+from reference import current_reference
+
+# Colunas do CSV de coorte; só ``age`` é obrigatória, as outras valem o
+# mesmo que na calculadora individual quando faltam
+FLAG_COLUMNS = [
+    "smoking", "obesity", "diabetes", "hypertension", "heart_disease", "healthy_diet", "regular_exercise",
+    "good_sleep", "stress_management", "social_connections", "regular_checkups",
+]
+CATEGORY_DEFAULTS = {
+    "country": "Brazil",
+    "gender": "other",
+    "smoking_intensity": "light",
+    "alcohol": "none",
+    "bmi_category": "moderate",
+    "diet_quality": "good",
+    "exercise_intensity": "moderate",
+    "family_longevity": "average",
+}
+COLUMNS = ["age"] + FLAG_COLUMNS + list(CATEGORY_DEFAULTS)
+TRUE_VALUES = {"1", "1.0", "true", "sim", "s", "yes", "y"}
+
+# Métricas agregadas: (menor valor, maior valor, largura da faixa do histograma)
+METRICS = {
+    "expectancy": (0.0, 160.0, 0.1),
+    "health_score": (-50.0, 30.0, 1.0),
+    "medical_bonus": (0.0, 20.0, 0.05),
+}
+METRIC_LABELS = {
+    "expectancy": "Expectativa de vida (anos)",
+    "health_score": "Score de saúde (anos)",
+    "medical_bonus": "Bônus médico (anos)",
+}
+# Valores sorteados nas coortes sintéticas
+SYNTHETIC_CHOICES = {
+    "country": ["Brazil", "World", "Japan", "Nigeria"],
+    "gender": ["male", "female", "other"],
+    "smoking_intensity": ["light", "moderate", "heavy"],
+    "alcohol": ["none", "light", "moderate", "heavy"],
+    "bmi_category": ["mild", "moderate", "severe"],
+    "diet_quality": ["basic", "good", "excellent"],
+    "exercise_intensity": ["light", "moderate", "high"],
+    "family_longevity": ["low", "average", "high"],
+}
+
+
+# As tabelas por categoria têm uma posição a mais no fim, que é onde o
+# código -1 (célula vazia) cai ao indexar
+def _codes(series):
+    return series.cat.codes.to_numpy()
+
+
+def _flag_table(series):
+    names = series.cat.categories.astype(str).str.strip().str.lower()
+    return np.append(names.isin(TRUE_VALUES), False)
+
+
+def _lookup_table(series, values, otherwise, default):
+    names = series.cat.categories.astype(str).str.strip().str.lower()
+    return np.array([values.get(name, otherwise) for name in names] + [values.get(default, otherwise)],
+                    dtype=np.float64)
+
+
+def _lookup(series, values, otherwise, default):
+    """Traduz uma coluna de categorias por ``values``, decidindo só uma vez por categoria.
+
+    Categorias fora da tabela valem ``otherwise`` e células vazias valem o
+    mesmo que ``default``, como o ``.get(..., default)`` da versão escalar.
+    """
+    if series is None:
+        return values.get(default, otherwise)
+    return _lookup_table(series, values, otherwise, default)[_codes(series)]
+
+
+def _when(flag, points, series=None, otherwise=0.0, default=None):
+    """``points`` onde a coluna sim/não ``flag`` é sim (vazio conta como não) e 0 no resto.
+
+    Com ``points`` dicionário, o valor vem da tradução de ``series`` como
+    em ``_lookup``; as duas colunas viram uma tabela por par de categorias
+    e cada linha custa uma só leitura nela.
+    """
+    if flag is None:
+        return 0.0
+    flags = _flag_table(flag)
+    if isinstance(points, Mapping):
+        if series is not None:
+            table = np.where(flags[:, None], _lookup_table(series, points, otherwise, default)[None, :], 0.0)
+            return table[_codes(flag), _codes(series)]
+        points = points.get(default, otherwise)
+    return np.where(flags, points, 0.0)[_codes(flag)]
+
+
+def health_term(column, factor, points):
+    """Anos de um fator de HEALTH_WEIGHTS para cada linha, com ``points`` no formato dele.
+
+    ``column`` devolve a coluna pelo nome, ou None se ela não existe.
+    """
+    if factor in CHOICE_DEFAULTS:
+        default = CHOICE_DEFAULTS[factor]
+        return _lookup(column(factor), points, points[default], default)
+    if factor in INTENSITY_COLUMNS:
+        intensity, default, unknown = INTENSITY_COLUMNS[factor]
+        return _when(column(factor), points, column(intensity), points[unknown], default)
+    return _when(column(factor), float(points))
+
+
+def health_scores(frame, weights=HEALTH_WEIGHTS):
+    """Versão vetorizada de calculate_health_score para um DataFrame inteiro"""
+    score = np.zeros(len(frame))
+    for factor, points in weights.items():
+        score += health_term(frame.get, factor, points)
+    return score
+
+
+def _country_ids(countries, reference):
+    """Índice em ``reference.countries`` de cada linha, decidindo uma vez por país"""
+    names = countries.cat.categories.astype(str).str.strip()
+    table = np.array([reference.country_id(name) for name in names] +
+                     [reference.country_id(CATEGORY_DEFAULTS["country"])], dtype=np.int64)
+    return table[_codes(countries)]
+
+
+def base_expectancies(countries, genders, reference):
+    """Versão vetorizada de get_base_life_expectancy"""
+    rows = [reference.life_expectancy[country] for country in reference.countries]
+    ids = _country_ids(countries, reference)
+    male = np.array([row["male"] for row in rows])[ids]
+    female = np.array([row["female"] for row in rows])[ids]
+    gender = _lookup(genders, {"male": 0, "female": 1}, 2, CATEGORY_DEFAULTS["gender"])
+    return np.where(gender == 0, male, np.where(gender == 1, female, (male + female) / 2))
+
+
+def medical_bonuses(ages, remaining_years, current_year, reference):
+    """Versão vetorizada de calculate_medical_advances_bonus (só o total)"""
+    estimated_death_year = current_year + remaining_years
+    bonus = np.zeros(len(ages))
+    for milestone_year, data in reference.medical_advances.items():
+        years_to_milestone = max(0, milestone_year - current_year)
+        proximity_factor = max(0.5, 1 - (years_to_milestone / 50))
+        bonus += np.where(estimated_death_year >= milestone_year, data["longevity_gain"] * proximity_factor, 0.0)
+    bonus *= np.maximum(0.3, 1 - ages / 100)
+    return np.minimum(bonus, np.minimum(20, ages * 0.3))
+
+
+def hazard_log_multipliers(frame):
+    """Log de hazard.hazard_multiplier para um DataFrame inteiro, somando os logs das razões"""
+    column = frame.get
+    log_multiplier = np.zeros(len(frame))
+    for factor, ratio in HAZARD_RATIOS.items():
+        if isinstance(ratio, tuple):
+            intensity, ratios, default = ratio
+            log_multiplier += _when(column(factor), {name: np.log(value) for name, value in ratios.items()},
+                                    column(intensity), np.log(ratios[default]), default)
+        else:
+            log_multiplier += _when(column(factor), np.log(ratio))
+    for factor, (ratios, default) in CHOICE_HAZARD_RATIOS.items():
+        log_multiplier += _lookup(column(factor), {name: np.log(value) for name, value in ratios.items()},
+                                  np.log(ratios[default]), default)
+    return log_multiplier
+
+
+def estimate_cohort_hazard(frame, reference):
+    """Versão vetorizada de hazard.estimate_life_expectancy_hazard; mesmo retorno de estimate_cohort"""
+    # O modelo é construído com os países na ordem de reference.countries
+    model = reference.hazard_model
+    ages = frame["age"].to_numpy(dtype=np.float64)
+    genders = _lookup(frame["gender"], {name: index for index, name in enumerate(GENDERS)}, 2,
+                      CATEGORY_DEFAULTS["gender"]).astype(np.int64)
+    groups = model.groups(_country_ids(frame["country"], reference), genders)
+    remaining, neutral = model.remaining(ages, groups, hazard_log_multipliers(frame))
+    return {
+        "expectancy": ages + remaining,
+        "remaining": remaining,
+        "health_score": remaining - neutral,
+        "medical_bonus": np.zeros(len(ages)),
+    }
+
+
+def estimate_cohort(frame, current_year=None, model="legacy", reference=None):
+    """Versão vetorizada de estimate_life_expectancy para todas as linhas de ``frame``.
+
+    ``frame`` tem as colunas de COLUMNS, com as de texto como categorias
+    (como saem de ``read_cohort``). Devolve um dicionário de vetores com
+    expectancy, remaining, health_score e medical_bonus, linha a linha
+    iguais ao que a calculadora individual daria com o mesmo ``model``
+    (uma chave de MODELS) e os mesmos dados de referência.
+    """
+    if reference is None:
+        reference = current_reference()
+    if model == "hazard":
+        return estimate_cohort_hazard(frame, reference)
+    if current_year is None:
+        current_year = datetime.datetime.now().year
+    ages = frame["age"].to_numpy(dtype=np.float64)
+    health_score = health_scores(frame, reference.health_weights)
+
+    base = base_expectancies(frame["country"], frame["gender"], reference)
+    base = base + np.where(ages > 65, np.minimum(2, (ages - 65) * 0.1), 0.0)
+    preliminary = base + health_score
+    medical_bonus = medical_bonuses(ages, np.maximum(0, preliminary - ages), current_year, reference)
+    expectancy = np.maximum(preliminary + medical_bonus, ages + 1)
+    return {
+        "expectancy": expectancy,
+        "remaining": np.maximum(0, expectancy - ages),
+        "health_score": health_score,
+        "medical_bonus": medical_bonus,
+    }
+
+
+def read_cohort(source, chunk_size=200_000, compression="infer"):
+    """Lê o CSV de coorte em blocos de ``chunk_size`` linhas.
+
+    As colunas de texto são lidas como categorias, que ocupam um inteiro
+    por célula e deixam traduzir cada valor distinto uma vez só. Linhas
+    sem idade válida são descartadas; colunas ausentes ganham o valor
+    padrão. Devolve um gerador de (bloco, linhas descartadas).
+    """
+    dtypes = {name: "category" for name in COLUMNS if name != "age"}
+    reader = pd.read_csv(source, chunksize=chunk_size, usecols=lambda name: name in COLUMNS, dtype=dtypes,
+                         compression=compression)
+    for chunk in reader:
+        ages = pd.to_numeric(chunk["age"], errors="coerce")
+        valid = ages.between(0, 130).to_numpy()
+        chunk["age"] = ages
+        if not valid.all():
+            chunk = chunk[valid]
+        for name in ("country", "gender"):
+            if name not in chunk:
+                chunk[name] = pd.Categorical([CATEGORY_DEFAULTS[name]] * len(chunk))
+        yield chunk, int((~valid).sum())
+
+
+class CohortStats:
+    """Agregados de uma coorte, atualizados bloco a bloco.
+
+    Para cada grupo (país, gênero) e cada métrica guarda só contagens num
+    histograma de faixas fixas (METRICS) e a soma dos valores. A
+    memória não cresce com o número de linhas e os quantis saem do
+    histograma com erro de no máximo uma faixa (0,1 ano na expectativa de
+    vida).
+    """
+
+    def __init__(self):
+        self.groups = []
+        self._group_ids = {}
+        self.version = None
+        self.rows = 0
+        self.discarded = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.histograms = {name: np.zeros((0, self._bins(name)), dtype=np.int64) for name in METRICS}
+        self.sums = {name: np.zeros(0) for name in METRICS}
+
+    @staticmethod
+    def _bins(name):
+        low, high, width = METRICS[name]
+        return int(round((high - low) / width))
+
+    def _add_groups(self, labels):
+        ids = []
+        for label in labels:
+            if label not in self._group_ids:
+                self._group_ids[label] = len(self.groups)
+                self.groups.append(label)
+            ids.append(self._group_ids[label])
+        grow = len(self.groups) - len(self.counts)
+        if grow:
+            self.counts = np.concatenate([self.counts, np.zeros(grow, dtype=np.int64)])
+            for name in METRICS:
+                self.histograms[name] = np.vstack(
+                    [self.histograms[name], np.zeros((grow, self._bins(name)), dtype=np.int64)])
+                self.sums[name] = np.concatenate([self.sums[name], np.zeros(grow)])
+        return np.array(ids, dtype=np.int64)
+
+    def update(self, chunk, results, discarded=0):
+        countries, genders = chunk["country"], chunk["gender"]
+        country_names = list(countries.cat.categories.astype(str).str.strip()) + [CATEGORY_DEFAULTS["country"]]
+        gender_names = list(genders.cat.categories.astype(str).str.strip().str.lower()) + \
+            [CATEGORY_DEFAULTS["gender"]]
+        # Código -1 (vazio) vira o último nome de cada lista
+        country_codes = countries.cat.codes.to_numpy().astype(np.int64) % len(country_names)
+        gender_codes = genders.cat.codes.to_numpy().astype(np.int64) % len(gender_names)
+        pairs, inverse = np.unique(country_codes * len(gender_names) + gender_codes, return_inverse=True)
+        labels = [(country_names[pair // len(gender_names)], gender_names[pair % len(gender_names)])
+                  for pair in pairs]
+        ids = self._add_groups(labels)[inverse.ravel()]
+
+        groups = len(self.groups)
+        self.rows += len(chunk)
+        self.discarded += discarded
+        self.counts += np.bincount(ids, minlength=groups)
+        for name, (low, high, width) in METRICS.items():
+            values = results[name]
+            bins = self._bins(name)
+            # Valores fora da faixa entram na primeira ou na última
+            positions = np.clip(np.floor((values - low) / width).astype(np.int64), 0, bins - 1)
+            histogram = np.bincount(ids * bins + positions, minlength=groups * bins)
+            self.histograms[name] += histogram.reshape(groups, bins)
+            self.sums[name] += np.bincount(ids, weights=values, minlength=groups)
+
+    def quantiles(self, name, counts, probabilities):
+        """Quantis interpolados dentro das faixas de um histograma"""
+        low, _, width = METRICS[name]
+        cumulative = np.cumsum(counts)
+        total = cumulative[-1] if len(cumulative) else 0
+        if not total:
+            return [float("nan")] * len(probabilities)
+        result = []
+        for probability in probabilities:
+            target = probability * total
+            index = int(np.searchsorted(cumulative, target, side="left"))
+            index = min(index, len(counts) - 1)
+            before = cumulative[index] - counts[index]
+            fraction = (target - before) / counts[index] if counts[index] else 0.0
+            result.append(low + (index + fraction) * width)
+        return result
+
+    def summary(self, probabilities=(0.1, 0.5, 0.9)):
+        """Tabela com contagem, média e quantis de cada métrica por grupo e no total"""
+        rows = []
+        order = sorted(range(len(self.groups)), key=lambda group: -self.counts[group])
+        for group in order + [None]:
+            if group is None:
+                label = ("Todos", "")
+                count = self.counts.sum()
+            else:
+                label = self.groups[group]
+                count = self.counts[group]
+            if not count:
+                continue
+            row = {"País": label[0], "Gênero": label[1], "Pessoas": int(count)}
+            for name in METRICS:
+                if group is None:
+                    histogram, total = self.histograms[name].sum(axis=0), self.sums[name].sum()
+                else:
+                    histogram, total = self.histograms[name][group], self.sums[name][group]
+                row[f"{name} média"] = total / count
+                for probability, value in zip(probabilities, self.quantiles(name, histogram, probabilities)):
+                    row[f"{name} p{probability * 100:.0f}"] = value
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+    def histogram(self, name, groups=None, max_bins=80):
+        """Histograma de uma métrica reduzido a no máximo ``max_bins`` faixas para desenhar.
+
+        ``groups`` é uma lista de índices de grupos (padrão: todos somados).
+        Faixas vazias nas pontas são cortadas antes de juntar as vizinhas.
+        Devolve (bordas, contagens).
+        """
+        low, _, width = METRICS[name]
+        counts = self.histograms[name] if groups is None else self.histograms[name][groups]
+        counts = counts.sum(axis=0)
+        used = np.flatnonzero(counts)
+        if not len(used):
+            return np.array([low, low + width]), np.zeros(1, dtype=np.int64)
+        first, last = used[0], used[-1] + 1
+        factor = max(1, -(-(last - first) // max_bins))
+        last = first + -(-(last - first) // factor) * factor
+        counts = np.pad(counts, (0, max(0, last - len(counts))))[first:last]
+        merged = counts.reshape(-1, factor).sum(axis=1)
+        edges = low + width * (first + factor * np.arange(len(merged) + 1))
+        return edges, merged
+
+
+def process_cohort(source, chunk_size=200_000, progress=None, total_bytes=None, current_year=None,
+                   compression="infer", model="legacy"):
+    """Estima e agrega uma coorte inteira bloco a bloco.
+
+    ``source`` é um caminho ou um arquivo binário aberto e ``model`` uma
+    chave de MODELS. ``progress``, se dado, é chamado após cada bloco com
+    (fração lida, linhas até agora); a fração vem da posição no arquivo,
+    então precisa de ``total_bytes`` ou de um arquivo com tamanho
+    conhecido. Todos os blocos usam a versão dos dados de referência
+    atual no começo, guardada em ``stats.version``. Devolve o CohortStats.
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as handle:
+            total_bytes = total_bytes or handle.seek(0, 2)
+            handle.seek(0)
+            return process_cohort(handle, chunk_size, progress, total_bytes, current_year,
+                                  "gzip" if source.endswith(".gz") else compression, model)
+    reference = current_reference()
+    stats = CohortStats()
+    stats.version = reference.version
+    for chunk, discarded in read_cohort(source, chunk_size, compression):
+        stats.update(chunk, estimate_cohort(chunk, current_year, model, reference), discarded)
+        if progress is not None:
+            fraction = min(1.0, source.tell() / total_bytes) if total_bytes else 0.0
+            progress(fraction, stats.rows)
+    return stats
+
+
+def synthetic_cohort(rng, size):
+    """``size`` pessoas sorteadas com ``rng``, com todas as colunas do CSV de coorte"""
+    frame = pd.DataFrame({"age": rng.integers(0, 100, size)})
+    for name in FLAG_COLUMNS:
+        frame[name] = rng.integers(0, 2, size)
+    for name, values in SYNTHETIC_CHOICES.items():
+        frame[name] = np.array(values)[rng.integers(0, len(values), size)]
+    return frame
+
+
+def generate_cohort(path, rows, seed=0, chunk_size=500_000):
+    """Escreve um CSV de coorte sintético, em blocos, para testar a página"""
+    rng = np.random.default_rng(seed)
+    written = 0
+    with open(path, "w", newline="") as handle:
+        while written < rows:
+            size = min(chunk_size, rows - written)
+            synthetic_cohort(rng, size).to_csv(handle, header=written == 0, index=False)
+            written += size
+
+
+def cohort_page(model="legacy"):
+    """Página Streamlit de análise de uma coorte enviada como CSV"""
+    import matplotlib.pyplot as plt
+    import streamlit as st
+
+    st.title("👥 Análise de Coorte")
+    st.caption(f"Modelo: {MODELS[model]}")
+    st.markdown("---")
+    st.markdown(
+        "Envie um CSV com uma pessoa por linha. Só a coluna `age` é obrigatória; as outras "
+        f"(`{'`, `'.join(COLUMNS[1:])}`) usam os mesmos valores da calculadora e, quando faltam, "
+        "o mesmo padrão dela. Arquivos `.csv.gz` também são aceitos."
+    )
+
+    uploaded = st.file_uploader("CSV da coorte", type=["csv", "gz"])
+    chunk_size = st.sidebar.select_slider("Linhas por bloco", [50_000, 100_000, 200_000, 500_000], value=200_000)
+    if uploaded is None:
+        return
+
+    # O resultado fica na sessão: mexer nos gráficos não reprocessa o arquivo
+    key = (uploaded.name, uploaded.size, chunk_size, model)
+    if st.session_state.get("cohort_key") != key:
+        bar = st.progress(0.0, text="Processando...")
+        start = time.perf_counter()
+
+        def progress(fraction, rows):
+            bar.progress(fraction, text=f"{rows:,} pessoas processadas".replace(",", "."))
+
+        try:
+            stats = process_cohort(uploaded, chunk_size, progress, uploaded.size,
+                                   compression="gzip" if uploaded.name.endswith(".gz") else "infer", model=model)
+        except (ValueError, KeyError) as e:
+            bar.empty()
+            st.error(f"Não foi possível ler o CSV: {e}")
+            return
+        elapsed = time.perf_counter() - start
+        bar.progress(1.0, text=f"{stats.rows:,} pessoas em {elapsed:.1f} s".replace(",", "."))
+        st.session_state["cohort_key"] = key
+        st.session_state["cohort_stats"] = stats
+    stats = st.session_state["cohort_stats"]
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("👥 Pessoas", f"{stats.rows:,}".replace(",", "."))
+    col2.metric("🗑️ Linhas descartadas", f"{stats.discarded:,}".replace(",", "."))
+    col3.metric("📦 Versão dos dados", stats.version)
+    if not stats.rows:
+        return
+
+    st.header("📋 Resumo por País e Gênero")
+    st.dataframe(stats.summary().round(2))
+
+    st.header("📊 Distribuições")
+    metric = st.selectbox("Métrica", list(METRICS), format_func=METRIC_LABELS.get)
+    by_group = st.checkbox("Separar por país e gênero (os 6 maiores grupos)")
+
+    fig, ax = plt.subplots(figsize=(12, 5))
+    if by_group:
+        largest = np.argsort(-stats.counts)[:6]
+        for group in largest:
+            edges, counts = stats.histogram(metric, [group])
+            ax.stairs(counts / counts.sum(), edges, label=" / ".join(stats.groups[group]))
+        ax.set_ylabel("Fração do grupo")
+        ax.legend()
+    else:
+        edges, counts = stats.histogram(metric)
+        ax.stairs(counts, edges, fill=True, color="#2196F3", alpha=0.8)
+        ax.set_ylabel("Pessoas")
+    ax.set_xlabel(METRIC_LABELS[metric])
+    ax.grid(True, alpha=0.3)
+    st.pyplot(fig)
+    plt.close(fig)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resume um CSV de coorte sem abrir o Streamlit")
+    parser.add_argument("csv", help="arquivo da coorte (.csv ou .csv.gz)")
+    parser.add_argument("--chunk-size", type=int, default=200_000)
+    parser.add_argument("--model", choices=list(MODELS), default="legacy")
+    parser.add_argument("--generate", type=int, metavar="LINHAS",
+                        help="em vez de ler, escreve um CSV sintético com este número de linhas")
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_cohort(args.csv, args.generate)
+        return
+
+    start = time.perf_counter()
+    stats = process_cohort(args.csv, args.chunk_size, model=args.model)
+    elapsed = time.perf_counter() - start
+    print(f"{stats.rows} pessoas ({stats.discarded} descartadas) em {elapsed:.1f} s, "
+          f"{stats.rows / elapsed:,.0f} pessoas/s")
+    print(stats.summary().round(2).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
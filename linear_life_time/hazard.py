@@ -0,0 +1,201 @@
+import numpy as np
+
+GENDERS = ["male", "female", "other"]
+
+# Razão de risco (hazard ratio) de cada fator: quanto ele multiplica a
+# mortalidade em todas as idades. Fatores com intensidade têm uma razão
+# por nível e o nível usado quando ele não é informado.
+HAZARD_RATIOS = {
+    "smoking": ("smoking_intensity", {"light": 1.6, "moderate": 2.1, "heavy": 2.6}, "light"),
+    "obesity": ("bmi_category", {"mild": 1.1, "moderate": 1.45, "severe": 1.9}, "moderate"),
+    "diabetes": 1.8,
+    "hypertension": 1.4,
+    "heart_disease": 2.2,
+    "healthy_diet": ("diet_quality", {"basic": 0.95, "good": 0.85, "excellent": 0.75}, "good"),
+    "regular_exercise": ("exercise_intensity", {"light": 0.85, "moderate": 0.72, "high": 0.65}, "moderate"),
+    "good_sleep": 0.9,
+    "stress_management": 0.9,
+    "social_connections": 0.8,
+    "regular_checkups": 0.95,
+}
+# Fatores de múltipla escolha, sem sim/não: (razões, opção padrão)
+CHOICE_HAZARD_RATIOS = {
+    "alcohol": ({"none": 1.0, "light": 1.0, "moderate": 0.9, "heavy": 1.5}, "none"),
+    "family_longevity": ({"low": 1.35, "average": 1.0, "high": 0.75}, "average"),
+}
+
+
+def hazard_multiplier(health_factors):
+    """Multiplicador da mortalidade pelos hábitos e histórico de uma pessoa"""
+    multiplier = 1.0
+    for factor, ratio in HAZARD_RATIOS.items():
+        if not health_factors.get(factor):
+            continue
+        if isinstance(ratio, tuple):
+            column, ratios, default = ratio
+            ratio = ratios.get(health_factors.get(column) or default, ratios[default])
+        multiplier *= ratio
+    for factor, (ratios, default) in CHOICE_HAZARD_RATIOS.items():
+        multiplier *= ratios.get(health_factors.get(factor) or default, ratios[default])
+    return multiplier
+
+
+class GompertzMakeham:
+    """Tábua de vida paramétrica por país e gênero.
+
+    A mortalidade na idade x é ``h * (A + B * exp(c * x))``: A (Makeham) é
+    o risco que não depende da idade, B e c (Gompertz) o envelhecimento, e
+    h o multiplicador dos hábitos. A e c são os mesmos para todos; o B de
+    cada país e gênero é calibrado para que a expectativa ao nascer com
+    h = 1 seja a de ``data`` (as expectativas por país dos dados de
+    referência; "other" usa a média de homens e mulheres, como o modelo
+    aditivo).
+
+    A expectativa restante condicional e(x, h) = ∫ S(t) dt / S(x), de x ao
+    infinito, é integrada uma vez na construção, numa tabela por idade e
+    log(h); ``remaining`` só interpola nessa tabela, vetorizado sobre
+    qualquer número de perfis.
+    """
+
+    # Grades da tabela: idades de 0 a MAX_AGE e log do multiplicador
+    AGE_STEP = 0.5
+    MAX_AGE = 130.0
+    LOG_MULTIPLIERS = (-2.0, 4.5, 0.05)
+    # Passo da integração e idade em que a sobrevivência já é desprezível
+    STEP = 0.1
+    HORIZON = 150.0
+
+    def __init__(self, data, makeham=0.0005, slope=0.09):
+        self.makeham = makeham
+        self.slope = slope
+        self.countries = list(data)
+        self._country_ids = {country: index for index, country in enumerate(self.countries)}
+        targets = []
+        for country in self.countries:
+            male, female = data[country]["male"], data[country]["female"]
+            targets += [male, female, (male + female) / 2]
+        self.targets = np.array(targets)
+        self.gompertz = self._calibrate(self.targets)
+
+        low, high, step = self.LOG_MULTIPLIERS
+        self.log_multipliers = np.arange(low, high + step / 2, step)
+        self.ages = np.arange(0.0, self.MAX_AGE + self.AGE_STEP / 2, self.AGE_STEP)
+        self.table = np.ascontiguousarray(
+            self._integrate(self.gompertz[:, None], np.exp(self.log_multipliers)[None, :]))
+
+    def _integrate(self, gompertz, multipliers):
+        """e(x, h) nas idades de ``self.ages`` para cada combinação de B e h.
+
+        Vai do HORIZON para trás: em cada passo a mortalidade média m do
+        trecho dá e(t) = (1 - exp(-m d)) / m + exp(-m d) * e(t + d), o que não
+        estoura nem com sobrevivências minúsculas.
+        """
+        shape = np.broadcast_shapes(np.shape(gompertz), np.shape(multipliers))
+        steps = int(round(self.HORIZON / self.STEP))
+        keep = int(round(self.AGE_STEP / self.STEP))
+        last = int(round(self.MAX_AGE / self.STEP))
+
+        def cumulative(x):
+            return self.makeham * x + gompertz / self.slope * np.expm1(self.slope * x)
+
+        # Depois do horizonte, mortalidade constante
+        hazard = multipliers * (self.makeham + gompertz * np.exp(self.slope * self.HORIZON))
+        remaining = np.broadcast_to(1.0 / hazard, shape).copy()
+        table = np.empty((last // keep + 1,) + shape)
+        after = cumulative(steps * self.STEP)
+        for k in range(steps - 1, -1, -1):
+            before = cumulative(k * self.STEP)
+            exposure = multipliers * (after - before)
+            survival = np.exp(-exposure)
+            # (1 - exp(-m d)) / m, com o limite d quando m d vai a zero
+            inside = np.where(exposure > 1e-12, -np.expm1(-exposure) / np.maximum(exposure, 1e-12), 1.0)
+            remaining = self.STEP * inside + survival * remaining
+            if k <= last and k % keep == 0:
+                table[k // keep] = remaining
+            after = before
+        return np.moveaxis(table, 0, -2) if table.ndim > 2 else table
+
+    def _calibrate(self, targets):
+        # e(0) com h = 1 cai quando B sobe: integra uma grade de B de uma vez
+        # e interpola o log(B) de cada expectativa pedida
+        log_gompertz = np.linspace(np.log(1e-7), np.log(1e-1), 600)
+        at_birth = self._integrate(np.exp(log_gompertz), 1.0)[0]
+        return np.exp(np.interp(targets, at_birth[::-1], log_gompertz[::-1]))
+
+    def group(self, country, gender):
+        """Índice da linha da tabela de um país e gênero (país desconhecido usa World)"""
+        country = self._country_ids.get(country, self._country_ids.get("World", 0))
+        return 3 * country + (GENDERS.index(gender) if gender in GENDERS else 2)
+
+    def groups(self, countries, genders):
+        """``group`` para vetores de índices: país na ordem de ``countries`` e gênero em GENDERS"""
+        return 3 * np.asarray(countries) + np.asarray(genders)
+
+    def remaining(self, ages, groups, log_multipliers):
+        """Anos de vida restantes esperados para vetores de perfis, interpolados na tabela.
+
+        ``log_multipliers`` é o log de h de cada perfil. Devolve os anos
+        restantes com os hábitos e com h = 1, que é uma coluna exata da
+        tabela; os dois saem da mesma interpolação na idade.
+        """
+        # Operações no lugar: com milhões de perfis, alocar vetores custa
+        # mais que as contas
+        scaled = np.clip(np.asarray(ages, dtype=np.float64), 0.0, self.MAX_AGE)
+        scaled *= 1 / self.AGE_STEP
+        start = np.minimum(scaled.astype(np.int64), len(self.ages) - 2)
+        scaled -= start
+        age_fraction = scaled
+        width = len(self.log_multipliers)
+        values = self.table.reshape(-1)
+        low, _, step = self.LOG_MULTIPLIERS
+
+        position = np.asarray(log_multipliers, dtype=np.float64) - low
+        position *= 1 / step
+        np.clip(position, 0.0, width - 1.0, out=position)
+        column = np.minimum(position.astype(np.int64), width - 2)
+        position -= column
+        fraction = position
+
+        # Interpolação bilinear nos quatro vizinhos, pela tabela achatada
+        start *= width
+        start += np.asarray(groups) * (len(self.ages) * width)
+        column += start
+        top = _interpolate(values, column, 1, fraction)
+        bottom = _interpolate(values, column + width, 1, fraction)
+        start += int(round(-low / step))
+        neutral = _interpolate(values, start, width, age_fraction)
+        return _interpolate_between(top, bottom, age_fraction), neutral
+
+
+def _interpolate(values, index, offset, fraction):
+    low = values[index]
+    result = values[index + offset]
+    result -= low
+    result *= fraction
+    result += low
+    return result
+
+
+def _interpolate_between(low, high, fraction):
+    high -= low
+    high *= fraction
+    high += low
+    return high
+
+
+def estimate_life_expectancy_hazard(age, gender, health_factors, country="Brazil", reference=None):
+    """Mesma estimativa e retorno de estimate_life_expectancy, pelo modelo de risco.
+
+    O ajuste de saúde é a diferença, em anos, entre a expectativa com e
+    sem o multiplicador dos hábitos. A tábua é de período: não projeta
+    avanços médicos, então o bônus médico é sempre zero.
+    """
+    if reference is None:
+        from reference import current_reference
+
+        reference = current_reference()
+    model = reference.hazard_model
+    group = model.group(country, gender)
+    remaining_years, neutral = (float(years[0]) for years in
+                                model.remaining([age], [group], [np.log(hazard_multiplier(health_factors))]))
+    return remaining_years, age + remaining_years, remaining_years - neutral, 0.0, []
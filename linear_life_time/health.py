@@ -0,0 +1,57 @@
+# Anos somados ao score de saúde por fator sim/não presente. Fatores com
+# intensidade têm um valor por nível; os de múltipla escolha (álcool e
+# histórico familiar) contam sempre. É o formato de data/health_weights.json
+# e do que calibration.py exporta.
+HEALTH_WEIGHTS = {
+    # Fatores de risco (negativos)
+    "smoking": {"light": -5, "moderate": -8, "heavy": -12},  # <10, 10-20, >20 cigarros/dia
+    "alcohol": {"none": 0, "light": 0, "moderate": 1, "heavy": -6},  # 1-2 drinks/dia, >2 drinks/dia
+    "obesity": {"mild": -2, "moderate": -5, "severe": -8},  # BMI 25-30, 30-35, >35
+    "diabetes": -6,
+    "hypertension": -4,
+    "heart_disease": -10,
+    # Fatores positivos
+    "healthy_diet": {"basic": 1, "good": 3, "excellent": 5},  # excellent: dieta mediterrânea, etc.
+    "regular_exercise": {"light": 2, "moderate": 4, "high": 6},  # 1-2x, 3-5x, >5x/semana
+    "good_sleep": 2,
+    "stress_management": 3,
+    "social_connections": 2,
+    "regular_checkups": 1,
+    # Fatores genéticos/familiares: pais/avós viveram >85 anos ou morreram cedo
+    "family_longevity": {"low": -3, "average": 0, "high": 4},
+}
+
+# Fatores com intensidade: (coluna da intensidade, nível quando ela não é
+# informada, nível de valores desconhecidos)
+INTENSITY_COLUMNS = {
+    "smoking": ("smoking_intensity", "light", "light"),
+    "obesity": ("bmi_category", "moderate", "mild"),
+    "healthy_diet": ("diet_quality", "good", "basic"),
+    "regular_exercise": ("exercise_intensity", "moderate", "light"),
+}
+# Fatores de múltipla escolha: opção padrão, que também vale para valores desconhecidos
+CHOICE_DEFAULTS = {"alcohol": "none", "family_longevity": "average"}
+
+
+def check_health_weights(weights):
+    """Confere se ``weights`` tem os mesmos fatores e níveis de HEALTH_WEIGHTS; levanta ValueError"""
+    if not isinstance(weights, dict) or set(weights) != set(HEALTH_WEIGHTS):
+        raise ValueError(f"os pesos precisam ter exatamente os fatores {sorted(HEALTH_WEIGHTS)}")
+    for factor, points in HEALTH_WEIGHTS.items():
+        if isinstance(points, dict):
+            values = weights[factor]
+            if not isinstance(values, dict) or set(values) != set(points):
+                raise ValueError(f"{factor}: os níveis precisam ser {sorted(points)}")
+        else:
+            values = {factor: weights[factor]}
+        for value in values.values():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"{factor}: os pesos precisam ser números")
+    return weights
+
+
+def health_weights_from(data):
+    """Os pesos de um JSON exportado por calibration.py (ou só o dicionário de pesos), conferidos"""
+    if isinstance(data, dict) and "weights" in data:
+        data = data["weights"]
+    return check_health_weights(data)
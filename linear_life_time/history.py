@@ -0,0 +1,325 @@
+import argparse
+import atexit
+import datetime
+import hashlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history.db")
+AGE_BAND = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS estimates (
+    id INTEGER PRIMARY KEY,
+    profile TEXT NOT NULL,
+    created REAL NOT NULL,
+    model TEXT NOT NULL,
+    reference_version TEXT NOT NULL,
+    country TEXT NOT NULL,
+    gender TEXT NOT NULL,
+    age INTEGER NOT NULL,
+    age_band INTEGER NOT NULL,
+    health_factors TEXT NOT NULL,
+    remaining REAL NOT NULL,
+    expectancy REAL NOT NULL,
+    health_score REAL NOT NULL,
+    medical_bonus REAL NOT NULL,
+    applied_advances TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS estimates_by_cohort ON estimates (country, gender, age_band, created);
+CREATE INDEX IF NOT EXISTS estimates_by_profile ON estimates (profile);
+CREATE TABLE IF NOT EXISTS cohort_days (
+    country TEXT NOT NULL,
+    gender TEXT NOT NULL,
+    age_band INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    estimates INTEGER NOT NULL,
+    expectancy REAL NOT NULL,
+    remaining REAL NOT NULL,
+    health_score REAL NOT NULL,
+    PRIMARY KEY (country, gender, age_band, day)
+) WITHOUT ROWID;
+"""
+INSERT = ("INSERT INTO estimates (profile, created, model, reference_version, country, gender, age, age_band, "
+          "health_factors, remaining, expectancy, health_score, medical_bonus, applied_advances) "
+          "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+UPSERT_DAY = ("INSERT INTO cohort_days VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+              "ON CONFLICT (country, gender, age_band, day) DO UPDATE SET "
+              "estimates = estimates + excluded.estimates, expectancy = expectancy + excluded.expectancy, "
+              "remaining = remaining + excluded.remaining, health_score = health_score + excluded.health_score")
+
+_STOP = object()
+
+logger = logging.getLogger(__name__)
+
+
+def _connect(path):
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+def profile_key(model, reference_version, age, gender, country, health_factors, year=None):
+    """Identifica uma estimativa: mesmas entradas, modelo, dados de referência e ano dão a mesma resposta"""
+    year = year or datetime.date.today().year
+    canonical = json.dumps([model, reference_version, year, age, gender, country, health_factors],
+                           sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+class EstimateHistory:
+    """Histórico das estimativas calculadas, num SQLite em modo WAL.
+
+    ``record`` só coloca a estimativa numa fila: uma thread grava em
+    lotes, numa transação por lote, e a interface nunca espera pelo
+    disco. Cada lote também soma as estimativas em ``cohort_days`` (uma
+    linha por país, gênero, faixa de idade e dia), então ``trend`` lê só
+    essas somas, com qualquer número de estimativas guardadas. Perfis já
+    vistos vêm de um cache em memória ou do índice por perfil, sem
+    recalcular (veja ``estimate``).
+    """
+
+    def __init__(self, path=DEFAULT_PATH, batch=1000, cache_size=10_000):
+        self.path = path
+        self.batch = batch
+        self.cache_size = cache_size
+        connection = _connect(path)
+        connection.executescript(SCHEMA)
+        connection.close()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.last_error = None
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._local = threading.local()
+        self._writer = threading.Thread(target=self._write, name="history", daemon=True)
+        self._writer.start()
+
+    def _remember(self, key, result):
+        with self._cache_lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def lookup(self, key):
+        """Resultado guardado de um perfil (como o de estimate_life_expectancy), ou None"""
+        with self._cache_lock:
+            result = self._cache.get(key)
+        if result is not None:
+            return result
+        row = self._connection().execute(
+            "SELECT remaining, expectancy, health_score, medical_bonus, applied_advances FROM estimates "
+            "WHERE profile = ? ORDER BY id DESC LIMIT 1", (key,)).fetchone()
+        if row is None:
+            return None
+        result = (*row[:4], json.loads(row[4]))
+        self._remember(key, result)
+        return result
+
+    def record(self, key, model, reference_version, age, gender, country, health_factors, result):
+        remaining, expectancy, health_score, medical_bonus, applied_advances = result
+        self._remember(key, result)
+        self._queue.put([(key, time.time(), model, reference_version, country, gender, int(age),
+                          int(age) // AGE_BAND * AGE_BAND,
+                          json.dumps(health_factors, sort_keys=True, separators=(",", ":")),
+                          float(remaining), float(expectancy), float(health_score), float(medical_bonus),
+                          json.dumps(applied_advances, ensure_ascii=False))])
+
+    def record_many(self, rows):
+        """Enfileira várias linhas prontas, na ordem das colunas de INSERT"""
+        self._queue.put(list(rows))
+
+    def estimate(self, compute, model, reference, age, gender, health_factors, country):
+        """Resultado de ``compute`` para o perfil, do histórico se ele já foi calculado.
+
+        ``compute`` tem a assinatura de estimate_life_expectancy. A
+        estimativa é registrada de qualquer forma, para as tendências
+        contarem cada consulta. Devolve (resultado, veio do histórico).
+        """
+        key = profile_key(model, reference.version, age, gender, country, health_factors)
+        result = self.lookup(key)
+        cached = result is not None
+        if cached:
+            self.hits += 1
+        else:
+            self.misses += 1
+            result = compute(age, gender, health_factors, country, reference)
+        self.record(key, model, reference.version, age, gender, country, health_factors, result)
+        return result, cached
+
+    def _write_rows(self, connection, rows):
+        days = {}
+        for row in rows:
+            day_key = (row[4], row[5], row[7], time.strftime("%Y-%m-%d", time.localtime(row[1])))
+            totals = days.setdefault(day_key, [0, 0.0, 0.0, 0.0])
+            totals[0] += 1
+            totals[1] += row[10]
+            totals[2] += row[9]
+            totals[3] += row[11]
+        with connection:
+            connection.executemany(INSERT, rows)
+            connection.executemany(UPSERT_DAY, [(*day_key, *totals) for day_key, totals in days.items()])
+
+    def _write(self):
+        connection = None
+        stop = False
+        while not stop:
+            requests = [self._queue.get()]
+            # Junta o que já estiver na fila num único lote
+            while len(requests) < self.batch:
+                try:
+                    requests.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            rows = [row for request in requests if request is not _STOP for row in request]
+            stop = any(request is _STOP for request in requests)
+            try:
+                if rows:
+                    if connection is None:
+                        connection = _connect(self.path)
+                    self._write_rows(connection, rows)
+            except Exception as e:
+                # O lote com erro é descartado, mas a thread continua: sem
+                # ela, wait() e close() esperariam para sempre
+                self.errors += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.exception("histórico: %d estimativas não foram gravadas", len(rows))
+                if connection is not None:
+                    connection.close()
+                    connection = None
+            finally:
+                for _ in requests:
+                    self._queue.task_done()
+        if connection is not None:
+            connection.close()
+
+    def _connection(self):
+        # Uma conexão de leitura por thread
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = _connect(self.path)
+        return connection
+
+    def trend(self, country=None, gender=None, age_band=None):
+        """Estimativas por dia de um recorte: tuplas (dia, quantidade, expectativa média,
+        anos restantes médios, score de saúde médio). Filtros None pegam todos."""
+        conditions = []
+        parameters = []
+        for column, value in (("country", country), ("gender", gender), ("age_band", age_band)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                parameters.append(value)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        return self._connection().execute(
+            "SELECT day, SUM(estimates), SUM(expectancy) / SUM(estimates), SUM(remaining) / SUM(estimates), "
+            f"SUM(health_score) / SUM(estimates) FROM cohort_days {where}GROUP BY day ORDER BY day",
+            parameters).fetchall()
+
+    def latest(self, country, gender, age_band, limit=20):
+        """As últimas estimativas de um país, gênero e faixa de idade, direto do índice"""
+        return self._connection().execute(
+            "SELECT created, age, expectancy, health_score, model FROM estimates "
+            "WHERE country = ? AND gender = ? AND age_band = ? ORDER BY created DESC LIMIT ?",
+            (country, gender, age_band, limit)).fetchall()
+
+    def count(self):
+        return self._connection().execute("SELECT COUNT(*) FROM estimates").fetchone()[0]
+
+    def wait(self):
+        """Espera até todas as estimativas registradas estarem gravadas"""
+        self._queue.join()
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def estimate_history():
+    """EstimateHistory em DEFAULT_PATH, aberto uma vez por processo e gravado ao sair"""
+    global _history
+    if _history is None:
+        with _history_lock:
+            if _history is None:
+                history = EstimateHistory()
+                atexit.register(history.close)
+                _history = history
+    return _history
+
+
+def generate_history(history, rows, model="legacy", chunk_size=200_000, seed=0, days=365):
+    """Grava ``rows`` estimativas sintéticas, espalhadas pelos últimos ``days`` dias, para testar consultas"""
+    import numpy as np
+
+    from cohort import estimate_cohort, synthetic_cohort
+    from reference import current_reference
+
+    rng = np.random.default_rng(seed)
+    reference = current_reference()
+    written = 0
+    while written < rows:
+        size = min(chunk_size, rows - written)
+        frame = synthetic_cohort(rng, size)
+        estimates = estimate_cohort(frame.astype({name: "category" for name in frame if name != "age"}),
+                                    model=model, reference=reference)
+        created = time.time() - rng.uniform(0, days * 86400, size)
+        records = frame.drop(columns="age").to_dict("records")
+        history.record_many(
+            (f"synthetic-{written + index}", created[index], model, reference.version, record["country"],
+             record["gender"], int(age), int(age) // AGE_BAND * AGE_BAND,
+             json.dumps(record, default=int, separators=(",", ":")), remaining, expectancy, health_score,
+             medical_bonus, "[]")
+            for index, (record, age, remaining, expectancy, health_score, medical_bonus) in enumerate(zip(
+                records, frame["age"].tolist(), estimates["remaining"].tolist(), estimates["expectancy"].tolist(),
+                estimates["health_score"].tolist(), estimates["medical_bonus"].tolist())))
+        written += size
+    history.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consulta o histórico de estimativas")
+    parser.add_argument("--country")
+    parser.add_argument("--gender", choices=["male", "female", "other"])
+    parser.add_argument("--age-band", type=int, help=f"começo da faixa de {AGE_BAND} anos (ex.: 30)")
+    parser.add_argument("--path", default=DEFAULT_PATH)
+    parser.add_argument("--generate", type=int, metavar="LINHAS",
+                        help="antes de consultar, grava este número de estimativas sintéticas")
+    args = parser.parse_args()
+
+    history = EstimateHistory(args.path)
+    if args.generate:
+        start = time.perf_counter()
+        generate_history(history, args.generate)
+        elapsed = time.perf_counter() - start
+        print(f"{args.generate} estimativas gravadas em {elapsed:.1f} s ({args.generate / elapsed:,.0f}/s)")
+
+    start = time.perf_counter()
+    trend = history.trend(args.country, args.gender, args.age_band)
+    elapsed = time.perf_counter() - start
+    print(f"{history.count()} estimativas no histórico; tendência em {elapsed * 1000:.1f} ms")
+    for day, estimates, expectancy, remaining, health_score in trend[-30:]:
+        print(f"{day}  {estimates:>8}  expectativa {expectancy:6.1f}  restantes {remaining:6.1f}  "
+              f"score {health_score:+5.1f}")
+    history.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,14 @@ import datetime
 from dateutil.relativedelta import relativedelta
 import streamlit as st
 
+from health import CHOICE_DEFAULTS, HEALTH_WEIGHTS, INTENSITY_COLUMNS
+from history import AGE_BAND, estimate_history
+from models import MODELS
+from reference import current_reference, reference_store
+
+# Expectativas por país, marcos de avanços médicos e pesos do score de
+# saúde ficam em data/*.json e são recarregados sem reiniciar (reference.py)
+
 
 def calculate_age(birth_date):
     """Calcula idade precisa usando relativedelta para considerar anos bissextos"""
@@ -15,20 +23,9 @@ def calculate_age(birth_date):
     return age_delta.years, age_delta.months, remaining_days
 
 
-def get_base_life_expectancy(age, gender, country="Brazil"):
+def get_base_life_expectancy(age, gender, country="Brazil", reference=None):
     """Retorna expectativa de vida base mais realista baseada em dados demográficos"""
-    # Dados baseados em estatísticas do IBGE e OMS (aproximados)
-    life_expectancy_data = {
-        "Brazil": {
-            "male": 73.1,
-            "female": 79.9
-        },
-        "World": {
-            "male": 70.8,
-            "female": 75.9
-        }
-    }
-    
+    life_expectancy_data = (reference or current_reference()).life_expectancy
     base_country = life_expectancy_data.get(country, life_expectancy_data["World"])
     base_expectancy = base_country.get(gender, 
                                      (base_country["male"] + base_country["female"]) / 2)
@@ -36,105 +33,30 @@ def get_base_life_expectancy(age, gender, country="Brazil"):
     return base_expectancy
 
 
-def calculate_health_score(health_factors):
-    """Calcula um score de saúde mais sofisticado"""
+def calculate_health_score(health_factors, weights=HEALTH_WEIGHTS):
+    """Calcula um score de saúde mais sofisticado.
+
+    Soma os anos de ``weights`` (HEALTH_WEIGHTS ou pesos calibrados, ver
+    calibration.py) de cada fator presente, pelo nível de intensidade
+    quando o fator tem níveis.
+    """
     score = 0
-    
-    # Fatores de risco (negativos)
-    if health_factors["smoking"]:
-        if health_factors["smoking_intensity"] == "heavy":  # >20 cigarros/dia
-            score -= 12
-        elif health_factors["smoking_intensity"] == "moderate":  # 10-20 cigarros/dia
-            score -= 8
-        else:  # <10 cigarros/dia
-            score -= 5
-            
-    if health_factors["alcohol"] == "heavy":  # >2 drinks/dia
-        score -= 6
-    elif health_factors["alcohol"] == "moderate":  # 1-2 drinks/dia
-        score += 1  # Benefício moderado do álcool
-        
-    if health_factors["obesity"]:
-        bmi_category = health_factors.get("bmi_category", "moderate")
-        if bmi_category == "severe":  # BMI > 35
-            score -= 8
-        elif bmi_category == "moderate":  # BMI 30-35
-            score -= 5
-        else:  # BMI 25-30 (sobrepeso)
-            score -= 2
-            
-    if health_factors["diabetes"]:
-        score -= 6
-    if health_factors["hypertension"]:
-        score -= 4
-    if health_factors["heart_disease"]:
-        score -= 10
-        
-    # Fatores positivos
-    if health_factors["healthy_diet"]:
-        diet_quality = health_factors.get("diet_quality", "good")
-        if diet_quality == "excellent":  # Dieta mediterrânea, etc.
-            score += 5
-        elif diet_quality == "good":
-            score += 3
-        else:
-            score += 1
-            
-    if health_factors["regular_exercise"]:
-        exercise_intensity = health_factors.get("exercise_intensity", "moderate")
-        if exercise_intensity == "high":  # >5x/semana, intenso
-            score += 6
-        elif exercise_intensity == "moderate":  # 3-5x/semana
-            score += 4
-        else:  # 1-2x/semana
-            score += 2
-            
-    if health_factors["good_sleep"]:
-        score += 2
-    if health_factors["stress_management"]:
-        score += 3
-    if health_factors["social_connections"]:
-        score += 2
-    if health_factors["regular_checkups"]:
-        score += 1
-        
-    # Fatores genéticos/familiares
-    family_longevity = health_factors.get("family_longevity", "average")
-    if family_longevity == "high":  # Pais/avós viveram >85 anos
-        score += 4
-    elif family_longevity == "low":  # Histórico de morte precoce
-        score -= 3
-        
+    for factor, points in weights.items():
+        if factor in CHOICE_DEFAULTS:
+            default = CHOICE_DEFAULTS[factor]
+            score += points.get(health_factors.get(factor, default), points[default])
+        elif health_factors.get(factor):
+            if factor in INTENSITY_COLUMNS:
+                column, default, unknown = INTENSITY_COLUMNS[factor]
+                points = points.get(health_factors.get(column, default), points[unknown])
+            score += points
     return score
 
 
-def calculate_medical_advances_bonus(current_age, remaining_years):
+def calculate_medical_advances_bonus(current_age, remaining_years, reference=None):
     """Calcula o bônus de anos baseado nos avanços médicos esperados"""
     current_year = datetime.datetime.now().year
-    
-    # Estimativas conservadoras baseadas em tendências históricas e pesquisas atuais
-    advances_timeline = {
-        # Próximos 10 anos (2025-2035)
-        2035: {
-            "longevity_gain": 2.5,  # Terapias genéticas, medicina personalizada
-            "description": "Medicina personalizada e terapias genéticas"
-        },
-        # Próximos 20 anos (2025-2045) 
-        2045: {
-            "longevity_gain": 5.0,  # Regeneração celular, órgãos artificiais
-            "description": "Regeneração celular e órgãos bioengenheirados"
-        },
-        # Próximos 30 anos (2025-2055)
-        2055: {
-            "longevity_gain": 8.0,  # Nanotecnologia médica, reversão do envelhecimento
-            "description": "Nanotecnologia médica e reversão parcial do envelhecimento"
-        },
-        # Próximos 40+ anos (2025-2065+)
-        2065: {
-            "longevity_gain": 12.0,  # Avanços revolucionários em longevidade
-            "description": "Tecnologias disruptivas de extensão da vida"
-        }
-    }
+    advances_timeline = (reference or current_reference()).medical_advances
     
     total_bonus = 0
     applied_advances = []
@@ -164,12 +86,14 @@ def calculate_medical_advances_bonus(current_age, remaining_years):
     return total_bonus, applied_advances
 
 
-def estimate_life_expectancy(age, gender, health_factors, country="Brazil"):
+def estimate_life_expectancy(age, gender, health_factors, country="Brazil", reference=None):
     """Estimativa mais precisa baseada em múltiplos fatores incluindo avanços médicos"""
-    base_life_expectancy = get_base_life_expectancy(age, gender, country)
+    # Uma só versão dos dados de referência do começo ao fim do cálculo
+    reference = reference or current_reference()
+    base_life_expectancy = get_base_life_expectancy(age, gender, country, reference)
     
     # Ajuste baseado no score de saúde
-    health_adjustment = calculate_health_score(health_factors)
+    health_adjustment = calculate_health_score(health_factors, reference.health_weights)
     
     # Ajuste por idade atual (pessoas que já viveram mais têm expectativa ligeiramente maior)
     if age > 65:
@@ -180,7 +104,7 @@ def estimate_life_expectancy(age, gender, health_factors, country="Brazil"):
     preliminary_remaining_years = max(0, preliminary_life_expectancy - age)
     
     # Calcular bônus dos avanços médicos
-    medical_bonus, applied_advances = calculate_medical_advances_bonus(age, preliminary_remaining_years)
+    medical_bonus, applied_advances = calculate_medical_advances_bonus(age, preliminary_remaining_years, reference)
     
     # Aplicar o bônus médico
     adjusted_life_expectancy = preliminary_life_expectancy + medical_bonus
@@ -310,10 +234,12 @@ def main():
     # Coletar dados de saúde
     health_factors = collect_health_data()
     
-    # Calcular expectativa
-    remaining_years, total_expectancy, health_score, medical_bonus, applied_advances = estimate_life_expectancy(
-        years, health_factors["gender"], health_factors
+    # Calcular expectativa (perfis já calculados vêm do histórico)
+    result, _ = estimate_history().estimate(
+        estimate_life_expectancy, "legacy", current_reference(), years, health_factors["gender"], health_factors,
+        "Brazil"
     )
+    remaining_years, total_expectancy, health_score, medical_bonus, applied_advances = result
     
     # Resultados detalhados
     print(f"\n{'='*50}")
@@ -367,13 +293,9 @@ def main():
     print("O mais importante é focar em uma vida saudável e com qualidade! 🌟")
 
 
-def streamlit_app():
+def streamlit_app(model="legacy"):
     """Interface Streamlit para a calculadora de expectativa de vida"""
-    st.set_page_config(
-        page_title="Calculadora de Expectativa de Vida", 
-        page_icon="📊",
-        layout="wide"
-    )
+    reference = current_reference()
     
     st.title("📊 Calculadora Avançada de Expectativa de Vida")
     st.markdown("---")
@@ -410,7 +332,7 @@ def streamlit_app():
     with col1:
         st.subheader("Dados Básicos")
         gender = st.selectbox("Gênero", ["Masculino", "Feminino", "Outro"], index=0)
-        country = st.selectbox("País", ["Brazil", "World"], index=0)
+        country = st.selectbox("País", reference.countries, index=0)
         
         st.subheader("Fatores de Risco")
         smoking = st.checkbox("Fuma?")
@@ -544,13 +466,20 @@ def streamlit_app():
                 health_factors["exercise_intensity"] = exercise_map[exercise_intensity]
             
             # Calcular expectativa
-            remaining_years, total_expectancy, health_score, medical_bonus, applied_advances = estimate_life_expectancy(
-                years, health_factors["gender"], health_factors, country
-            )
+            if model == "hazard":
+                from hazard import estimate_life_expectancy_hazard as estimate
+            else:
+                estimate = estimate_life_expectancy
+            # Perfis já calculados vêm do histórico, e toda estimativa é registrada nele
+            history = estimate_history()
+            (remaining_years, total_expectancy, health_score, medical_bonus, applied_advances), cached = \
+                history.estimate(estimate, model, reference, years, health_factors["gender"], health_factors, country)
             
             # Exibir resultados
             st.markdown("---")
             st.header("📊 Resultados da Análise")
+            if cached:
+                st.caption("💾 Perfil já calculado antes: resultado do histórico")
             
             # Métricas principais
             col1, col2, col3, col4 = st.columns(4)
@@ -612,7 +541,7 @@ def streamlit_app():
                 # Gráfico de pizza mostrando os componentes
                 import matplotlib.pyplot as plt
                 
-                base_expectancy = get_base_life_expectancy(years, health_factors["gender"], country)
+                base_expectancy = get_base_life_expectancy(years, health_factors["gender"], country, reference)
                 components = []
                 labels = []
                 colors = []
@@ -664,7 +593,7 @@ def streamlit_app():
                         color='#81C784', label=f'Vida restante ({remaining_years:.1f} anos)', alpha=0.8)
                 
                 # Expectativa base como referência (linha)
-                base_exp = get_base_life_expectancy(years, health_factors["gender"], country)
+                base_exp = get_base_life_expectancy(years, health_factors["gender"], country, reference)
                 ax2.axvline(x=base_exp, color='gray', linestyle='--', 
                            label=f'Expectativa base ({base_exp:.1f} anos)')
                 
@@ -704,8 +633,8 @@ def streamlit_app():
             fig3, ax3 = plt.subplots(figsize=(12, 6))
             
             categories = ['Expectativa\nBase', 'Média\nMundial', 'Sua\nExpectativa']
-            base_exp = get_base_life_expectancy(years, health_factors["gender"], country)
-            world_exp = get_base_life_expectancy(years, health_factors["gender"], "World")
+            base_exp = get_base_life_expectancy(years, health_factors["gender"], country, reference)
+            world_exp = get_base_life_expectancy(years, health_factors["gender"], "World", reference)
             
             values = [base_exp, world_exp, total_expectancy]
             colors = ['#FFC107', '#FF9800', '#4CAF50']
@@ -735,11 +664,46 @@ def streamlit_app():
             
             st.pyplot(fig3)
             
+            # Tendência das estimativas de pessoas do mesmo grupo, pelas somas diárias do histórico
+            age_band = years // AGE_BAND * AGE_BAND
+            trend = history.trend(country, health_factors["gender"], age_band)
+            if len(trend) > 1:
+                st.subheader(f"📅 Estimativas do seu grupo ({country}, {age_band}-{age_band + AGE_BAND - 1} anos)")
+                st.line_chart({"Expectativa média": {day: expectancy for day, _, expectancy, _, _ in trend}})
+            
         except Exception as e:
             st.error(f"Erro no cálculo: {str(e)}")
             st.error("Verifique se todas as datas são válidas.")
 
 
+def app():
+    """Entrada da interface Streamlit, com a página escolhida na barra lateral"""
+    st.set_page_config(
+        page_title="Calculadora de Expectativa de Vida", 
+        page_icon="📊",
+        layout="wide"
+    )
+    
+    page = st.sidebar.radio("Página", ["Calculadora individual", "Análise de coorte"])
+    model = st.sidebar.selectbox("Modelo", list(MODELS), format_func=MODELS.get)
+    
+    metrics = reference_store().metrics()
+    with st.sidebar.expander("📦 Dados de referência"):
+        st.metric("Versão", metrics["version"])
+        st.metric("Recargas", metrics["reloads"])
+        if metrics["reload_seconds"] is not None:
+            st.metric("Última recarga", f"{metrics['reload_seconds'] * 1000:.0f} ms")
+        st.caption("Carregados em " + datetime.datetime.fromtimestamp(metrics["loaded_at"]).strftime("%d/%m/%Y %H:%M:%S"))
+        if metrics["last_error"]:
+            st.error(f"Arquivo inválido, mantida a versão anterior: {metrics['last_error']}")
+    if page == "Análise de coorte":
+        # Importado só aqui: a página de coorte importa este módulo
+        from cohort import cohort_page
+        cohort_page(model)
+    else:
+        streamlit_app(model)
+
+
 # Executar a app Streamlit se o script for chamado com streamlit
 if __name__ == "__main__":
     # Verificar se está rodando no Streamlit
@@ -747,7 +711,7 @@ if __name__ == "__main__":
         # Esta é uma forma de detectar se estamos no Streamlit
         import sys
         if 'streamlit' in sys.modules:
-            streamlit_app()
+            app()
         else:
             main()
     except:
@@ -0,0 +1,7 @@
+# Modelos de estimativa: o aditivo original (main.estimate_life_expectancy) e o
+# de risco (hazard.py). Fica fora de main.py para cohort.py e reports.py
+# escolherem o modelo sem importar o Streamlit.
+MODELS = {
+    "legacy": "Aditivo (anos somados à expectativa base)",
+    "hazard": "Risco Gompertz–Makeham (tábua de vida)",
+}
@@ -1,6 +1,21 @@
 import datetime
+import os
+import sys
+
 from dateutil.relativedelta import relativedelta
 
+# Entrada e saída pelo mesmo Terminal dos jogos de texto (python_jogos_alura_curso/terminal.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "python_jogos_alura_curso"))
+from terminal import Terminal
+
+# Estimativas guardadas no mesmo histórico da versão com interface (linear_life_time/history.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from history import estimate_history, profile_key
+
+# Os dados desta versão são fixos no código: modelo e versão próprios no histórico
+HISTORY_MODEL = "no-gui"
+HISTORY_VERSION = "no-gui"
+
 
 def calculate_age(birth_date):
     """Calcula idade precisa usando relativedelta para considerar anos bissextos"""
@@ -192,179 +207,192 @@ def estimate_life_expectancy(age, gender, health_factors, country="Brazil"):
     return remaining_years, adjusted_life_expectancy, health_adjustment, medical_bonus, applied_advances
 
 
-def get_yes_no_input(question):
+def get_yes_no_input(question, terminal=None):
     """Helper function para input sim/não"""
+    terminal = terminal or Terminal()
     while True:
-        response = input(f"{question} (sim/não): ").lower().strip()
+        response = terminal.le(f"{question} (sim/não): ").lower().strip()
         if response in ['sim', 's', 'yes', 'y']:
             return True
         elif response in ['não', 'nao', 'n', 'no']:
             return False
         else:
-            print("Por favor, responda com 'sim' ou 'não'")
+            terminal.escreve("Por favor, responda com 'sim' ou 'não'")
 
 
-def get_choice_input(question, choices):
+def get_choice_input(question, choices, terminal=None):
     """Helper function para múltipla escolha"""
-    print(f"\n{question}")
+    terminal = terminal or Terminal()
+    terminal.escreve(f"\n{question}")
     for i, choice in enumerate(choices, 1):
-        print(f"{i}. {choice}")
+        terminal.escreve(f"{i}. {choice}")
     
     while True:
         try:
-            choice_num = int(input("Escolha uma opção (número): "))
+            choice_num = int(terminal.le("Escolha uma opção (número): "))
             if 1 <= choice_num <= len(choices):
                 return choices[choice_num - 1]
             else:
-                print(f"Por favor, escolha um número entre 1 e {len(choices)}")
+                terminal.escreve(f"Por favor, escolha um número entre 1 e {len(choices)}")
         except ValueError:
-            print("Por favor, digite um número válido")
+            terminal.escreve("Por favor, digite um número válido")
 
 
-def collect_health_data():
+def collect_health_data(terminal=None):
     """Coleta dados de saúde mais detalhados"""
-    print("\n=== INFORMAÇÕES DE SAÚDE ===")
+    terminal = terminal or Terminal()
+    terminal.escreve("\n=== INFORMAÇÕES DE SAÚDE ===")
     
     health_factors = {}
     
     # Gênero
     gender_options = ["male", "female", "other"]
     gender_display = ["Masculino", "Feminino", "Outro"]
-    chosen_gender = get_choice_input("Qual seu gênero?", gender_display)
+    chosen_gender = get_choice_input("Qual seu gênero?", gender_display, terminal)
     health_factors["gender"] = gender_options[gender_display.index(chosen_gender)]
     
     # Tabagismo
-    health_factors["smoking"] = get_yes_no_input("Você fuma?")
+    health_factors["smoking"] = get_yes_no_input("Você fuma?", terminal)
     if health_factors["smoking"]:
         smoking_options = ["light", "moderate", "heavy"]
         smoking_display = ["Leve (<10 cigarros/dia)", "Moderado (10-20 cigarros/dia)", "Pesado (>20 cigarros/dia)"]
-        chosen_intensity = get_choice_input("Intensidade do tabagismo:", smoking_display)
+        chosen_intensity = get_choice_input("Intensidade do tabagismo:", smoking_display, terminal)
         health_factors["smoking_intensity"] = smoking_options[smoking_display.index(chosen_intensity)]
     
     # Álcool
     alcohol_options = ["none", "light", "moderate", "heavy"]
     alcohol_display = ["Não bebo", "Ocasional (1-2x/semana)", "Moderado (1-2 drinks/dia)", "Pesado (>2 drinks/dia)"]
-    chosen_alcohol = get_choice_input("Consumo de álcool:", alcohol_display)
+    chosen_alcohol = get_choice_input("Consumo de álcool:", alcohol_display, terminal)
     health_factors["alcohol"] = alcohol_options[alcohol_display.index(chosen_alcohol)]
     
     # Peso/Obesidade
-    health_factors["obesity"] = get_yes_no_input("Você se considera acima do peso?")
+    health_factors["obesity"] = get_yes_no_input("Você se considera acima do peso?", terminal)
     if health_factors["obesity"]:
         bmi_options = ["mild", "moderate", "severe"]
         bmi_display = ["Sobrepeso leve", "Obesidade moderada", "Obesidade severa"]
-        chosen_bmi = get_choice_input("Grau de sobrepeso:", bmi_display)
+        chosen_bmi = get_choice_input("Grau de sobrepeso:", bmi_display, terminal)
         health_factors["bmi_category"] = bmi_options[bmi_display.index(chosen_bmi)]
     
     # Condições médicas
-    health_factors["diabetes"] = get_yes_no_input("Você tem diabetes?")
-    health_factors["hypertension"] = get_yes_no_input("Você tem pressão alta?")
-    health_factors["heart_disease"] = get_yes_no_input("Você tem doença cardíaca?")
+    health_factors["diabetes"] = get_yes_no_input("Você tem diabetes?", terminal)
+    health_factors["hypertension"] = get_yes_no_input("Você tem pressão alta?", terminal)
+    health_factors["heart_disease"] = get_yes_no_input("Você tem doença cardíaca?", terminal)
     
     # Hábitos saudáveis
-    health_factors["healthy_diet"] = get_yes_no_input("Você mantém uma dieta saudável?")
+    health_factors["healthy_diet"] = get_yes_no_input("Você mantém uma dieta saudável?", terminal)
     if health_factors["healthy_diet"]:
         diet_options = ["basic", "good", "excellent"]
         diet_display = ["Básica (evito fast food)", "Boa (bastante frutas/vegetais)", "Excelente (dieta balanceada/orgânica)"]
-        chosen_diet = get_choice_input("Qualidade da dieta:", diet_display)
+        chosen_diet = get_choice_input("Qualidade da dieta:", diet_display, terminal)
         health_factors["diet_quality"] = diet_options[diet_display.index(chosen_diet)]
     
-    health_factors["regular_exercise"] = get_yes_no_input("Você pratica exercícios regularmente?")
+    health_factors["regular_exercise"] = get_yes_no_input("Você pratica exercícios regularmente?", terminal)
     if health_factors["regular_exercise"]:
         exercise_options = ["light", "moderate", "high"]
         exercise_display = ["Leve (1-2x/semana)", "Moderado (3-4x/semana)", "Intenso (5+x/semana)"]
-        chosen_exercise = get_choice_input("Intensidade dos exercícios:", exercise_display)
+        chosen_exercise = get_choice_input("Intensidade dos exercícios:", exercise_display, terminal)
         health_factors["exercise_intensity"] = exercise_options[exercise_display.index(chosen_exercise)]
     
     # Outros fatores
-    health_factors["good_sleep"] = get_yes_no_input("Você dorme bem (7-8h por noite)?")
-    health_factors["stress_management"] = get_yes_no_input("Você consegue gerenciar bem o estresse?")
-    health_factors["social_connections"] = get_yes_no_input("Você tem boas conexões sociais/familiares?")
-    health_factors["regular_checkups"] = get_yes_no_input("Você faz checkups médicos regulares?")
+    health_factors["good_sleep"] = get_yes_no_input("Você dorme bem (7-8h por noite)?", terminal)
+    health_factors["stress_management"] = get_yes_no_input("Você consegue gerenciar bem o estresse?", terminal)
+    health_factors["social_connections"] = get_yes_no_input("Você tem boas conexões sociais/familiares?", terminal)
+    health_factors["regular_checkups"] = get_yes_no_input("Você faz checkups médicos regulares?", terminal)
     
     # Histórico familiar
     family_options = ["low", "average", "high"]
     family_display = ["Baixa (parentes morreram cedo)", "Média (expectativa normal)", "Alta (parentes viveram >85 anos)"]
-    chosen_family = get_choice_input("Longevidade familiar:", family_display)
+    chosen_family = get_choice_input("Longevidade familiar:", family_display, terminal)
     health_factors["family_longevity"] = family_options[family_display.index(chosen_family)]
     
     return health_factors
 
 
-def main():
-    print("=== CALCULADORA AVANÇADA DE EXPECTATIVA DE VIDA ===\n")
+def main(terminal=None):
+    terminal = terminal or Terminal()
+    terminal.escreve("=== CALCULADORA AVANÇADA DE EXPECTATIVA DE VIDA ===\n")
     
     # Dados de nascimento
-    print("=== INFORMAÇÕES BÁSICAS ===")
-    year_birth = int(input("Ano de nascimento: "))
-    month_birth = int(input("Mês de nascimento (1-12): "))
-    day_birth = int(input("Dia de nascimento: "))
-    hour_birth = int(input("Hora de nascimento (formato 24h, opcional, use 12 se não souber): "))
+    terminal.escreve("=== INFORMAÇÕES BÁSICAS ===")
+    year_birth = int(terminal.le("Ano de nascimento: "))
+    month_birth = int(terminal.le("Mês de nascimento (1-12): "))
+    day_birth = int(terminal.le("Dia de nascimento: "))
+    hour_birth = int(terminal.le("Hora de nascimento (formato 24h, opcional, use 12 se não souber): "))
 
     birth_date = datetime.datetime(year_birth, month_birth, day_birth, hour_birth)
 
     years, months, days = calculate_age(birth_date)
 
-    print(f"\n📅 Você tem exatamente {years} anos, {months} meses e {days} dias de vida.")
+    terminal.escreve(f"\n📅 Você tem exatamente {years} anos, {months} meses e {days} dias de vida.")
     
     # Coletar dados de saúde
-    health_factors = collect_health_data()
-    
-    # Calcular expectativa
-    remaining_years, total_expectancy, health_score, medical_bonus, applied_advances = estimate_life_expectancy(
-        years, health_factors["gender"], health_factors
-    )
+    health_factors = collect_health_data(terminal)
+    
+    # Calcular expectativa (perfis já calculados vêm do histórico)
+    history = estimate_history()
+    gender = health_factors["gender"]
+    key = profile_key(HISTORY_MODEL, HISTORY_VERSION, years, gender, "Brazil", health_factors)
+    result = history.lookup(key)
+    if result is None:
+        result = estimate_life_expectancy(years, gender, health_factors)
+    history.record(key, HISTORY_MODEL, HISTORY_VERSION, years, gender, "Brazil", health_factors, result)
+    remaining_years, total_expectancy, health_score, medical_bonus, applied_advances = result
     
     # Resultados detalhados
-    print(f"\n{'='*50}")
-    print("📊 RESULTADOS DA ANÁLISE")
-    print(f"{'='*50}")
-    print(f"🎂 Idade atual: {years} anos")
-    print(f"📈 Expectativa de vida total: {total_expectancy:.1f} anos")
-    print(f"⏰ Anos restantes estimados: {remaining_years:.1f} anos")
-    print(f"📊 Score de saúde: {health_score:+.0f} anos (hábitos de vida)")
-    print(f"🔬 Bônus médico: +{medical_bonus:.1f} anos (avanços da medicina)")
+    terminal.escreve(f"\n{'='*50}")
+    terminal.escreve("📊 RESULTADOS DA ANÁLISE")
+    terminal.escreve(f"{'='*50}")
+    terminal.escreve(f"🎂 Idade atual: {years} anos")
+    terminal.escreve(f"📈 Expectativa de vida total: {total_expectancy:.1f} anos")
+    terminal.escreve(f"⏰ Anos restantes estimados: {remaining_years:.1f} anos")
+    terminal.escreve(f"📊 Score de saúde: {health_score:+.0f} anos (hábitos de vida)")
+    terminal.escreve(f"🔬 Bônus médico: +{medical_bonus:.1f} anos (avanços da medicina)")
     
     # Data estimada
     estimated_death = datetime.datetime.now() + relativedelta(years=int(remaining_years))
-    print(f"📅 Data estimada: {estimated_death.strftime('%B de %Y')}")
+    terminal.escreve(f"📅 Data estimada: {estimated_death.strftime('%B de %Y')}")
     
     # Detalhes dos avanços médicos considerados
     if applied_advances:
-        print(f"\n{'='*40}")
-        print("🔬 AVANÇOS MÉDICOS CONSIDERADOS")
-        print(f"{'='*40}")
+        terminal.escreve(f"\n{'='*40}")
+        terminal.escreve("🔬 AVANÇOS MÉDICOS CONSIDERADOS")
+        terminal.escreve(f"{'='*40}")
         for advance in applied_advances:
-            print(f"📅 {advance['year']}: +{advance['bonus']:.1f} anos")
-            print(f"   💡 {advance['description']}")
+            terminal.escreve(f"📅 {advance['year']}: +{advance['bonus']:.1f} anos")
+            terminal.escreve(f"   💡 {advance['description']}")
     
     # Interpretação do score
-    print(f"\n{'='*30}")
-    print("💡 INTERPRETAÇÃO")
-    print(f"{'='*30}")
+    terminal.escreve(f"\n{'='*30}")
+    terminal.escreve("💡 INTERPRETAÇÃO")
+    terminal.escreve(f"{'='*30}")
     
     if health_score >= 10:
-        print("🟢 Excelente! Seus hábitos de vida são muito saudáveis.")
+        terminal.escreve("🟢 Excelente! Seus hábitos de vida são muito saudáveis.")
     elif health_score >= 5:
-        print("🟡 Bom! Você tem hábitos saudáveis com margem para melhorias.")
+        terminal.escreve("🟡 Bom! Você tem hábitos saudáveis com margem para melhorias.")
     elif health_score >= 0:
-        print("🟠 Moderado. Considere melhorar alguns hábitos de vida.")
+        terminal.escreve("🟠 Moderado. Considere melhorar alguns hábitos de vida.")
     elif health_score >= -5:
-        print("🔴 Atenção! Alguns fatores de risco importantes identificados.")
+        terminal.escreve("🔴 Atenção! Alguns fatores de risco importantes identificados.")
     else:
-        print("🚨 Crítico! Múltiplos fatores de risco. Procure ajuda médica.")
-    
-    print(f"\n{'='*50}")
-    print("⚠️  AVISO IMPORTANTE")
-    print(f"{'='*50}")
-    print("Esta é apenas uma estimativa baseada em dados estatísticos gerais")
-    print("e projeções conservadoras dos avanços médicos esperados.")
-    print("Fatores como genética, acesso à saúde, eventos imprevistos e")
-    print("o ritmo real dos avanços tecnológicos podem alterar significativamente")
-    print("estes números. As projeções médicas são baseadas em tendências atuais")
-    print("e podem ser tanto subestimadas quanto superestimadas.")
-    print("Sempre consulte profissionais de saúde para avaliações precisas.")
-    print("O mais importante é focar em uma vida saudável e com qualidade! 🌟")
+        terminal.escreve("🚨 Crítico! Múltiplos fatores de risco. Procure ajuda médica.")
+    
+    terminal.escreve(f"\n{'='*50}")
+    terminal.escreve("⚠️  AVISO IMPORTANTE")
+    terminal.escreve(f"{'='*50}")
+    terminal.escreve("Esta é apenas uma estimativa baseada em dados estatísticos gerais")
+    terminal.escreve("e projeções conservadoras dos avanços médicos esperados.")
+    terminal.escreve("Fatores como genética, acesso à saúde, eventos imprevistos e")
+    terminal.escreve("o ritmo real dos avanços tecnológicos podem alterar significativamente")
+    terminal.escreve("estes números. As projeções médicas são baseadas em tendências atuais")
+    terminal.escreve("e podem ser tanto subestimadas quanto superestimadas.")
+    terminal.escreve("Sempre consulte profissionais de saúde para avaliações precisas.")
+    terminal.escreve("O mais importante é focar em uma vida saudável e com qualidade! 🌟")
+
+    # Pelo menu dos jogos o processo continua depois daqui: a estimativa já fica gravada
+    history.wait()
 
 
 if __name__ == "__main__":
     main()
+    estimate_history().close()
@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from types import MappingProxyType
+
+from health import HEALTH_WEIGHTS, health_weights_from
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+LIFE_EXPECTANCY_FILE = os.path.join(DATA_DIR, "life_expectancy.json")
+MEDICAL_ADVANCES_FILE = os.path.join(DATA_DIR, "medical_advances.json")
+# Opcional: sem ele o score de saúde usa HEALTH_WEIGHTS (calibration.py gera um)
+HEALTH_WEIGHTS_FILE = os.path.join(DATA_DIR, "health_weights.json")
+
+
+class ReferenceData:
+    """Uma versão dos dados de referência, que nunca muda depois de criada.
+
+    Quem calcula pega uma versão no começo (``current_reference()``) e usa
+    só ela até o fim, então uma recarga no meio do cálculo não mistura
+    dados antigos e novos. ``version`` identifica o conteúdo dos arquivos.
+    O modelo de risco derivado dos dados é construído uma vez por versão.
+    """
+
+    def __init__(self, life_expectancy, medical_advances, version, health_weights=HEALTH_WEIGHTS):
+        self.life_expectancy = MappingProxyType(
+            {country: MappingProxyType(dict(values)) for country, values in life_expectancy.items()})
+        self.medical_advances = MappingProxyType(
+            {year: MappingProxyType(dict(values)) for year, values in sorted(medical_advances.items())})
+        self.health_weights = MappingProxyType(
+            {factor: MappingProxyType(dict(points)) if isinstance(points, dict) else points
+             for factor, points in health_weights.items()})
+        self.version = version
+        self.loaded_at = time.time()
+        self.countries = tuple(self.life_expectancy)
+        self.country_ids = MappingProxyType({country: index for index, country in enumerate(self.countries)})
+        self._hazard_model = None
+        self._lock = threading.Lock()
+
+    def country_id(self, country):
+        """Índice do país em ``countries``; países desconhecidos usam World"""
+        return self.country_ids.get(country, self.country_ids["World"])
+
+    def __reduce__(self):
+        # Vai para outros processos (calibration.py) sem a trava e sem o modelo
+        return ReferenceData, (
+            {country: dict(values) for country, values in self.life_expectancy.items()},
+            {year: dict(values) for year, values in self.medical_advances.items()},
+            self.version,
+            {factor: dict(points) if isinstance(points, MappingProxyType) else points
+             for factor, points in self.health_weights.items()},
+        )
+
+    @property
+    def hazard_model(self):
+        if self._hazard_model is None:
+            with self._lock:
+                if self._hazard_model is None:
+                    from hazard import GompertzMakeham
+
+                    self._hazard_model = GompertzMakeham(self.life_expectancy)
+        return self._hazard_model
+
+
+def load_reference(life_expectancy_file=LIFE_EXPECTANCY_FILE, medical_advances_file=MEDICAL_ADVANCES_FILE,
+                   health_weights_file=HEALTH_WEIGHTS_FILE):
+    """Lê e valida os arquivos de dados; levanta ValueError se algo estiver errado"""
+    paths = [life_expectancy_file, medical_advances_file]
+    if health_weights_file is not None and os.path.exists(health_weights_file):
+        paths.append(health_weights_file)
+    contents = []
+    for path in paths:
+        with open(path, "rb") as handle:
+            contents.append(handle.read())
+    try:
+        life_expectancy, medical_advances, *health_weights = (json.loads(content.decode("utf-8"))
+                                                              for content in contents)
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError(f"JSON inválido: {e}") from None
+    health_weights = health_weights_from(health_weights[0]) if health_weights else HEALTH_WEIGHTS
+
+    if not isinstance(life_expectancy, dict) or "World" not in life_expectancy:
+        raise ValueError("life_expectancy precisa ser um objeto com o país World")
+    for country, values in life_expectancy.items():
+        if not isinstance(values, dict) or not all(
+                isinstance(values.get(gender), (int, float)) and not isinstance(values.get(gender), bool)
+                for gender in ("male", "female")):
+            raise ValueError(f"{country}: male e female precisam ser números")
+    if not isinstance(medical_advances, dict):
+        raise ValueError("medical_advances precisa ser um objeto ano: avanço")
+    advances = {}
+    for year, values in medical_advances.items():
+        if not year.isdigit() or not isinstance(values, dict) \
+                or not isinstance(values.get("longevity_gain"), (int, float)):
+            raise ValueError(f"{year}: o ano precisa ser um número e longevity_gain também")
+        advances[int(year)] = {"longevity_gain": values["longevity_gain"],
+                               "description": str(values.get("description", ""))}
+
+    version = hashlib.sha1(b"\0".join(contents)).hexdigest()[:12]
+    return ReferenceData(life_expectancy, advances, version, health_weights)
+
+
+class ReferenceStore:
+    """Dados de referência atuais, recarregados quando os arquivos mudam.
+
+    Uma thread confere a data e o tamanho dos arquivos a cada ``interval``
+    segundos. Quando mudam, ela lê tudo, constrói o que é derivado dos
+    dados e só então troca a versão atual, numa única atribuição: quem
+    chama ``current`` nunca espera pela recarga nem vê uma versão pela
+    metade. Arquivos inválidos são ignorados e a versão anterior fica;
+    o erro vai para ``metrics`` e a thread continua observando.
+    """
+
+    def __init__(self, life_expectancy_file=LIFE_EXPECTANCY_FILE, medical_advances_file=MEDICAL_ADVANCES_FILE,
+                 health_weights_file=HEALTH_WEIGHTS_FILE, interval=2.0):
+        self.paths = (life_expectancy_file, medical_advances_file, health_weights_file)
+        self.interval = interval
+        self._stamps = self._stat()
+        self._current = load_reference(*self.paths)
+        self.reloads = 0
+        self.reload_seconds = None
+        self.errors = 0
+        self.last_error = None
+        self._stop = threading.Event()
+        self._watcher = None
+
+    def current(self):
+        return self._current
+
+    def _stat(self):
+        stamps = []
+        for path in self.paths:
+            if path is None:
+                stamps.append(None)
+                continue
+            try:
+                status = os.stat(path)
+                stamps.append((status.st_mtime_ns, status.st_size))
+            except OSError:
+                stamps.append(None)
+        return tuple(stamps)
+
+    def check(self):
+        """Recarrega se algum arquivo mudou; devolve True se a versão foi trocada"""
+        stamps = self._stat()
+        if stamps == self._stamps:
+            return False
+        # Guardado antes de ler: se o arquivo mudar durante a leitura, a
+        # próxima verificação vê a diferença e tenta de novo
+        self._stamps = stamps
+        start = time.perf_counter()
+        try:
+            reference = load_reference(*self.paths)
+            if reference.version == self._current.version:
+                return False
+            reference.hazard_model
+        except Exception as e:
+            # Qualquer erro, inclusive ao construir o modelo, mantém a versão
+            # anterior: a thread de observação não pode morrer por um arquivo
+            self.errors += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            return False
+        self._current = reference
+        self.reloads += 1
+        self.reload_seconds = time.perf_counter() - start
+        self.last_error = None
+        return True
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name="reference", daemon=True)
+            self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def metrics(self):
+        current = self._current
+        return {
+            "version": current.version,
+            "loaded_at": current.loaded_at,
+            "reloads": self.reloads,
+            "reload_seconds": self.reload_seconds,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def reference_store():
+    """ReferenceStore dos arquivos padrão, criado e observado uma vez por processo"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = ReferenceStore()
+                store.start()
+                _store = store
+    return _store
+
+
+def current_reference():
+    return reference_store().current()
@@ -0,0 +1,314 @@
+import argparse
+import datetime
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.image import imsave
+from matplotlib.figure import Figure
+
+from cohort import base_expectancies, estimate_cohort, read_cohort
+from models import MODELS
+from reference import current_reference
+
+# Campos de cada pessoa enviados aos processos, na ordem das tuplas
+FIELDS = ["number", "years", "expectancy", "remaining", "health_score", "medical_bonus", "base", "world"]
+FORMATS = ("png", "pdf")
+
+
+class ReportTemplate:
+    """Os três gráficos da calculadora e as métricas numa figura montada uma vez.
+
+    O construtor cria todos os elementos com valores provisórios;
+    ``render`` só troca dados, textos, posições e visibilidade deles para
+    cada pessoa e salva. Nada é recriado entre relatórios e o layout é
+    fixo (sem tight_layout). A figura usa o canvas Agg direto, sem pyplot.
+
+    Em PNG, o que não muda entre pessoas (eixos, marcas, grades, títulos)
+    é desenhado uma vez por combinação de limites dos eixos e guardado;
+    cada relatório restaura esse fundo e desenha por cima só os elementos
+    da pessoa. Em PDF, que é vetorial, a figura inteira é salva.
+    """
+
+    # Fundos guardados, um por combinação de limites (cada um tem o tamanho da imagem)
+    MAX_BACKGROUNDS = 8
+
+    def __init__(self, dpi=80, file_format="png"):
+        self.dpi = dpi
+        self.file_format = file_format
+        self.figure = Figure(figsize=(14, 10), dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.figure)
+        # Linha de cima com espaço à direita para a legenda da linha do tempo
+        top = self.figure.add_gridspec(1, 2, left=0.04, right=0.74, top=0.86, bottom=0.55, wspace=0.25)
+        bottom = self.figure.add_gridspec(1, 1, left=0.07, right=0.96, top=0.44, bottom=0.07)
+        self.title = self.figure.text(0.04, 0.965, "", fontsize=16, weight="bold", va="top")
+        self.metrics = self.figure.text(0.04, 0.925, "", fontsize=12, va="top")
+
+        # Composição: as fatias são criadas uma vez e só mudam de ângulo
+        self.pie = self.figure.add_subplot(top[0, 0])
+        self.wedges, self.labels, self.percents = self.pie.pie(
+            [1, 1, 1], labels=["", "", ""], colors=["#808080", "#4CAF50", "#2196F3"], autopct="%1.1f%%",
+            startangle=90)
+        self.pie.set_title("Composição da Expectativa de Vida")
+
+        # Linha do tempo
+        timeline = self.timeline = self.figure.add_subplot(top[0, 1])
+        self.lived = timeline.barh(1, 0, height=0.6, color="#4CAF50", alpha=0.8)[0]
+        self.ahead = timeline.barh(1, 0, height=0.6, color="#81C784", alpha=0.8)[0]
+        self.base_line = timeline.axvline(x=0, color="gray", linestyle="--")
+        self.retirement = timeline.axvline(x=65, color="orange", linestyle=":", alpha=0.7)
+        self.eighty = timeline.axvline(x=80, color="purple", linestyle=":", alpha=0.7)
+        self.legend = timeline.legend([self.lived, self.ahead, self.base_line, self.retirement, self.eighty],
+                                      ["", "", "", "Aposentadoria (65)", "80 anos"],
+                                      bbox_to_anchor=(1.05, 1), loc="upper left")
+        self.here = timeline.annotate("", xy=(0, 1), xytext=(0, 1.3), ha="center", va="bottom",
+                                      arrowprops=dict(arrowstyle="->", color="red"), fontsize=10, color="red",
+                                      weight="bold")
+        self.end = timeline.annotate("", xy=(0, 1), xytext=(0, 0.7), ha="center", va="top",
+                                     arrowprops=dict(arrowstyle="->", color="blue"), fontsize=10, color="blue",
+                                     weight="bold")
+        timeline.set_ylim(0.5, 1.5)
+        timeline.set_xlabel("Idade (anos)")
+        timeline.set_title("Linha do Tempo da Sua Vida")
+        timeline.set_yticks([])
+        timeline.grid(True, alpha=0.3, axis="x")
+
+        # Comparação com médias
+        comparison = self.comparison = self.figure.add_subplot(bottom[0, 0])
+        self.bars = comparison.bar(["Expectativa\nBase", "Média\nMundial", "Sua\nExpectativa"], [0, 0, 0],
+                                   color=["#FFC107", "#FF9800", "#4CAF50"], alpha=0.8)
+        self.bar_labels = [comparison.text(bar.get_x() + bar.get_width() / 2, 0, "", ha="center", va="bottom",
+                                           fontweight="bold") for bar in self.bars]
+        self.above = comparison.annotate("", xy=(2, 0), xytext=(2.3, 0), ha="left", va="center",
+                                         arrowprops=dict(arrowstyle="->", color="green"), fontsize=12,
+                                         color="green", weight="bold",
+                                         bbox=dict(boxstyle="round,pad=0.3", facecolor="lightgreen", alpha=0.7))
+        comparison.set_ylabel("Expectativa de Vida (anos)")
+        comparison.set_title("Comparação de Expectativa de Vida")
+        comparison.grid(True, alpha=0.3, axis="y")
+        comparison.set_axisbelow(True)
+
+        # Elementos de cada pessoa, na ordem em que são desenhados
+        self.dynamic = [self.title, self.metrics, *self.wedges, *self.labels, *self.percents, self.lived, self.ahead,
+                        self.base_line, self.retirement, self.eighty, self.here, self.end, self.legend, *self.bars,
+                        *self.bar_labels, self.above]
+        self._backgrounds = {}
+        if file_format == "png":
+            for artist in self.dynamic:
+                artist.set_animated(True)
+
+    def _update_pie(self, base, health_score, medical_bonus):
+        # As mesmas fatias de streamlit_app: base, hábitos ou riscos, e bônus médico
+        if health_score >= 0:
+            health = (health_score, f"Hábitos saudáveis\n(+{health_score:.1f} anos)", "#4CAF50")
+        else:
+            health = (-health_score, f"Fatores de risco\n({health_score:.1f} anos)", "#F44336")
+        slices = [(base, f"Expectativa base\n({base:.1f} anos)", "#808080"), health,
+                  (medical_bonus, f"Avanços médicos\n(+{medical_bonus:.1f} anos)", "#2196F3")]
+        total = sum(value for value, _, _ in slices)
+        angle = 90.0
+        for wedge, label, percent, (value, text, color) in zip(self.wedges, self.labels, self.percents, slices):
+            visible = value > 0
+            for artist in (wedge, label, percent):
+                artist.set_visible(visible)
+            if not visible:
+                continue
+            share = value / total
+            wedge.set_theta1(angle)
+            wedge.set_theta2(angle + 360 * share)
+            wedge.set_facecolor(color)
+            middle = np.deg2rad(angle + 180 * share)
+            x, y = np.cos(middle), np.sin(middle)
+            label.set_position((1.1 * x, 1.1 * y))
+            label.set_horizontalalignment("left" if x > 0 else "right")
+            label.set_text(text)
+            percent.set_position((0.6 * x, 0.6 * y))
+            percent.set_text(f"{100 * share:.1f}%")
+            angle += 360 * share
+
+    def _update_timeline(self, years, remaining, expectancy, base):
+        self.lived.set_width(years)
+        self.ahead.set_x(years)
+        self.ahead.set_width(remaining)
+        self.base_line.set_xdata([base, base])
+        self.retirement.set_visible(years < 65)
+        self.eighty.set_visible(expectancy > 80)
+        texts = self.legend.get_texts()
+        texts[0].set_text(f"Vida vivida ({years} anos)")
+        texts[1].set_text(f"Vida restante ({remaining:.1f} anos)")
+        texts[2].set_text(f"Expectativa base ({base:.1f} anos)")
+        for handle, text, visible in zip(self.legend.legend_handles[3:], texts[3:], (years < 65, expectancy > 80)):
+            handle.set_visible(visible)
+            text.set_visible(visible)
+        self.here.set_text(f"Você está aqui\n({years} anos)")
+        self.here.xy = (years, 1)
+        self.here.set_position((years, 1.3))
+        self.end.set_text(f"Expectativa final\n({expectancy:.1f} anos)")
+        self.end.xy = (expectancy, 1)
+        self.end.set_position((expectancy, 0.7))
+        # Limites arredondados, para poucos fundos diferentes
+        self.timeline.set_xlim(0, max(100, 5 * np.ceil((expectancy + 5) / 5)))
+
+    def _update_comparison(self, base, world, expectancy):
+        values = (base, world, expectancy)
+        for bar, label, value in zip(self.bars, self.bar_labels, values):
+            bar.set_height(value)
+            label.set_y(value + 0.5)
+            label.set_text(f"{value:.1f} anos")
+        self.above.set_visible(expectancy > base)
+        if expectancy > base:
+            self.above.set_text(f"+{expectancy - base:.1f} anos\nacima da base!")
+            self.above.xy = (2, expectancy)
+            self.above.set_position((2.3, expectancy))
+        self.comparison.set_ylim(0, 10 * np.ceil((max(values) + 10) / 10))
+
+    def render(self, person, path, current_year):
+        """Atualiza a figura com ``person`` (um dicionário de FIELDS) e salva em ``path``"""
+        years = int(person["years"])
+        remaining = person["remaining"]
+        expectancy = person["expectancy"]
+        self.title.set_text(f"Relatório de Expectativa de Vida — pessoa {person['number']}")
+        self.metrics.set_text(
+            f"Idade: {years} anos    Expectativa total: {expectancy:.1f} anos    "
+            f"Anos restantes: {remaining:.1f}    Ano estimado: {current_year + int(remaining)}    "
+            f"Score de saúde: {person['health_score']:+.0f} anos    "
+            f"Bônus médico: +{person['medical_bonus']:.1f} anos")
+        self._update_pie(person["base"], person["health_score"], person["medical_bonus"])
+        self._update_timeline(years, remaining, expectancy, person["base"])
+        self._update_comparison(person["base"], person["world"], expectancy)
+        if self.file_format == "pdf":
+            self.figure.savefig(path, format="pdf")
+            return
+
+        key = (self.timeline.get_xlim(), self.comparison.get_ylim())
+        background = self._backgrounds.get(key)
+        if background is None:
+            if len(self._backgrounds) >= self.MAX_BACKGROUNDS:
+                del self._backgrounds[next(iter(self._backgrounds))]
+            # Elementos animados ficam de fora do desenho normal da figura
+            self.canvas.draw()
+            background = self._backgrounds[key] = self.canvas.copy_from_bbox(self.figure.bbox)
+        else:
+            self.canvas.restore_region(background)
+        for artist in self.dynamic:
+            self.figure.draw_artist(artist)
+        # O mesmo gravador de print_png, mas sem o canvas.draw() que ele faz
+        # antes e que apagaria o que foi desenhado por cima do fundo
+        imsave(path, np.asarray(self.canvas.buffer_rgba()), format="png", dpi=self.dpi,
+               pil_kwargs={"compress_level": 3})
+
+
+# Um modelo por processo, criado no primeiro lote que ele recebe
+_template = None
+
+
+def _render_batch(batch, directory, file_format, dpi, current_year):
+    global _template
+    if _template is None or (_template.dpi, _template.file_format) != (dpi, file_format):
+        _template = ReportTemplate(dpi, file_format)
+    for values in batch:
+        person = dict(zip(FIELDS, values))
+        _template.render(person, os.path.join(directory, f"report_{person['number']:07d}.{file_format}"),
+                         current_year)
+    return len(batch)
+
+
+def people(source, chunk_size=200_000, model="legacy", limit=None):
+    """Gera tuplas de FIELDS para as pessoas de um CSV de coorte, calculadas bloco a bloco"""
+    reference = current_reference()
+    number = 0
+    for chunk, _ in read_cohort(source, chunk_size):
+        if limit is not None:
+            chunk = chunk.iloc[:limit - number]
+        estimates = estimate_cohort(chunk, model=model, reference=reference)
+        world = pd.Series(pd.Categorical.from_codes(np.zeros(len(chunk), dtype=np.int8), ["World"]))
+        columns = [
+            np.arange(number + 1, number + len(chunk) + 1),
+            chunk["age"].to_numpy(dtype=np.float64).astype(np.int64),
+            estimates["expectancy"],
+            estimates["remaining"],
+            estimates["health_score"],
+            estimates["medical_bonus"],
+            base_expectancies(chunk["country"], chunk["gender"], reference),
+            base_expectancies(world, chunk["gender"], reference),
+        ]
+        yield from zip(*(column.tolist() for column in columns))
+        number += len(chunk)
+        if limit is not None and number >= limit:
+            return
+
+
+def generate_reports(source, directory, file_format="png", jobs=None, batch_size=50, dpi=80, model="legacy",
+                     limit=None, progress=None):
+    """Escreve um relatório por pessoa de um CSV de coorte em ``directory``.
+
+    As estimativas saem da versão vetorizada (estimate_cohort) e os
+    desenhos são divididos em lotes entre ``jobs`` processos, cada um com
+    o seu ReportTemplate. No máximo dois lotes por processo ficam na fila:
+    o CSV é lido conforme os relatórios são gravados, e o índice
+    (``index.csv``) recebe cada lote assim que ele termina. ``progress``,
+    se dado, é chamado com o total gravado até agora. Devolve (relatórios,
+    segundos).
+    """
+    jobs = jobs or os.cpu_count() or 1
+    os.makedirs(directory, exist_ok=True)
+    current_year = datetime.datetime.now().year
+    start = time.perf_counter()
+    written = 0
+    pending = {}
+    with ProcessPoolExecutor(jobs) as pool, open(os.path.join(directory, "index.csv"), "w") as index:
+        index.write(",".join(["file"] + FIELDS[1:]) + "\n")
+
+        def collect(done):
+            nonlocal written
+            for future in done:
+                batch = pending.pop(future)
+                written += future.result()
+                for values in batch:
+                    index.write(f"report_{values[0]:07d}.{file_format}," +
+                                ",".join(str(value) if isinstance(value, int) else f"{value:.2f}"
+                                         for value in values[1:]) + "\n")
+            if progress:
+                progress(written)
+
+        batch = []
+        for person in people(source, model=model, limit=limit):
+            batch.append(person)
+            if len(batch) == batch_size:
+                if len(pending) >= 2 * jobs:
+                    collect(wait(pending, return_when=FIRST_COMPLETED).done)
+                pending[pool.submit(_render_batch, batch, directory, file_format, dpi, current_year)] = batch
+                batch = []
+        if batch:
+            pending[pool.submit(_render_batch, batch, directory, file_format, dpi, current_year)] = batch
+        while pending:
+            collect(wait(pending, return_when=FIRST_COMPLETED).done)
+    return written, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um relatório (gráficos e métricas) por pessoa de uma coorte")
+    parser.add_argument("csv", help="arquivo da coorte (.csv ou .csv.gz)")
+    parser.add_argument("output", help="pasta dos relatórios")
+    parser.add_argument("--format", choices=FORMATS, default="png")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="processos (padrão: um por núcleo)")
+    parser.add_argument("--batch-size", type=int, default=50, help="relatórios por tarefa de cada processo")
+    parser.add_argument("--dpi", type=int, default=80)
+    parser.add_argument("--model", choices=list(MODELS), default="legacy")
+    parser.add_argument("--limit", type=int, help="só as primeiras N pessoas")
+    args = parser.parse_args()
+
+    def progress(written):
+        print(f"\r{written} relatórios", end="", flush=True)
+
+    written, elapsed = generate_reports(args.csv, args.output, args.format, args.jobs, args.batch_size, args.dpi,
+                                        args.model, args.limit, progress)
+    print(f"\r{written} relatórios em {elapsed:.1f} s com {args.jobs} processo(s): "
+          f"{written / elapsed:.0f} relatórios/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,56 +1,145 @@
+import math
 import random
 
+from placar import placar_padrao
+from terminal import Terminal
 
-def jogar():
-    print("************************************")
-    print("Bem-vindo ao jogo de Adivinhação!")
-    print("************************************")
+MINIMO = 1
+MAXIMO = 100
+MAIOR_INTERVALO = 10 ** 12
+PONTOS_INICIAIS = 1000
+# Tentativas de cada nível no intervalo padrão de 1 a 100. Em outros
+# intervalos cada nível mantém a mesma folga em relação aos chutes que a
+# bisseção precisa (log2 do tamanho), e com isso a mesma chance de vitória
+TENTATIVAS_POR_NIVEL = {1: 20, 2: 10, 3: 5}
 
-    numero_secreto = random.randrange(1, 101)  # numero entre 0.0 e 1.0
-    total_de_tentativas = 0
-    pontos = 1000
+# Resultados de EstadoAdivinhacao.chuta
+ACERTOU = "acertou"
+CHUTE_MAIOR = "maior"
+CHUTE_MENOR = "menor"
+FORA_DO_INTERVALO = "fora"
 
-    print("Está se sentindo sortudo? Escolha sua dificuldade:")
-    print("LvL '1' Fácil - LvL '2' Médio  - LvL '3' Difícil")
 
-    nivel = int(input("Defina o nível:"))
+def bits(tamanho):
+    """Chutes que a bisseção precisa, no pior caso, para achar um número entre ``tamanho``"""
+    return math.ceil(math.log2(tamanho + 1))
 
-    if nivel == 1:
-        total_de_tentativas = 20
-    elif nivel == 2:
-        total_de_tentativas = 10
-    else:
-        total_de_tentativas = 5
 
-    print(numero_secreto)  # EXCLUIR DEPOIS DE TUDO PRONTO / PARA TESTE
+TAMANHO_PADRAO = MAXIMO - MINIMO + 1
+BITS_PADRAO = bits(TAMANHO_PADRAO)
 
-    for rodada in range(1, total_de_tentativas + 1):
-        print("Tentativa  {} de {} ".format(rodada, total_de_tentativas))
-        chute_str = input("Digite um número entre 1 e 100: ")
-        print("Você digitou: ", chute_str)
-        chute = int(chute_str)
 
-        if chute < 1 or chute > 100:
-            print("!!!Digite um número entre 1 e 100!!!")
-            continue
+def tentativas_por_nivel(minimo=MINIMO, maximo=MAXIMO):
+    tamanho = maximo - minimo + 1
+    if tamanho < 1 or tamanho > MAIOR_INTERVALO:
+        raise ValueError("O intervalo deve ter entre 1 e {} números".format(MAIOR_INTERVALO))
+    return {nivel: max(1, bits(tamanho) + tentativas - BITS_PADRAO)
+            for nivel, tentativas in TENTATIVAS_POR_NIVEL.items()}
+
+
+def penalidade(distancia, tamanho):
+    """Pontos perdidos por um erro, proporcionais ao tamanho do intervalo.
+
+    Errar por 1% do intervalo custa 1 ponto, como errar por 1 entre 1 e 100.
+    """
+    return distancia * TAMANHO_PADRAO // tamanho
+
+
+class EstadoAdivinhacao:
+    """Uma partida de adivinhação, sem entrada nem saída.
+
+    Cada chute gasta uma tentativa, mesmo fora do intervalo, e um erro
+    custa a distância até o número secreto, proporcional ao tamanho do
+    intervalo (veja ``penalidade``). ``baixo`` e ``alto`` são o
+    intervalo que as dicas já deixaram possível. Quem perde fica com zero
+    pontos.
+    """
+
+    def __init__(self, numero_secreto, total_de_tentativas, minimo=MINIMO, maximo=MAXIMO,
+                 pontos=PONTOS_INICIAIS):
+        self.numero_secreto = numero_secreto
+        self.total_de_tentativas = total_de_tentativas
+        self.minimo = minimo
+        self.maximo = maximo
+        self.baixo = minimo
+        self.alto = maximo
+        self.pontos = pontos
+        self.rodada = 0
+        self.acertou = False
+
+    @property
+    def restantes(self):
+        return self.total_de_tentativas - self.rodada
+
+    @property
+    def terminou(self):
+        return self.acertou or self.rodada >= self.total_de_tentativas
+
+    @property
+    def pontuacao(self):
+        return self.pontos if self.acertou else 0
+
+    def chuta(self, chute):
+        """Aplica um chute e devolve ACERTOU, CHUTE_MAIOR, CHUTE_MENOR ou FORA_DO_INTERVALO"""
+        self.rodada += 1
+        if chute < self.minimo or chute > self.maximo:
+            return FORA_DO_INTERVALO
+        if chute == self.numero_secreto:
+            self.acertou = True
+            return ACERTOU
+        self.pontos -= penalidade(abs(self.numero_secreto - chute), self.maximo - self.minimo + 1)
+        if chute > self.numero_secreto:
+            self.alto = min(self.alto, chute - 1)
+            return CHUTE_MAIOR
+        self.baixo = max(self.baixo, chute + 1)
+        return CHUTE_MENOR
+
+
+def jogar(minimo=MINIMO, maximo=MAXIMO, terminal=None, placar=None):
+    if terminal is None:
+        terminal = Terminal()
+
+    terminal.escreve("************************************")
+    terminal.escreve("Bem-vindo ao jogo de Adivinhação!")
+    terminal.escreve("************************************")
+
+    tentativas = tentativas_por_nivel(minimo, maximo)
+    numero_secreto = random.randrange(minimo, maximo + 1)  # numero entre 0.0 e 1.0
+
+    terminal.escreve("Está se sentindo sortudo? Escolha sua dificuldade:")
+    terminal.escreve("LvL '1' Fácil - LvL '2' Médio  - LvL '3' Difícil")
+
+    nivel = int(terminal.le("Defina o nível:"))
+
+    total_de_tentativas = tentativas.get(nivel, tentativas[3])
+    estado = EstadoAdivinhacao(numero_secreto, total_de_tentativas, minimo, maximo)
+
+    terminal.escreve(numero_secreto)  # EXCLUIR DEPOIS DE TUDO PRONTO / PARA TESTE
+
+    while not estado.terminou:
+        terminal.escreve("Tentativa  {} de {} ".format(estado.rodada + 1, total_de_tentativas))
+        chute_str = terminal.le("Digite um número entre {} e {}: ".format(minimo, maximo))
+        terminal.escreve("Você digitou: ", chute_str)
+        chute = int(chute_str)
 
-        acertou = numero_secreto == chute
-        maior = chute > numero_secreto
-        menor = chute < numero_secreto
+        resultado = estado.chuta(chute)
 
-        if acertou:
-            print("Você acertou e fez {} pontos!".format(pontos))
-            break
+        if resultado == FORA_DO_INTERVALO:
+            terminal.escreve("!!!Digite um número entre {} e {}!!!".format(minimo, maximo))
+        elif resultado == ACERTOU:
+            terminal.escreve("Você acertou e fez {} pontos!".format(estado.pontos))
+        elif resultado == CHUTE_MAIOR:
+            terminal.escreve("Você errou! O seu chute foi maior que o número secreto.")
         else:
-            if maior:
-                print("Você errou! O seu chute foi maior que o número secreto.")
-            elif menor:
-                print("Você errou! O seu chute foi menor que o número secreto.")
-            pontos_perdidos = abs(numero_secreto - chute)
-            pontos = pontos - pontos_perdidos
+            terminal.escreve("Você errou! O seu chute foi menor que o número secreto.")
 
-    print("Fim do jogo")
+    terminal.escreve("Fim do jogo")
+    if placar:
+        # Pontuações de intervalos diferentes ficam em níveis separados
+        if (minimo, maximo) != (MINIMO, MAXIMO):
+            nivel = "{} ({}-{})".format(nivel, minimo, maximo)
+        placar.registra("adivinhacao", estado.pontuacao, nivel)
 
 
 if __name__ == "__main__":
-    jogar()
+    jogar(placar=placar_padrao())
@@ -0,0 +1,126 @@
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+
+from servidor import PROMPT
+
+FIM = PROMPT.encode("utf-8")
+# Ordem das letras mais comuns em português
+LETRAS = "AEOSRINDMUTCLPVGHQBFZJXKWY"
+
+
+class Robo:
+    """Uma sessão automática: escolhe um jogo, joga até o fim e sai"""
+
+    def __init__(self, rng, jogo):
+        self.rng = rng
+        self.jogo = jogo
+        self.latencias = []
+        self.venceu = False
+
+    async def _envia(self, leitor, escritor, linha):
+        escritor.write((linha + "\n").encode("utf-8"))
+        inicio = time.perf_counter()
+        resposta = await leitor.readuntil(FIM)
+        self.latencias.append(time.perf_counter() - inicio)
+        return resposta.decode("utf-8")
+
+    async def joga(self, host, porta):
+        leitor, escritor = await asyncio.open_connection(host, porta)
+        try:
+            await leitor.readuntil(FIM)
+            jogo = self.jogo or self.rng.choice("12")
+            await self._envia(leitor, escritor, jogo)
+            resposta = await self._envia(leitor, escritor, str(self.rng.randint(1, 3)))
+            if jogo == "1":
+                letras = iter(LETRAS)
+                while "Fim do jogo" not in resposta:
+                    resposta = await self._envia(leitor, escritor, next(letras))
+                self.venceu = "ganhou" in resposta
+            else:
+                baixo, alto = 1, 100
+                while "Fim do jogo" not in resposta:
+                    chute = (baixo + alto) // 2
+                    resposta = await self._envia(leitor, escritor, str(chute))
+                    if "maior" in resposta:
+                        alto = chute - 1
+                    elif "menor" in resposta:
+                        baixo = chute + 1
+                self.venceu = "acertou" in resposta
+            escritor.write(b"0\n")
+            await escritor.drain()
+        finally:
+            escritor.close()
+
+
+async def carga(host, porta, sessoes, concorrencia, jogo=None, semente=0):
+    """Roda ``sessoes`` robôs, no máximo ``concorrencia`` ao mesmo tempo.
+
+    Devolve as sessões por segundo e a latência das jogadas (do envio de
+    uma linha até a resposta completa), em milissegundos.
+    """
+    rng = random.Random(semente)
+    robos = [Robo(random.Random(rng.random()), jogo) for _ in range(sessoes)]
+    limite = asyncio.Semaphore(concorrencia)
+    falhas = 0
+
+    async def roda(robo):
+        nonlocal falhas
+        async with limite:
+            try:
+                await robo.joga(host, porta)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                falhas += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(roda(robo) for robo in robos))
+    tempo = time.perf_counter() - inicio
+
+    latencias = sorted(latencia for robo in robos for latencia in robo.latencias)
+    if not latencias:
+        latencias = [0.0]
+    return {
+        "sessoes": sessoes,
+        "falhas": falhas,
+        "vitorias": sum(1 for robo in robos if robo.venceu) / sessoes,
+        "sessoes_por_segundo": sessoes / tempo,
+        "jogadas": len(latencias),
+        "p50": 1000.0 * latencias[len(latencias) // 2],
+        "p99": 1000.0 * latencias[min(len(latencias) - 1, len(latencias) * 99 // 100)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do servidor.py com sessões automáticas")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=2323)
+    parser.add_argument("--sessoes", type=int, default=2000)
+    parser.add_argument("--concorrencia", type=int, default=200, help="sessões abertas ao mesmo tempo")
+    parser.add_argument("--jogo", choices=("1", "2"), help="1 = forca, 2 = adivinhação (padrão: sorteado)")
+    parser.add_argument("--inicia-servidor", action="store_true",
+                        help="roda o servidor.py num subprocesso durante o teste")
+    args = parser.parse_args()
+
+    servidor = None
+    if args.inicia_servidor:
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "servidor.py")
+        servidor = subprocess.Popen([sys.executable, script, "--porta", str(args.porta),
+                                     "--maximo-de-sessoes", str(max(1000, 2 * args.concorrencia))])
+        time.sleep(1.0)
+    try:
+        resultado = asyncio.run(carga(args.host, args.porta, args.sessoes, args.concorrencia, args.jogo))
+    finally:
+        if servidor is not None:
+            servidor.terminate()
+            servidor.wait()
+
+    print("{sessoes} sessões ({falhas} falhas, {vitorias:.1%} vitórias): {sessoes_por_segundo:.0f} sessões/s, "
+          "{jogadas} jogadas, latência p50 {p50:.2f} ms, p99 {p99:.2f} ms".format(**resultado))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import math
+import mmap
+import os
+import random
+import struct
+import unicodedata
+from array import array
+
+# Cache ao lado da lista de palavras (<lista>.idx), reconstruído quando a
+# lista muda. Depois do cabeçalho vêm, nesta ordem: os offsets de cada
+# palavra (uint32, quantidade + 1), a máscara de letras de cada palavra
+# (uint32, bit 0 = A ... bit 25 = Z), os índices das palavras de cada nível
+# (uint32) e as palavras em ASCII, todas juntas num único buffer.
+MAGICO = b"FORC"
+VERSAO = 1
+CABECALHO = struct.Struct("<4sIQQIIII")
+NIVEIS = (1, 2, 3)
+
+
+def normaliza(palavra):
+    """Palavra em maiúsculas sem acentos, ou None se tiver algo além de letras"""
+    palavra = palavra.strip().upper()
+    if not palavra.isascii():
+        palavra = unicodedata.normalize("NFD", palavra)
+        palavra = "".join(letra for letra in palavra if not unicodedata.combining(letra))
+    if not palavra or not palavra.isascii() or not palavra.isalpha():
+        return None
+    return palavra
+
+
+def mascara_de(palavra):
+    mascara = 0
+    for letra in palavra:
+        mascara |= 1 << (ord(letra) - 65)
+    return mascara
+
+
+def _constroi(caminho_lista, caminho_cache):
+    # Uma única passada pela lista monta o buffer, os offsets e as máscaras
+    buffer = bytearray()
+    offsets = array("I", [0])
+    mascaras = array("I")
+    repeticoes = {}
+    with open(caminho_lista, encoding="utf-8") as arquivo:
+        for linha in arquivo:
+            palavra = normaliza(linha)
+            if palavra is None:
+                continue
+            mascara = mascara_de(palavra)
+            buffer += palavra.encode("ascii")
+            offsets.append(len(buffer))
+            mascaras.append(mascara)
+            repeticoes[mascara] = repeticoes.get(mascara, 0) + 1
+
+    # Muitas palavras têm o mesmo conjunto de letras, então as contas por
+    # letra são feitas uma vez por máscara distinta
+    frequencia = [0] * 26
+    for mascara, quantidade in repeticoes.items():
+        for letra in range(26):
+            if mascara >> letra & 1:
+                frequencia[letra] += quantidade
+
+    # Dificuldade: raridade média das letras distintas, mais alta para
+    # palavras curtas, que revelam menos letras a cada acerto
+    total = max(1, len(mascaras))
+    raridade = [-math.log2((quantidade + 1) / (total + 1)) for quantidade in frequencia]
+    raridade_media = {}
+    for mascara in repeticoes:
+        letras = [raridade[letra] for letra in range(26) if mascara >> letra & 1]
+        raridade_media[mascara] = sum(letras) / len(letras)
+    pontos = [raridade_media[mascara] + 8 / (offsets[indice + 1] - offsets[indice])
+              for indice, mascara in enumerate(mascaras)]
+    ordem = sorted(range(len(mascaras)), key=pontos.__getitem__)
+    terco = len(ordem) // 3
+    niveis = [array("I", ordem[:terco]), array("I", ordem[terco:2 * terco]), array("I", ordem[2 * terco:])]
+
+    estado = os.stat(caminho_lista)
+    temporario = caminho_cache + ".tmp"
+    with open(temporario, "wb") as arquivo:
+        arquivo.write(CABECALHO.pack(MAGICO, VERSAO, estado.st_size, estado.st_mtime_ns, len(mascaras),
+                                     *(len(nivel) for nivel in niveis)))
+        offsets.tofile(arquivo)
+        mascaras.tofile(arquivo)
+        for nivel in niveis:
+            nivel.tofile(arquivo)
+        arquivo.write(buffer)
+    os.replace(temporario, caminho_cache)
+
+
+def _cache_valido(caminho_lista, caminho_cache):
+    try:
+        with open(caminho_cache, "rb") as arquivo:
+            cabecalho = arquivo.read(CABECALHO.size)
+    except OSError:
+        return False
+    if len(cabecalho) < CABECALHO.size:
+        return False
+    magico, versao, tamanho, modificado = CABECALHO.unpack(cabecalho)[:4]
+    estado = os.stat(caminho_lista)
+    return (magico, versao, tamanho, modificado) == (MAGICO, VERSAO, estado.st_size, estado.st_mtime_ns)
+
+
+class Dicionario:
+    """Lista de palavras mapeada em memória a partir do cache em disco.
+
+    Só o cabeçalho é lido ao abrir: as palavras, máscaras e níveis ficam no
+    arquivo mapeado e o sistema operacional carrega apenas as páginas
+    usadas, então abrir uma lista enorme é rápido e ocupa pouca memória.
+    """
+
+    def __init__(self, caminho_lista, caminho_cache=None):
+        self.caminho_lista = caminho_lista
+        self.caminho_cache = caminho_cache or caminho_lista + ".idx"
+        if not _cache_valido(self.caminho_lista, self.caminho_cache):
+            _constroi(self.caminho_lista, self.caminho_cache)
+
+        with open(self.caminho_cache, "rb") as arquivo:
+            self._mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        visao = memoryview(self._mapa)
+        cabecalho = CABECALHO.unpack_from(self._mapa)
+        quantidade = cabecalho[4]
+        inicio = CABECALHO.size
+
+        def secao(tamanho):
+            nonlocal inicio
+            pedaco = visao[inicio:inicio + 4 * tamanho].cast("I")
+            inicio += 4 * tamanho
+            return pedaco
+
+        self._offsets = secao(quantidade + 1)
+        self.mascaras = secao(quantidade)
+        self._niveis = {nivel: secao(tamanho) for nivel, tamanho in zip(NIVEIS, cabecalho[5:])}
+        self._palavras = visao[inicio:]
+
+    def __len__(self):
+        return len(self.mascaras)
+
+    def palavra(self, indice):
+        return bytes(self._palavras[self._offsets[indice]:self._offsets[indice + 1]]).decode("ascii")
+
+    def mascara(self, indice):
+        return self.mascaras[indice]
+
+    def tamanho(self, indice):
+        return self._offsets[indice + 1] - self._offsets[indice]
+
+    def indices(self, nivel=None):
+        """Índices das palavras de um nível (1, 2 ou 3), ou de todas"""
+        if nivel is None:
+            return range(len(self))
+        return self._niveis[nivel]
+
+    def sorteia(self, nivel=None, rng=random):
+        indices = self.indices(nivel)
+        if not len(indices):
+            indices = self.indices()
+        return self.palavra(indices[rng.randrange(len(indices))])
+
+    def fecha(self):
+        # As visões precisam ser liberadas antes de fechar o mapa
+        for visao in (self._offsets, self.mascaras, self._palavras, *self._niveis.values()):
+            visao.release()
+        self._mapa.close()
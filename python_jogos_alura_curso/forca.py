@@ -1,41 +1,116 @@
+import os
 
-def jogar():
+from dicionario import Dicionario, mascara_de, normaliza
+from placar import placar_padrao
+from terminal import Terminal
 
-    print("************************************")
-    print("Bem-vindo ao jogo de Forca!")
-    print("************************************")
+LISTA_DE_PALAVRAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "palavras.txt")
+MAXIMO_DE_ERROS = 6
 
-    palavra_secreta = "banana".upper()
-    letras_acertadas = ["_", "_", "_", "_", "_", "_", ]
+# Resultados de EstadoForca.chuta
+ACERTO = "acerto"
+ERRO = "erro"
+REPETIDO = "repetido"
+INVALIDO = "invalido"
 
-    enforcou = False
-    acertou = False
-    erros = 0
 
-    print(letras_acertadas)
+class EstadoForca:
+    """Uma partida de forca.
 
-    while (not enforcou and not acertou):
+    As posições de cada letra da palavra são calculadas uma única vez, então
+    um chute só mexe nas posições que revela, e saber se o jogador ganhou é
+    só olhar quantas posições ainda faltam.
+    """
 
-        chute = input("Qual a letra? ")
-        chute = chute.strip().upper()
+    def __init__(self, palavra_secreta, maximo_de_erros=MAXIMO_DE_ERROS):
+        self.palavra_secreta = palavra_secreta
+        self.maximo_de_erros = maximo_de_erros
+        self.posicoes = {}
+        for posicao, letra in enumerate(palavra_secreta):
+            self.posicoes.setdefault(letra, []).append(posicao)
+        self.letras_acertadas = ["_" for letra in palavra_secreta]
+        self.faltando = len(palavra_secreta)
+        self.mascara_palavra = mascara_de(palavra_secreta)
+        self.mascara_chutes = 0
+        self.erros = 0
 
-        if (chute in palavra_secreta):
-            index = 0
-            for letra in palavra_secreta:
-                if(chute == letra):
-                    letras_acertadas[index] = letra
-                index += 1
-        else:
-            erros = erros + 1
+    @property
+    def enforcou(self):
+        return self.erros >= self.maximo_de_erros
 
-        enforcou = erros == 6
-        acertou = "_" not in letras_acertadas
-        print(letras_acertadas)
-    if(acertou):
-        print("Você ganhou!")
+    @property
+    def acertou(self):
+        return self.faltando == 0
+
+    @property
+    def terminou(self):
+        return self.enforcou or self.acertou
+
+    @property
+    def pontuacao(self):
+        # Erros que ainda sobravam, mais um por ter acertado; zero quem perde
+        return self.maximo_de_erros - self.erros + 1 if self.acertou else 0
+
+    def chuta(self, chute):
+        """Aplica um chute e devolve ACERTO, ERRO, REPETIDO ou INVALIDO"""
+        letra = normaliza(chute)
+        if letra is None or len(letra) != 1:
+            return INVALIDO
+        bit = 1 << (ord(letra) - 65)
+        if self.mascara_chutes & bit:
+            return REPETIDO
+        self.mascara_chutes |= bit
+
+        if not self.mascara_palavra & bit:
+            self.erros += 1
+            return ERRO
+        for posicao in self.posicoes[letra]:
+            self.letras_acertadas[posicao] = letra
+        self.faltando -= len(self.posicoes[letra])
+        return ACERTO
+
+
+def jogar(lista=LISTA_DE_PALAVRAS, terminal=None, placar=None):
+    if terminal is None:
+        terminal = Terminal()
+
+    terminal.escreve("************************************")
+    terminal.escreve("Bem-vindo ao jogo de Forca!")
+    terminal.escreve("************************************")
+
+    terminal.escreve("Escolha a dificuldade da palavra:")
+    terminal.escreve("LvL '1' Fácil - LvL '2' Médio  - LvL '3' Difícil")
+    nivel = terminal.le("Defina o nível:").strip()
+
+    dicionario = Dicionario(lista)
+    palavra_secreta = dicionario.sorteia(int(nivel) if nivel in ("1", "2", "3") else None)
+    dicionario.fecha()
+    estado = EstadoForca(palavra_secreta)
+
+    terminal.escreve(estado.letras_acertadas)
+
+    while (not estado.terminou):
+
+        chute = terminal.le("Qual a letra? ")
+        resultado = estado.chuta(chute)
+
+        if (resultado == INVALIDO):
+            terminal.escreve("Digite uma única letra!")
+            continue
+        if (resultado == REPETIDO):
+            terminal.escreve("Você já chutou essa letra!")
+            continue
+        if (resultado == ERRO):
+            terminal.escreve("Errou! Você ainda pode errar {} vez(es).".format(estado.maximo_de_erros - estado.erros))
+
+        terminal.escreve(estado.letras_acertadas)
+    if(estado.acertou):
+        terminal.escreve("Você ganhou!")
     else:
-        print("Você perdeu!")
-    print("Fim do jogo.")
+        terminal.escreve("Você perdeu!")
+    terminal.escreve("Fim do jogo.")
+    if placar:
+        placar.registra("forca", estado.pontuacao, nivel if nivel in ("1", "2", "3") else "")
 
 if __name__ == "__main__":
-   jogar()
\ No newline at end of file
+   jogar(placar=placar_padrao())
\ No newline at end of file
@@ -1,22 +1,127 @@
-import forca
-import adivinhacao
+import importlib
+import importlib.util
+import os
+import subprocess
+import sys
 
+from terminal import Terminal
 
-def escolhe_jogo():
-    print("************************************")
-    print("Escolha o seu jogo!")
-    print("************************************")
+PASTA = os.path.dirname(os.path.abspath(__file__))
+RAIZ = os.path.dirname(PASTA)
 
-    print("1 = Forca / 2 = Adivinhação")
 
-    jogo = int(input("Qual o jogo?"))
+class JogoDeTexto:
+    """Jogo que roda no mesmo processo, pelo terminal.
 
-    if jogo == 1:
-        print("Jogando Forca!")
-        forca.jogar()
-    elif jogo == 2:
-        print("Jogando Adivinhação!")
-        adivinhacao.jogar()
+    ``modulo`` é o nome de um módulo importável ou o caminho de um arquivo
+    .py, e só é importado quando o jogo é escolhido. ``argumento_terminal``
+    é o nome do parâmetro pelo qual a função recebe o terminal, se tiver.
+    Com ``placar``, a função recebe o placar padrão e a
+    partida fica registrada; quem chama ``jogar`` direto só registra se
+    passar um placar.
+    """
+
+    def __init__(self, nome, modulo, funcao="jogar", argumento_terminal="terminal", placar=False):
+        self.nome = nome
+        self.modulo = modulo
+        self.funcao = funcao
+        self.argumento_terminal = argumento_terminal
+        self.placar = placar
+
+    def disponivel(self):
+        return not self.modulo.endswith(".py") or os.path.isfile(self.modulo)
+
+    def carrega(self):
+        if not self.modulo.endswith(".py"):
+            return importlib.import_module(self.modulo)
+        nome = "jogo_" + os.path.relpath(self.modulo, RAIZ).replace(os.sep, "_").replace("-", "_")[:-3]
+        if nome not in sys.modules:
+            # Imports entre arquivos da mesma pasta funcionam como no script original
+            pasta = os.path.dirname(self.modulo)
+            if pasta not in sys.path:
+                sys.path.append(pasta)
+            especificacao = importlib.util.spec_from_file_location(nome, self.modulo)
+            modulo = importlib.util.module_from_spec(especificacao)
+            sys.modules[nome] = modulo
+            especificacao.loader.exec_module(modulo)
+        return sys.modules[nome]
+
+    def executa(self, terminal):
+        funcao = getattr(self.carrega(), self.funcao)
+        argumentos = {}
+        if self.argumento_terminal:
+            argumentos[self.argumento_terminal] = terminal
+        if self.placar:
+            from placar import placar_padrao
+
+            argumentos["placar"] = placar_padrao()
+        funcao(**argumentos)
+
+
+class JogoExterno:
+    """Jogo com janela ou servidor próprio, rodado num processo separado.
+
+    Assim o pygame ou o Streamlit só são carregados, e só custam alguma
+    coisa, quando o jogo é escolhido.
+    """
+
+    def __init__(self, nome, script, argumentos=(), requer=None):
+        self.nome = nome
+        self.script = script
+        self.argumentos = list(argumentos)
+        self.requer = requer
+
+    def disponivel(self):
+        return os.path.isfile(self.script)
+
+    def executa(self, terminal):
+        if self.requer and importlib.util.find_spec(self.requer) is None:
+            terminal.escreve("Instale o pacote '{}' para jogar {}.".format(self.requer, self.nome))
+            return
+        pasta, arquivo = os.path.split(self.script)
+        if self.requer == "streamlit":
+            comando = [sys.executable, "-m", "streamlit", "run", arquivo] + self.argumentos
+        else:
+            comando = [sys.executable, arquivo] + self.argumentos
+        subprocess.run(comando, cwd=pasta)
+
+
+# Só nomes e caminhos: nada é importado até o jogo ser escolhido
+JOGOS = [
+    JogoDeTexto("Forca", "forca", placar=True),
+    JogoDeTexto("Adivinhação", "adivinhacao", placar=True),
+    JogoExterno("Snake", os.path.join(RAIZ, "snake_game", "main.py"), requer="pygame"),
+    JogoDeTexto("Expectativa de Vida", os.path.join(RAIZ, "linear_life_time", "no-gui", "main.py"), funcao="main"),
+    JogoExterno("Expectativa de Vida (Streamlit)", os.path.join(RAIZ, "linear_life_time", "main.py"),
+                requer="streamlit"),
+]
+
+
+def registra(jogo):
+    JOGOS.append(jogo)
+
+
+def jogos_disponiveis():
+    return [jogo for jogo in JOGOS if jogo.disponivel()]
+
+
+def escolhe_jogo(terminal=None):
+    if terminal is None:
+        terminal = Terminal()
+
+    terminal.escreve("************************************")
+    terminal.escreve("Escolha o seu jogo!")
+    terminal.escreve("************************************")
+
+    jogos = jogos_disponiveis()
+    terminal.escreve(" / ".join("{} = {}".format(numero, jogo.nome) for numero, jogo in enumerate(jogos, 1)))
+
+    jogo = int(terminal.le("Qual o jogo?"))
+
+    if 1 <= jogo <= len(jogos):
+        escolhido = jogos[jogo - 1]
+        terminal.escreve("Jogando {}!".format(escolhido.nome))
+        escolhido.executa(terminal)
 
 
 if __name__ == "__main__":
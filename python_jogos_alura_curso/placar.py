@@ -0,0 +1,175 @@
+import argparse
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+CAMINHO_PADRAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "placar.db")
+
+TABELA = """
+CREATE TABLE IF NOT EXISTS partidas (
+    id INTEGER PRIMARY KEY,
+    jogo TEXT NOT NULL,
+    nivel TEXT NOT NULL DEFAULT '',
+    jogador TEXT NOT NULL DEFAULT '',
+    pontos INTEGER NOT NULL,
+    quando REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS partidas_por_nivel ON partidas (jogo, nivel, pontos DESC);
+CREATE INDEX IF NOT EXISTS partidas_por_jogo ON partidas (jogo, pontos DESC);
+"""
+
+_FIM = object()
+
+logger = logging.getLogger(__name__)
+
+
+def _conecta(caminho):
+    conexao = sqlite3.connect(caminho)
+    conexao.execute("PRAGMA journal_mode=WAL")
+    conexao.execute("PRAGMA synchronous=NORMAL")
+    return conexao
+
+
+class Placar:
+    """Placar de todos os jogos num SQLite em modo WAL.
+
+    ``registra`` só coloca a partida numa fila: uma thread grava as
+    partidas em lotes, numa transação por lote, e o jogo nunca espera pelo
+    disco. No modo WAL as leituras não bloqueiam a gravação nem são
+    bloqueadas por ela, e os índices por (jogo, nível, pontos) fazem o
+    ``melhores`` ler só as N linhas pedidas, com qualquer número de
+    partidas gravadas.
+    """
+
+    def __init__(self, caminho=CAMINHO_PADRAO, lote=1000):
+        self.caminho = caminho
+        self.lote = lote
+        self.erros = 0
+        self.ultimo_erro = None
+        conexao = _conecta(caminho)
+        conexao.executescript(TABELA)
+        conexao.close()
+        self._fila = queue.Queue()
+        self._leitura = threading.local()
+        self._gravador = threading.Thread(target=self._grava, name="placar", daemon=True)
+        self._gravador.start()
+
+    def registra(self, jogo, pontos, nivel="", jogador=""):
+        self._fila.put([(jogo, str(nivel), jogador, int(pontos), time.time())])
+
+    def registra_varios(self, partidas):
+        """Registra várias partidas (jogo, nivel, jogador, pontos) de uma vez"""
+        agora = time.time()
+        self._fila.put([(jogo, str(nivel), jogador, int(pontos), agora)
+                        for jogo, nivel, jogador, pontos in partidas])
+
+    def _grava(self):
+        conexao = None
+        fim = False
+        while not fim:
+            pedidos = [self._fila.get()]
+            # Junta o que já estiver na fila num único lote
+            while len(pedidos) < self.lote:
+                try:
+                    pedidos.append(self._fila.get_nowait())
+                except queue.Empty:
+                    break
+            linhas = [linha for pedido in pedidos if pedido is not _FIM for linha in pedido]
+            fim = any(pedido is _FIM for pedido in pedidos)
+            try:
+                if linhas:
+                    if conexao is None:
+                        conexao = _conecta(self.caminho)
+                    with conexao:
+                        conexao.executemany(
+                            "INSERT INTO partidas (jogo, nivel, jogador, pontos, quando) VALUES (?, ?, ?, ?, ?)",
+                            linhas)
+            except Exception as e:
+                # O lote com erro é descartado, mas a thread continua: sem
+                # ela, espera() e fecha() esperariam para sempre
+                self.erros += 1
+                self.ultimo_erro = f"{type(e).__name__}: {e}"
+                logger.exception("placar: %d partidas não foram gravadas", len(linhas))
+                if conexao is not None:
+                    conexao.close()
+                    conexao = None
+            finally:
+                for _ in pedidos:
+                    self._fila.task_done()
+        if conexao is not None:
+            conexao.close()
+
+    def _conexao(self):
+        # Uma conexão de leitura por thread
+        conexao = getattr(self._leitura, "conexao", None)
+        if conexao is None:
+            conexao = self._leitura.conexao = _conecta(self.caminho)
+        return conexao
+
+    def melhores(self, jogo, nivel=None, quantidade=10):
+        """As ``quantidade`` maiores pontuações de um jogo, de um nível ou de todos.
+
+        Devolve tuplas (jogador, nivel, pontos, quando). Partidas ainda na
+        fila de gravação não aparecem; chame ``espera`` antes se precisar.
+        """
+        if nivel is None:
+            consulta = ("SELECT jogador, nivel, pontos, quando FROM partidas WHERE jogo = ? "
+                        "ORDER BY pontos DESC LIMIT ?", (jogo, quantidade))
+        else:
+            consulta = ("SELECT jogador, nivel, pontos, quando FROM partidas WHERE jogo = ? AND nivel = ? "
+                        "ORDER BY pontos DESC LIMIT ?", (jogo, str(nivel), quantidade))
+        return self._conexao().execute(*consulta).fetchall()
+
+    def total(self, jogo=None):
+        if jogo is None:
+            return self._conexao().execute("SELECT COUNT(*) FROM partidas").fetchone()[0]
+        return self._conexao().execute("SELECT COUNT(*) FROM partidas WHERE jogo = ?", (jogo,)).fetchone()[0]
+
+    def espera(self):
+        """Espera até todas as partidas registradas estarem gravadas"""
+        self._fila.join()
+
+    def fecha(self):
+        if self._gravador.is_alive():
+            self._fila.put(_FIM)
+            self._gravador.join()
+        conexao = getattr(self._leitura, "conexao", None)
+        if conexao is not None:
+            conexao.close()
+            self._leitura.conexao = None
+
+
+_placar_padrao = None
+
+
+def placar_padrao():
+    """Placar em CAMINHO_PADRAO, aberto uma vez e gravado ao sair do programa"""
+    global _placar_padrao
+    if _placar_padrao is None:
+        _placar_padrao = Placar()
+        atexit.register(_placar_padrao.fecha)
+    return _placar_padrao
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mostra as melhores pontuações do placar")
+    parser.add_argument("jogo", help="forca, adivinhacao, snake...")
+    parser.add_argument("--nivel")
+    parser.add_argument("--quantidade", type=int, default=10)
+    parser.add_argument("--caminho", default=CAMINHO_PADRAO)
+    args = parser.parse_args()
+
+    placar = Placar(args.caminho)
+    for posicao, (jogador, nivel, pontos, quando) in enumerate(
+            placar.melhores(args.jogo, args.nivel, args.quantidade), 1):
+        print("{:>3}. {:>8} pontos  {:<12} nível {:<10} {}".format(
+            posicao, pontos, jogador or "-", nivel or "-", time.strftime("%d/%m/%Y %H:%M", time.localtime(quando))))
+    placar.fecha()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+import argparse
+import asyncio
+import random
+import time
+
+from adivinhacao import (ACERTOU, CHUTE_MAIOR, FORA_DO_INTERVALO, MAXIMO, MINIMO, EstadoAdivinhacao,
+                         tentativas_por_nivel)
+from dicionario import Dicionario
+from forca import ERRO, INVALIDO, LISTA_DE_PALAVRAS, REPETIDO, EstadoForca
+from placar import Placar
+
+# Cada resposta do servidor termina com esta linha, depois da qual o
+# jogador digita; clientes automáticos leem até ela
+PROMPT = "\n> "
+
+MENU = "1 = Forca / 2 = Adivinhação / 0 = Sair\nQual o jogo?"
+NIVEIS = "LvL '1' Fácil - LvL '2' Médio  - LvL '3' Difícil\nDefina o nível:"
+
+
+class Sessao:
+    """Uma conexão, como máquina de estados sem entrada nem saída.
+
+    ``recebe`` trata uma linha digitada pelo jogador e devolve o texto da
+    resposta; ``terminou`` fica verdadeiro quando o jogador sai. Cada
+    sessão tem seu próprio EstadoForca ou EstadoAdivinhacao, então o
+    servidor não bloqueia esperando ninguém. Com um ``placar``, cada
+    partida terminada é registrada nele com o jogador "rede".
+    """
+
+    def __init__(self, dicionario, rng=random, placar=None):
+        self.dicionario = dicionario
+        self.rng = rng
+        self.placar = placar
+        self.etapa = self._menu
+        self.jogo = None
+        self.nivel = None
+        self.estado = None
+        self.terminou = False
+
+    def inicio(self):
+        return "************************************\nBem-vindo aos jogos!\n" \
+               "************************************\n" + MENU
+
+    def recebe(self, linha):
+        return self.etapa(linha.strip())
+
+    def _menu(self, linha):
+        if linha == "0":
+            self.terminou = True
+            return "Até a próxima!"
+        if linha not in ("1", "2"):
+            return MENU
+        self.jogo = linha
+        self.etapa = self._nivel
+        return NIVEIS
+
+    def _nivel(self, linha):
+        nivel = self.nivel = int(linha) if linha in ("1", "2", "3") else 3
+        if self.jogo == "1":
+            self.estado = EstadoForca(self.dicionario.sorteia(nivel, self.rng))
+            self.etapa = self._forca
+            return "Jogando Forca!\n{}\nQual a letra?".format(" ".join(self.estado.letras_acertadas))
+        tentativas = tentativas_por_nivel()[nivel]
+        self.estado = EstadoAdivinhacao(self.rng.randrange(MINIMO, MAXIMO + 1), tentativas)
+        self.etapa = self._adivinhacao
+        return "Jogando Adivinhação!\n" + self._tentativa()
+
+    def _fim(self, texto):
+        if self.placar is not None:
+            jogo = "forca" if self.jogo == "1" else "adivinhacao"
+            self.placar.registra(jogo, self.estado.pontuacao, self.nivel, "rede")
+        self.estado = None
+        self.etapa = self._menu
+        return "{}\nFim do jogo.\n{}".format(texto, MENU)
+
+    def _forca(self, linha):
+        estado = self.estado
+        resultado = estado.chuta(linha)
+        if resultado == INVALIDO:
+            return "Digite uma única letra!\nQual a letra?"
+        if resultado == REPETIDO:
+            return "Você já chutou essa letra!\nQual a letra?"
+        texto = " ".join(estado.letras_acertadas)
+        if resultado == ERRO:
+            texto = "Errou! Você ainda pode errar {} vez(es).\n{}".format(
+                estado.maximo_de_erros - estado.erros, texto)
+        if estado.acertou:
+            return self._fim(texto + "\nVocê ganhou!")
+        if estado.enforcou:
+            return self._fim("{}\nVocê perdeu! A palavra era {}.".format(texto, estado.palavra_secreta))
+        return texto + "\nQual a letra?"
+
+    def _tentativa(self):
+        estado = self.estado
+        return "Tentativa {} de {}\nDigite um número entre {} e {}:".format(
+            estado.rodada + 1, estado.total_de_tentativas, estado.minimo, estado.maximo)
+
+    def _adivinhacao(self, linha):
+        estado = self.estado
+        try:
+            chute = int(linha)
+        except ValueError:
+            return "Digite um número!\n" + self._tentativa()
+        resultado = estado.chuta(chute)
+        if resultado == ACERTOU:
+            return self._fim("Você acertou e fez {} pontos!".format(estado.pontos))
+        if resultado == FORA_DO_INTERVALO:
+            texto = "!!!Digite um número entre {} e {}!!!".format(estado.minimo, estado.maximo)
+        elif resultado == CHUTE_MAIOR:
+            texto = "Você errou! O seu chute foi maior que o número secreto."
+        else:
+            texto = "Você errou! O seu chute foi menor que o número secreto."
+        if estado.terminou:
+            return self._fim("{}\nVocê perdeu! O número era {}.".format(texto, estado.numero_secreto))
+        return texto + "\n" + self._tentativa()
+
+
+class ServidorDeJogos:
+    """Servidor TCP de texto (dá para jogar com telnet ou nc).
+
+    Cada conexão ganha uma Sessao. Conexões além de ``maximo_de_sessoes``
+    são recusadas e uma sessão sem nenhuma linha por ``tempo_ocioso``
+    segundos é encerrada. Com ``placar`` (o caminho de um banco), as
+    partidas vão para o placar; o registro só enfileira, então não
+    atrasa o laço de eventos.
+    """
+
+    def __init__(self, lista=LISTA_DE_PALAVRAS, maximo_de_sessoes=1000, tempo_ocioso=300.0, placar=None):
+        self.dicionario = Dicionario(lista)
+        self.placar = Placar(placar) if placar else None
+        self.maximo_de_sessoes = maximo_de_sessoes
+        self.tempo_ocioso = tempo_ocioso
+        self.sessoes = 0
+        self.total_de_sessoes = 0
+        self.recusadas = 0
+        self.jogadas = 0
+        self.inicio = time.perf_counter()
+
+    def estatisticas(self):
+        tempo = time.perf_counter() - self.inicio
+        return {
+            "sessoes": self.sessoes,
+            "total_de_sessoes": self.total_de_sessoes,
+            "recusadas": self.recusadas,
+            "sessoes_por_segundo": self.total_de_sessoes / tempo,
+            "jogadas_por_segundo": self.jogadas / tempo,
+        }
+
+    async def atende(self, leitor, escritor):
+        if self.sessoes >= self.maximo_de_sessoes:
+            self.recusadas += 1
+            escritor.write("Servidor cheio, tente mais tarde.\n".encode("utf-8"))
+            escritor.close()
+            return
+        self.sessoes += 1
+        self.total_de_sessoes += 1
+        sessao = Sessao(self.dicionario, placar=self.placar)
+        try:
+            escritor.write((sessao.inicio() + PROMPT).encode("utf-8"))
+            while not sessao.terminou:
+                try:
+                    linha = await asyncio.wait_for(leitor.readline(), self.tempo_ocioso)
+                except asyncio.TimeoutError:
+                    escritor.write("\nTempo esgotado.\n".encode("utf-8"))
+                    break
+                if not linha:
+                    break
+                self.jogadas += 1
+                resposta = sessao.recebe(linha.decode("utf-8", "replace"))
+                escritor.write((resposta + ("\n" if sessao.terminou else PROMPT)).encode("utf-8"))
+                await escritor.drain()
+        except (ConnectionError, ValueError):
+            # ValueError: linha maior que o limite do leitor
+            pass
+        finally:
+            self.sessoes -= 1
+            escritor.close()
+
+    async def serve(self, host="127.0.0.1", porta=2323, relatorio=5.0):
+        servidor = await asyncio.start_server(self.atende, host, porta, limit=1024)
+        async with servidor:
+            if not relatorio:
+                await servidor.serve_forever()
+            while True:
+                await asyncio.sleep(relatorio)
+                print("{sessoes} sessões abertas, {total_de_sessoes} no total ({recusadas} recusadas), "
+                      "{sessoes_por_segundo:.1f} sessões/s, {jogadas_por_segundo:.0f} jogadas/s".format(
+                          **self.estatisticas()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de forca e adivinhação para vários jogadores")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=2323)
+    parser.add_argument("--lista", default=LISTA_DE_PALAVRAS, help="lista de palavras da forca")
+    parser.add_argument("--maximo-de-sessoes", type=int, default=1000)
+    parser.add_argument("--tempo-ocioso", type=float, default=300.0, help="segundos")
+    parser.add_argument("--placar", help="banco do placar onde registrar as partidas (padrão: não registra)")
+    args = parser.parse_args()
+
+    servidor = ServidorDeJogos(args.lista, args.maximo_de_sessoes, args.tempo_ocioso, args.placar)
+    try:
+        asyncio.run(servidor.serve(args.host, args.porta))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if servidor.placar is not None:
+            servidor.placar.fecha()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+import argparse
+from itertools import accumulate
+
+from adivinhacao import (MAXIMO, MINIMO, PONTOS_INICIAIS, TAMANHO_PADRAO, EstadoAdivinhacao, penalidade,
+                         tentativas_por_nivel)
+
+# Papel do intervalo ainda possível, pelas pontas do intervalo original que
+# ele ainda toca (veja ``papel``)
+TODOS, DIREITA, ESQUERDA, LIVRE = range(4)
+
+
+def papel(baixo, alto, minimo, maximo):
+    """LIVRE se o intervalo ainda é o original, DIREITA se só toca o mínimo (o
+    chute vizinho está à direita), ESQUERDA se só toca o máximo e TODOS se não
+    toca nenhum. Funciona com números e com matrizes NumPy."""
+    return (baixo == minimo) * DIREITA + (alto == maximo) * ESQUERDA
+
+
+class Robo:
+    """Estratégia de chutes para a adivinhação.
+
+    Uma estratégia só depende do tamanho do intervalo ainda possível, das
+    tentativas restantes e do papel do intervalo: ``deslocamento`` diz a
+    posição do chute dentro do intervalo, contando do zero, e
+    ``deslocamentos`` faz o mesmo para matrizes NumPy inteiras de uma vez.
+    """
+
+    nome = None
+
+    def deslocamento(self, tamanho, restantes, papel=LIVRE):
+        raise NotImplementedError
+
+    def deslocamentos(self, tamanhos, restantes, papeis):
+        import numpy as np
+
+        return np.vectorize(self.deslocamento, otypes=[np.int64])(tamanhos, restantes, papeis)
+
+    def chute(self, baixo, alto, restantes, minimo=MINIMO, maximo=MAXIMO):
+        return baixo + self.deslocamento(alto - baixo + 1, restantes, papel(baixo, alto, minimo, maximo))
+
+
+class Bissecao(Robo):
+    """Chuta sempre o meio do intervalo"""
+
+    nome = "bissecao"
+
+    def deslocamento(self, tamanho, restantes, papel=LIVRE):
+        return (tamanho - 1) // 2
+
+    def deslocamentos(self, tamanhos, restantes, papeis):
+        return (tamanhos - 1) // 2
+
+
+class MenorCusto(Robo):
+    """Chuta para fazer a maior pontuação média, a mesma de ``pontuacao``.
+
+    Quem acerta fica com os pontos iniciais menos as penalidades dos seus
+    chutes errados; quem perde fica com zero, e as penalidades que pagou
+    não contam. Com poucas tentativas, então, vale mais concentrar os
+    números que ainda dá para achar num bloco vizinho ao último chute (onde
+    as penalidades são pequenas) do que espalhá-los pelo intervalo.
+
+    ``soma[restantes][papel][tamanho]`` é a maior soma das pontuações de
+    todos os números de um intervalo, e ``achados`` quantos deles a
+    estratégia acha. Os números achados formam sempre um bloco: encostado
+    à direita do intervalo no papel DIREITA, à esquerda em ESQUERDA, e o
+    intervalo todo em TODOS. Um chute na posição g é achado sem
+    penalidade e custa 1, 2, 3... (com o mesmo arredondamento de
+    ``penalidade``) a cada número achado de cada lado dele, então a
+    tabela é montada uma vez por programação dinâmica e serve para
+    qualquer intervalo. Ela vai até ``limite`` números; nos maiores, o
+    chute é o do meio quando todos os números ainda podem ser achados e,
+    senão, o do meio do bloco encostado no lado do papel, como a tabela faz.
+    """
+
+    nome = "menor_custo"
+
+    # Papéis dos intervalos à esquerda e à direita do chute, por papel
+    FILHOS = {TODOS: (TODOS, TODOS), DIREITA: (DIREITA, TODOS), ESQUERDA: (TODOS, ESQUERDA),
+              LIVRE: (DIREITA, ESQUERDA)}
+
+    def __init__(self, pontos=PONTOS_INICIAIS, tamanho_total=TAMANHO_PADRAO, limite=128):
+        self.pontos = pontos
+        self.limite = limite
+        # Soma das penalidades de errar por 1, 2, ... d
+        self.penalidades = list(accumulate(penalidade(d, tamanho_total) for d in range(limite + 1)))
+        # Sem tentativas não se acha nada; só o intervalo vazio tem todos achados
+        vazio = [0] * (limite + 1)
+        self.soma = [[[0] + [None] * limite] + [vazio] * 3]
+        self.achados = [[vazio] * 4]
+        self.escolha = [[vazio] * 4]
+        # A partir deste número de tentativas a tabela não muda mais
+        self.estavel = None
+
+    def _prepara(self, restantes):
+        while len(self.soma) <= restantes and self.estavel is None:
+            soma, achados = self.soma[-1], self.achados[-1]
+            linhas = ([], [], [])
+            for p in range(4):
+                esquerda, direita = self.FILHOS[p]
+                soma_esquerda, soma_direita = soma[esquerda], soma[direita]
+                achados_esquerda, achados_direita = achados[esquerda], achados[direita]
+                linha, achados_linha, escolhas = [0], [0], [0]
+                for n in range(1, self.limite + 1):
+                    melhor, melhor_g, melhor_achados = None, (n - 1) // 2, 0
+                    for g in range(n):
+                        a, b = soma_esquerda[g], soma_direita[n - 1 - g]
+                        if a is None or b is None:
+                            continue
+                        x, y = achados_esquerda[g], achados_direita[n - 1 - g]
+                        total = self.pontos + a + b - self.penalidades[x] - self.penalidades[y]
+                        # Nos empates, o chute mais perto do meio
+                        if melhor is None or total > melhor or (
+                                total == melhor and abs(2 * g - n + 1) < abs(2 * melhor_g - n + 1)):
+                            melhor, melhor_g, melhor_achados = total, g, x + y + 1
+                    linha.append(melhor)
+                    achados_linha.append(melhor_achados)
+                    escolhas.append(melhor_g)
+                for tabela, valores in zip(linhas, (linha, achados_linha, escolhas)):
+                    tabela.append(valores)
+            if linhas[0] == soma and linhas[2] == self.escolha[-1]:
+                self.estavel = len(self.soma) - 1
+                break
+            self.soma.append(linhas[0])
+            self.achados.append(linhas[1])
+            self.escolha.append(linhas[2])
+
+    def _grande(self, tamanho, restantes, papel):
+        # Intervalos além da tabela, o mesmo que deslocamentos faz com NumPy
+        meio = 2 ** (restantes - 1)
+        bloco = tamanho - meio if papel == DIREITA else meio - 1
+        return (tamanho - 1) // 2 if papel == TODOS or tamanho < 2 * meio else bloco
+
+    def deslocamento(self, tamanho, restantes, papel=LIVRE):
+        if tamanho > self.limite:
+            return self._grande(tamanho, restantes, papel)
+        self._prepara(restantes)
+        return self.escolha[min(restantes, len(self.escolha) - 1)][papel][tamanho]
+
+    def deslocamentos(self, tamanhos, restantes, papeis):
+        import numpy as np
+
+        self._prepara(int(restantes.max()))
+        tabela = np.array(self.escolha, dtype=np.int64)
+        linhas = np.minimum(restantes, len(tabela) - 1)
+        pequenos = np.minimum(tamanhos, self.limite)
+        meio = np.left_shift(np.int64(1), restantes - 1)
+        grandes = np.where((papeis == TODOS) | (tamanhos < 2 * meio), (tamanhos - 1) // 2,
+                           np.where(papeis == DIREITA, tamanhos - meio, meio - 1))
+        return np.where(tamanhos > self.limite, grandes, tabela[linhas, papeis, pequenos])
+
+
+ROBOS = {robo.nome: robo for robo in (Bissecao, MenorCusto)}
+
+
+def cria_robo(nome, minimo=MINIMO, maximo=MAXIMO):
+    if nome == MenorCusto.nome:
+        return MenorCusto(tamanho_total=maximo - minimo + 1)
+    return ROBOS[nome]()
+
+
+def joga(robo, numero_secreto, total_de_tentativas, minimo=MINIMO, maximo=MAXIMO):
+    """Joga uma partida com um robô; devolve o EstadoAdivinhacao final"""
+    estado = EstadoAdivinhacao(numero_secreto, total_de_tentativas, minimo, maximo)
+    while not estado.terminou:
+        estado.chuta(robo.chute(estado.baixo, estado.alto, estado.restantes, minimo, maximo))
+    return estado
+
+
+def simula(robo, minimo=MINIMO, maximo=MAXIMO, niveis=None, pontos=PONTOS_INICIAIS, amostras=100000,
+           semente=0):
+    """Joga muitas partidas de cada nível de uma vez com NumPy.
+
+    Se o intervalo tiver até ``amostras`` números, todos são jogados e o
+    resultado é exato; senão, ``amostras`` números secretos são sorteados
+    (Monte Carlo). Cada posição das matrizes é uma partida (nível, número
+    secreto) e cada volta do laço é uma rodada de todas elas ao mesmo
+    tempo, então o custo cresce com log2 do intervalo e não com ele.
+    Devolve, por nível, a taxa de vitórias, a média e os percentis da
+    pontuação (zero quem perde), a pior vitória e a média de chutes.
+    """
+    import numpy as np
+
+    if niveis is None:
+        niveis = tentativas_por_nivel(minimo, maximo)
+    tamanho = maximo - minimo + 1
+    exato = tamanho <= amostras
+    if exato:
+        segredos = np.arange(minimo, maximo + 1, dtype=np.int64)
+    else:
+        segredos = np.random.default_rng(semente).integers(minimo, maximo + 1, size=amostras, dtype=np.int64)
+
+    tentativas = np.array(list(niveis.values()), dtype=np.int64)[:, None]
+    segredo = np.broadcast_to(segredos, (len(niveis), len(segredos)))
+    baixo = np.full(segredo.shape, minimo, dtype=np.int64)
+    alto = np.full(segredo.shape, maximo, dtype=np.int64)
+    restantes_pontos = np.full(segredo.shape, pontos, dtype=np.int64)
+    acertou = np.zeros(segredo.shape, dtype=bool)
+    chutes = np.zeros(segredo.shape, dtype=np.int64)
+
+    for rodada in range(int(tentativas.max())):
+        ativa = ~acertou & (rodada < tentativas)
+        if not ativa.any():
+            break
+        restantes = np.broadcast_to(np.maximum(tentativas - rodada, 1), segredo.shape)
+        chute = baixo + robo.deslocamentos(np.maximum(alto - baixo + 1, 1), restantes,
+                                           papel(baixo, alto, minimo, maximo))
+        errou = ativa & (chute != segredo)
+        restantes_pontos -= np.where(errou, penalidade(np.abs(segredo - chute), tamanho), 0)
+        alto = np.where(errou & (chute > segredo), chute - 1, alto)
+        baixo = np.where(errou & (chute < segredo), chute + 1, baixo)
+        acertou |= ativa & (chute == segredo)
+        chutes += ativa
+
+    pontuacao = np.where(acertou, restantes_pontos, 0)
+    relatorio = []
+    for linha, nivel in enumerate(niveis):
+        vitorias = acertou[linha]
+        p10, p50, p90 = np.percentile(pontuacao[linha], [10, 50, 90])
+        relatorio.append({
+            "nivel": nivel,
+            "tentativas": int(tentativas[linha, 0]),
+            "exato": exato,
+            "vitorias": float(vitorias.mean()),
+            "pontuacao_media": float(pontuacao[linha].mean()),
+            "p10": float(p10),
+            "p50": float(p50),
+            "p90": float(p90),
+            "pior_vitoria": int(restantes_pontos[linha][vitorias].min()) if vitorias.any() else 0,
+            "chutes_medios": float(chutes[linha].mean()),
+        })
+    return relatorio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Joga a adivinhação com robôs e mostra o equilíbrio dos níveis")
+    parser.add_argument("robos", nargs="*", default=list(ROBOS), help="robôs a simular (padrão: todos)")
+    parser.add_argument("--minimo", type=int, default=MINIMO)
+    parser.add_argument("--maximo", type=int, default=MAXIMO)
+    parser.add_argument("--amostras", type=int, default=100000,
+                        help="números secretos sorteados quando o intervalo for maior que isso")
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args()
+
+    print("{:<12} {:>5} {:>10} {:>9} {:>15} {:>7} {:>7} {:>7} {:>12} {:>6}".format(
+        "robô", "nível", "tentativas", "vitórias", "pontuação média", "p10", "p50", "p90", "pior vitória",
+        "chutes"))
+    for nome in args.robos:
+        robo = cria_robo(nome, args.minimo, args.maximo)
+        for linha in simula(robo, args.minimo, args.maximo, amostras=args.amostras, semente=args.semente):
+            print("{nome:<12} {nivel:>5} {tentativas:>10} {vitorias:>9.1%} {pontuacao_media:>15.1f} "
+                  "{p10:>7.0f} {p50:>7.0f} {p90:>7.0f} {pior_vitoria:>12} {chutes_medios:>6.2f}".format(
+                      nome=nome, **linha))
+
+
+if __name__ == "__main__":
+    main()
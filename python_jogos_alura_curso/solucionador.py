@@ -0,0 +1,232 @@
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from dicionario import Dicionario
+from forca import LISTA_DE_PALAVRAS, MAXIMO_DE_ERROS, EstadoForca
+
+LETRAS = [chr(65 + letra) for letra in range(26)]
+
+
+def _bitset(bits):
+    return int.from_bytes(bits, "little")
+
+
+# int.bit_count só existe a partir do Python 3.10
+try:
+    _conta_bits = int.bit_count
+except AttributeError:
+    def _conta_bits(conjunto):
+        return bin(conjunto).count("1")
+
+
+class IndiceDoTamanho:
+    """Índices das palavras de um mesmo tamanho, como conjuntos de bits.
+
+    O bit j de cada conjunto é a j-ésima palavra do tamanho. ``tem[letra]``
+    marca as palavras que têm a letra e ``posicao[p][letra]`` as que têm a
+    letra na posição p. Com inteiros do Python como conjuntos de bits, podar
+    ou contar os candidatos de uma letra é um AND e um bit_count sobre
+    todas as palavras de uma vez.
+    """
+
+    def __init__(self, dicionario, tamanho, palavras):
+        self.tamanho = tamanho
+        self.palavras = palavras
+        quantidade = len(self.palavras)
+        tem = [bytearray(quantidade // 8 + 1) for letra in range(26)]
+        posicao = [[bytearray(quantidade // 8 + 1) for letra in range(26)] for p in range(tamanho)]
+        for j, indice in enumerate(self.palavras):
+            byte, bit = j >> 3, 1 << (j & 7)
+            mascara = dicionario.mascara(indice)
+            for letra in range(26):
+                if mascara >> letra & 1:
+                    tem[letra][byte] |= bit
+            for p, letra in enumerate(dicionario.palavra(indice)):
+                posicao[p][ord(letra) - 65][byte] |= bit
+        self.todas = (1 << quantidade) - 1
+        self.tem = [_bitset(bits) for bits in tem]
+        self.posicao = [[_bitset(bits) for bits in letras] for letras in posicao]
+
+
+class Solucionador:
+    """Escolhe letras para a forca a partir de um dicionário.
+
+    Os índices de cada tamanho de palavra são montados na primeira vez que
+    são usados.
+    """
+
+    def __init__(self, dicionario):
+        self.dicionario = dicionario
+        self._indices = {}
+        self._por_tamanho = {}
+        # Ordem das letras usada quando a palavra não está no dicionário
+        frequencia = [0] * 26
+        for indice, mascara in enumerate(dicionario.mascaras):
+            self._por_tamanho.setdefault(dicionario.tamanho(indice), []).append(indice)
+            for letra in range(26):
+                if mascara >> letra & 1:
+                    frequencia[letra] += 1
+        self.ordem_geral = sorted(range(26), key=lambda letra: -frequencia[letra])
+
+    def indice(self, tamanho):
+        if tamanho not in self._indices:
+            self._indices[tamanho] = IndiceDoTamanho(self.dicionario, tamanho, self._por_tamanho.get(tamanho, []))
+        return self._indices[tamanho]
+
+    def candidatos(self, tamanho):
+        return Candidatos(self, self.indice(tamanho))
+
+
+class Candidatos:
+    """Palavras ainda compatíveis com o padrão revelado e com os erros"""
+
+    def __init__(self, solucionador, indice):
+        self.solucionador = solucionador
+        self.indice = indice
+        self.conjunto = indice.todas
+        self.escondidas = list(range(indice.tamanho))
+
+    def __len__(self):
+        return _conta_bits(self.conjunto)
+
+    def palavras(self):
+        conjunto = self.conjunto
+        while conjunto:
+            bit = conjunto & -conjunto
+            yield self.solucionador.dicionario.palavra(self.indice.palavras[bit.bit_length() - 1])
+            conjunto ^= bit
+
+    def poda(self, letra, reveladas):
+        """Mantém só as palavras com ``letra`` exatamente nas posições reveladas"""
+        numero = ord(letra) - 65
+        if not reveladas:
+            self.conjunto &= ~self.indice.tem[numero]
+            return
+        for p in reveladas:
+            self.conjunto &= self.indice.posicao[p][numero]
+        self.escondidas = [p for p in self.escondidas if p not in reveladas]
+        for p in self.escondidas:
+            self.conjunto &= ~self.indice.posicao[p][numero]
+
+    def _informacao(self, numero, total):
+        # Separa os candidatos pelo padrão de posições em que a letra apareceria
+        grupos = [self.conjunto]
+        for p in self.escondidas:
+            na_posicao = self.indice.posicao[p][numero]
+            divididos = []
+            for grupo in grupos:
+                parte = grupo & na_posicao
+                if parte:
+                    divididos.append(parte)
+                    if parte != grupo:
+                        divididos.append(grupo ^ parte)
+                else:
+                    divididos.append(grupo)
+            grupos = divididos
+        entropia = 0.0
+        for grupo in grupos:
+            chance = _conta_bits(grupo) / total
+            entropia -= chance * math.log2(chance)
+        return entropia
+
+    def melhor_letra(self, mascara_chutes):
+        """Letra ainda não chutada que mais informa sobre a palavra.
+
+        Entre as letras que aparecem em algum candidato, escolhe a de maior
+        entropia do padrão revelado, desempatando pela que está em mais
+        candidatos. Sem candidatos, segue a frequência do dicionário todo.
+        """
+        total = len(self)
+        melhor = None
+        if total:
+            for numero in range(26):
+                if mascara_chutes >> numero & 1:
+                    continue
+                presentes = _conta_bits(self.conjunto & self.indice.tem[numero])
+                if not presentes:
+                    continue
+                chave = (self._informacao(numero, total), presentes)
+                if melhor is None or chave > melhor[0]:
+                    melhor = (chave, numero)
+        if melhor is not None:
+            return LETRAS[melhor[1]]
+        for numero in self.solucionador.ordem_geral:
+            if not mascara_chutes >> numero & 1:
+                return LETRAS[numero]
+        return None
+
+
+def joga(solucionador, palavra_secreta, maximo_de_erros=MAXIMO_DE_ERROS):
+    """Joga uma partida de forca sozinho; devolve (acertou, erros, chutes)"""
+    estado = EstadoForca(palavra_secreta, maximo_de_erros)
+    candidatos = solucionador.candidatos(len(palavra_secreta))
+    chutes = 0
+    while not estado.terminou:
+        letra = candidatos.melhor_letra(estado.mascara_chutes)
+        estado.chuta(letra)
+        chutes += 1
+        reveladas = [p for p in candidatos.escondidas if estado.letras_acertadas[p] == letra]
+        candidatos.poda(letra, reveladas)
+    return estado.acertou, estado.erros, chutes
+
+
+_solucionador = None
+_maximo_de_erros = MAXIMO_DE_ERROS
+
+
+def _inicia_processo(lista, caminho_cache, maximo_de_erros):
+    global _solucionador, _maximo_de_erros
+    _solucionador = Solucionador(Dicionario(lista, caminho_cache))
+    _maximo_de_erros = maximo_de_erros
+
+
+def _joga_faixa(faixa):
+    dicionario = _solucionador.dicionario
+    return [joga(_solucionador, dicionario.palavra(indice), _maximo_de_erros) for indice in faixa]
+
+
+def testa(lista=LISTA_DE_PALAVRAS, maximo_de_erros=MAXIMO_DE_ERROS, processos=None, lote=500):
+    """Joga todas as palavras da lista num pool de processos.
+
+    Cada processo abre o mesmo cache mapeado em memória e monta os próprios
+    índices. Devolve a taxa de vitórias, a média de erros e de chutes e as
+    palavras jogadas por segundo.
+    """
+    dicionario = Dicionario(lista)
+    quantidade = len(dicionario)
+    caminho_cache = dicionario.caminho_cache
+    dicionario.fecha()
+
+    inicio = time.perf_counter()
+    faixas = [range(primeira, min(primeira + lote, quantidade)) for primeira in range(0, quantidade, lote)]
+    with ProcessPoolExecutor(processos, initializer=_inicia_processo,
+                             initargs=(lista, caminho_cache, maximo_de_erros)) as pool:
+        resultados = [resultado for parte in pool.map(_joga_faixa, faixas) for resultado in parte]
+    tempo = time.perf_counter() - inicio
+
+    return {
+        "palavras": quantidade,
+        "vitorias": sum(1 for acertou, _, _ in resultados if acertou) / quantidade,
+        "erros": sum(erros for _, erros, _ in resultados) / quantidade,
+        "chutes": sum(chutes for _, _, chutes in resultados) / quantidade,
+        "palavras_por_segundo": quantidade / tempo,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Joga forca sozinho com todas as palavras de uma lista")
+    parser.add_argument("lista", nargs="?", default=LISTA_DE_PALAVRAS)
+    parser.add_argument("--erros", type=int, default=MAXIMO_DE_ERROS, help="erros permitidos por partida")
+    parser.add_argument("--processos", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    resultado = testa(args.lista, args.erros, args.processos)
+    print("{palavras} palavras: {vitorias:.1%} de vitórias, {erros:.2f} erros e {chutes:.1f} chutes "
+          "por partida, {palavras_por_segundo:.0f} palavras/s".format(**resultado))
+
+
+if __name__ == "__main__":
+    main()
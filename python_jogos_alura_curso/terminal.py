@@ -0,0 +1,39 @@
+class Terminal:
+    """Entrada e saída dos jogos pelo console, com input() e print()"""
+
+    def le(self, pergunta=""):
+        return input(pergunta)
+
+    def escreve(self, *valores, sep=" ", end="\n"):
+        print(*valores, sep=sep, end=end)
+
+
+class TerminalRoteirizado:
+    """Terminal em memória para jogar por scripts e robôs.
+
+    As respostas vêm de qualquer iterável (uma lista, ou um gerador que
+    decide o próximo chute) e, quando acabam, ``le`` levanta EOFError como
+    o input() no fim da entrada. A saída é guardada em ``saida``, com cada
+    resposta ecoada depois da pergunta como num console, ou descartada com
+    ``guarda_saida=False`` para jogar o mais rápido possível.
+    """
+
+    def __init__(self, respostas, guarda_saida=True):
+        self._respostas = iter(respostas)
+        self.saida = [] if guarda_saida else None
+
+    def le(self, pergunta=""):
+        try:
+            resposta = next(self._respostas)
+        except StopIteration:
+            raise EOFError("Acabaram as respostas do roteiro") from None
+        if self.saida is not None:
+            self.saida.append("{}{}\n".format(pergunta, resposta))
+        return resposta
+
+    def escreve(self, *valores, sep=" ", end="\n"):
+        if self.saida is not None:
+            self.saida.append(sep.join(str(valor) for valor in valores) + end)
+
+    def texto(self):
+        return "".join(self.saida or ())
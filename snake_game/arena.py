@@ -0,0 +1,174 @@
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bots import BOTS
+from engine import MultiSnakeGame, SnakeGame
+
+
+def play_game(bot_name, seed, columns=40, rows=30):
+    """Let a bot play one seeded game headless.
+
+    The game also ends when the bot goes ``columns * rows`` ticks without
+    eating, so a bot walking in circles cannot stall the arena. Returns
+    (score, ticks, seconds spent deciding).
+    """
+    bot = BOTS[bot_name]()
+    game = SnakeGame(columns, rows, random.Random(seed))
+    starve_limit = columns * rows
+    last_meal = 0
+    thinking = 0.0
+    clock = time.perf_counter
+
+    while not game.over and game.ticks - last_meal < starve_limit:
+        start = clock()
+        direction = bot.decide(game)
+        thinking += clock() - start
+        step = game.step(direction)
+        if step is not None and step.food is not None:
+            last_meal = game.ticks
+    return game.score, game.ticks, thinking
+
+
+def _play_games(args):
+    bot_name, seeds, columns, rows = args
+    return [play_game(bot_name, seed, columns, rows) for seed in seeds]
+
+
+def run(bot_names, games, columns=40, rows=30, processes=None, batch=50):
+    """Play ``games`` games per bot (seeds 0..games-1) across a process pool.
+
+    Returns one dict per bot with its mean/max score, mean ticks, time per
+    decision and games per second.
+    """
+    if games < 1:
+        raise ValueError("games must be at least 1, got {}".format(games))
+    report = []
+    with ProcessPoolExecutor(processes) as pool:
+        for bot_name in bot_names:
+            start = time.perf_counter()
+            jobs = [(bot_name, range(first, min(first + batch, games)), columns, rows)
+                    for first in range(0, games, batch)]
+            results = [result for chunk in pool.map(_play_games, jobs) for result in chunk]
+            elapsed = time.perf_counter() - start
+
+            scores = [score for score, _, _ in results]
+            ticks = sum(t for _, t, _ in results)
+            thinking = sum(seconds for _, _, seconds in results)
+            report.append({
+                "bot": bot_name,
+                "games": len(results),
+                "mean_score": sum(scores) / len(scores),
+                "max_score": max(scores),
+                "mean_ticks": ticks / len(results),
+                "ms_per_decision": 1000.0 * thinking / ticks if ticks else 0.0,
+                "games_per_second": len(results) / elapsed,
+            })
+    return report
+
+
+def play_match(bot_names, seed, columns=40, rows=30, foods=None):
+    """Let several bots play one seeded game on a shared board, headless.
+
+    There is one food per snake unless ``foods`` is given, and the match
+    also ends after ``columns * rows`` ticks in which nobody ate. Returns
+    (score, ticks survived, won, seconds spent deciding) per snake; the
+    winner is the last snake alive, or the best score if several survive.
+    """
+    bots = [BOTS[name]() for name in bot_names]
+    game = MultiSnakeGame(columns, rows, len(bots), random.Random(seed), foods or len(bots))
+    survived = [0] * len(bots)
+    thinking = [0.0] * len(bots)
+    starve_limit = columns * rows
+    last_meal = 0
+    clock = time.perf_counter
+
+    while not game.over and game.ticks - last_meal < starve_limit:
+        directions = [None] * len(bots)
+        for snake in game.snakes:
+            if snake.alive:
+                start = clock()
+                directions[snake.index] = bots[snake.index].decide(snake)
+                thinking[snake.index] += clock() - start
+                survived[snake.index] += 1
+        step = game.step(directions)
+        if step.food:
+            last_meal = game.ticks
+
+    alive = game.alive
+    best = max(alive or game.snakes, key=lambda snake: snake.score)
+    return [(snake.score, survived[snake.index], snake is best, thinking[snake.index])
+            for snake in game.snakes]
+
+
+def _play_matches(args):
+    bot_names, seeds, columns, rows = args
+    return [play_match(bot_names, seed, columns, rows) for seed in seeds]
+
+
+def tournament(bot_names, snakes, games, columns=40, rows=30, processes=None, batch=10):
+    """Play ``games`` matches of ``snakes`` snakes, cycling through ``bot_names``.
+
+    Returns one dict per bot with its mean score, win rate, mean ticks
+    survived and time per decision, plus the simulated ticks per second.
+    """
+    if games < 1:
+        raise ValueError("games must be at least 1, got {}".format(games))
+    lineup = [bot_names[i % len(bot_names)] for i in range(snakes)]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(processes) as pool:
+        jobs = [(lineup, range(first, min(first + batch, games)), columns, rows)
+                for first in range(0, games, batch)]
+        matches = [match for chunk in pool.map(_play_matches, jobs) for match in chunk]
+    elapsed = time.perf_counter() - start
+
+    ticks = sum(max(survived for _, survived, _, _ in match) for match in matches)
+    report = []
+    for bot_name in dict.fromkeys(lineup):
+        results = [result for match in matches
+                   for name, result in zip(lineup, match) if name == bot_name]
+        decisions = sum(survived for _, survived, _, _ in results)
+        report.append({
+            "bot": bot_name,
+            "snakes": len(results),
+            "mean_score": sum(score for score, _, _, _ in results) / len(results),
+            "win_rate": sum(1 for _, _, won, _ in results if won) / len(results),
+            "mean_survived": decisions / len(results),
+            "ms_per_decision": 1000.0 * sum(t for _, _, _, t in results) / decisions if decisions else 0.0,
+            "ticks_per_second": ticks / elapsed,
+        })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare snake bots on the same seeded games")
+    parser.add_argument("bots", nargs="*", default=sorted(BOTS), help="bots to run (default: all)")
+    parser.add_argument("--games", type=int, default=1000, help="games per bot")
+    parser.add_argument("--columns", type=int, default=40)
+    parser.add_argument("--rows", type=int, default=30)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--versus", type=int, metavar="SNAKES",
+                        help="put this many snakes on one board, cycling through the bots")
+    args = parser.parse_args()
+    if args.games < 1:
+        parser.error("--games must be at least 1")
+
+    if args.versus:
+        print("{:<12} {:>6} {:>10} {:>8} {:>13} {:>12} {:>9}".format(
+            "bot", "snakes", "mean score", "win rate", "mean survived", "ms/decision", "ticks/s"))
+        for row in tournament(args.bots, args.versus, args.games, args.columns, args.rows, args.processes):
+            print("{bot:<12} {snakes:>6} {mean_score:>10.1f} {win_rate:>8.1%} {mean_survived:>13.0f} "
+                  "{ms_per_decision:>12.4f} {ticks_per_second:>9.0f}".format(**row))
+        return
+
+    print("{:<12} {:>6} {:>10} {:>6} {:>10} {:>12} {:>9}".format(
+        "bot", "games", "mean score", "max", "mean ticks", "ms/decision", "games/s"))
+    for row in run(args.bots, args.games, args.columns, args.rows, args.processes):
+        print("{bot:<12} {games:>6} {mean_score:>10.1f} {max_score:>6} {mean_ticks:>10.0f} "
+              "{ms_per_decision:>12.4f} {games_per_second:>9.1f}".format(**row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import heapq
+from collections import deque
+
+
+def neighbors(free_cells, cell):
+    """Cells next to ``cell`` that are still on the board"""
+    columns = free_cells.columns
+    col, row = cell % columns, cell // columns
+    if col > 0:
+        yield cell - 1
+    if col < columns - 1:
+        yield cell + 1
+    if row > 0:
+        yield cell - columns
+    if row < free_cells.rows - 1:
+        yield cell + columns
+
+
+def direction_to(free_cells, cell, target):
+    col, row = free_cells.position(cell)
+    target_col, target_row = free_cells.position(target)
+    return target_col - col, target_row - row
+
+
+class Bot:
+    """A player for SnakeGame: ``decide`` returns the direction for the next tick.
+
+    ``reset`` is called before every new game so bots can drop whatever they
+    cached about the previous board.
+    """
+
+    name = "bot"
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        pass
+
+    def decide(self, game):
+        raise NotImplementedError
+
+
+class PathBot(Bot):
+    """Follows a path to the food, searching a new one only when needed.
+
+    The path is kept between ticks and reused while the food stays put and
+    the next cell on it is still free. The only cell that becomes occupied
+    each tick is the new head, so the rest of a path found earlier stays
+    valid and most ticks cost no search at all.
+    """
+
+    def reset(self):
+        self._path = deque()
+        self._target = None
+        self.searches = 0
+
+    def decide(self, game):
+        free_cells = game.free_cells
+        path = self._path
+        if self._target != game.food or not path or not free_cells.is_free(path[0]):
+            self.searches += 1
+            self._target = game.food
+            path = self._path = deque(self.find_path(game) or ())
+        target = path.popleft() if path else self.escape(game)
+        return direction_to(free_cells, game.head, target)
+
+    def find_path(self, game):
+        """Return the cells from the head (excluded) to the food, or None"""
+        raise NotImplementedError
+
+    def escape(self, game):
+        """Move to the free neighbour with the most room around it"""
+        free_cells = game.free_cells
+        best, best_room = None, -1
+        for cell in neighbors(free_cells, game.head):
+            if free_cells.is_free(cell):
+                room = sum(1 for n in neighbors(free_cells, cell) if free_cells.is_free(n))
+                if room > best_room:
+                    best, best_room = cell, room
+        if best is None:
+            # Trapped: keep going and let the game end
+            col, row = free_cells.position(game.head)
+            dx, dy = game.direction
+            return free_cells.cell(col + dx, row + dy) if (dx or dy) else game.head
+        return best
+
+
+def _walk_back(parents, cell):
+    path = []
+    while parents[cell] is not None:
+        path.append(cell)
+        cell = parents[cell]
+    path.reverse()
+    return path
+
+
+class GreedyBot(PathBot):
+    """Breadth-first search for the shortest path to the food"""
+
+    name = "greedy"
+
+    def find_path(self, game):
+        free_cells = game.free_cells
+        goal = game.food
+        if goal is None:
+            return None
+        parents = {game.head: None}
+        queue = deque([game.head])
+        while queue:
+            cell = queue.popleft()
+            if cell == goal:
+                return _walk_back(parents, cell)
+            for n in neighbors(free_cells, cell):
+                if n not in parents and free_cells.is_free(n):
+                    parents[n] = cell
+                    queue.append(n)
+        return None
+
+
+class AStarBot(PathBot):
+    """A* search towards the food with the Manhattan distance as heuristic"""
+
+    name = "astar"
+
+    def find_path(self, game):
+        free_cells = game.free_cells
+        goal = game.food
+        if goal is None:
+            return None
+        goal_col, goal_row = free_cells.position(goal)
+        columns = free_cells.columns
+
+        def distance(cell):
+            return abs(cell % columns - goal_col) + abs(cell // columns - goal_row)
+
+        parents = {game.head: None}
+        costs = {game.head: 0}
+        heap = [(distance(game.head), 0, game.head)]
+        while heap:
+            _, cost, cell = heapq.heappop(heap)
+            if cell == goal:
+                return _walk_back(parents, cell)
+            if cost > costs[cell]:
+                continue
+            for n in neighbors(free_cells, cell):
+                if free_cells.is_free(n) and cost + 1 < costs.get(n, cost + 2):
+                    costs[n] = cost + 1
+                    parents[n] = cell
+                    heapq.heappush(heap, (cost + 1 + distance(n), cost + 1, n))
+        return None
+
+
+# Hamiltonian cycles already built, per board size
+_cycles = {}
+
+
+def hamiltonian_cycle(columns, rows):
+    """Position of every cell along a cycle that visits the whole board once.
+
+    Rows are swept in a zig-zag over columns 1..columns-1 and column 0 is
+    the way back up, which needs an even number of rows; boards with an
+    even number of columns use the transposed cycle. Returns None when both
+    sizes are odd, as no such cycle exists then.
+    """
+    key = (columns, rows)
+    if key not in _cycles:
+        if rows % 2 == 0 and columns > 1:
+            lanes = [(c, r) for r in range(rows)
+                     for c in (range(1, columns) if r % 2 == 0 else range(columns - 1, 0, -1))]
+            cycle = lanes + [(0, r) for r in range(rows - 1, -1, -1)]
+        elif columns % 2 == 0 and rows > 1:
+            cycle = [(c, r) for r, c in hamiltonian_cycle_cells(rows, columns)]
+        else:
+            _cycles[key] = None
+            return None
+        order = [0] * (columns * rows)
+        for index, (c, r) in enumerate(cycle):
+            order[c + r * columns] = index
+        _cycles[key] = order
+    return _cycles[key]
+
+
+def hamiltonian_cycle_cells(columns, rows):
+    order = hamiltonian_cycle(columns, rows)
+    cells = [None] * len(order)
+    for cell, index in enumerate(order):
+        cells[index] = (cell % columns, cell // columns)
+    return cells
+
+
+class HamiltonianBot(Bot):
+    """Follows a Hamiltonian cycle, taking shortcuts while the snake is short.
+
+    Following the cycle never fails. A shortcut to a cell further ahead on
+    the cycle is taken only if it does not pass the food or come within a
+    few cells of the tail, which keeps the body ordered along the cycle.
+    Boards without a cycle fall back to A*.
+    """
+
+    name = "hamiltonian"
+
+    # Cells kept between the new head and the tail when cutting ahead
+    tail_margin = 3
+
+    def __init__(self):
+        self._fallback = AStarBot()
+        super().__init__()
+
+    def reset(self):
+        self._fallback.reset()
+
+    def decide(self, game):
+        free_cells = game.free_cells
+        order = hamiltonian_cycle(free_cells.columns, free_cells.rows)
+        if order is None:
+            return self._fallback.decide(game)
+
+        size = len(order)
+        head = game.head
+        head_index = order[head]
+        best, best_gap = None, 0
+        shortcuts = game.length < size // 2
+        tail_gap = (order[game.body[0]] - head_index) % size or size
+        food_gap = (order[game.food] - head_index) % size if game.food is not None else size
+
+        for cell in neighbors(free_cells, head):
+            gap = (order[cell] - head_index) % size
+            if gap == 1:
+                if best_gap == 0:
+                    best, best_gap = cell, 1
+            elif shortcuts and free_cells.is_free(cell) and best_gap < gap <= food_gap \
+                    and gap < tail_gap - self.tail_margin:
+                best, best_gap = cell, gap
+        return direction_to(free_cells, head, best)
+
+
+BOTS = {bot.name: bot for bot in (GreedyBot, AStarBot, HamiltonianBot)}
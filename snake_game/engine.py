@@ -0,0 +1,268 @@
+import random
+from array import array
+from collections import deque, namedtuple
+
+from free_cells import FreeCells
+
+# Directions as (column, row) offsets
+UP = (0, -1)
+DOWN = (0, 1)
+LEFT = (-1, 0)
+RIGHT = (1, 0)
+STOPPED = (0, 0)
+
+# Cells changed by one tick: the new head, the vacated tail cell (or None
+# when the snake grew) and the newly spawned food (or None if none spawned)
+Step = namedtuple("Step", "head tail food")
+
+# Cells changed by one tick of a MultiSnakeGame: the new heads as (snake
+# index, cell) pairs, the cells freed by moving tails and dead snakes, the
+# newly spawned food cells and the indexes of the snakes that died
+BoardStep = namedtuple("BoardStep", "heads freed food deaths")
+
+
+class SnakeGame:
+    """Headless single-snake simulation on a columns x rows grid.
+
+    The snake is a deque of cell ids from tail to head and every cell it
+    covers is marked occupied in ``free_cells``, which also places the food.
+    ``step`` advances exactly one tick, so the same engine drives the window
+    at any tick rate or runs without a display at all.
+    """
+
+    def __init__(self, columns, rows, rng=random):
+        self.rng = rng
+        self.free_cells = FreeCells(columns, rows)
+        self.direction = STOPPED
+        self.length = 1
+        self.over = False
+        self.ticks = 0
+
+        head = self.free_cells.cell(columns // 2, rows // 2)
+        self.free_cells.occupy(head)
+        self.body = deque([head])
+        self.food = self.free_cells.sample(rng)
+
+    @property
+    def head(self):
+        return self.body[-1]
+
+    @property
+    def score(self):
+        return self.length - 1
+
+    def owner_of(self, cell):
+        return None if self.free_cells.is_free(cell) else 0
+
+    def is_food(self, cell):
+        return cell == self.food
+
+    def step(self, direction=None):
+        """Advance one tick, turning to ``direction`` first if given.
+
+        Returns the Step with the changed cells, or None once the game is
+        over (the snake left the board, hit itself or filled the board).
+        """
+        if self.over:
+            return None
+        if direction is not None:
+            self.direction = direction
+        self.ticks += 1
+
+        free_cells = self.free_cells
+        col, row = free_cells.position(self.body[-1])
+        col += self.direction[0]
+        row += self.direction[1]
+
+        # Check if the snake hits the walls
+        if col < 0 or col >= free_cells.columns or row < 0 or row >= free_cells.rows:
+            self.over = True
+            return None
+
+        # Move the snake, freeing the tail cell it leaves behind
+        head = free_cells.cell(col, row)
+        self.body.append(head)
+        tail = None
+        if len(self.body) > self.length:
+            tail = self.body.popleft()
+            free_cells.release(tail)
+
+        # Check if the snake hits itself
+        if not free_cells.is_free(head):
+            self.over = True
+            return None
+        free_cells.occupy(head)
+
+        # Check if the snake eats the food
+        food = None
+        if head == self.food:
+            self.length += 1
+            food = self.food = free_cells.sample(self.rng)
+            # No free cell left: the snake fills the whole board
+            if food is None:
+                self.over = True
+
+        return Step(head, tail, food)
+
+
+class Snake:
+    """One snake of a MultiSnakeGame.
+
+    It has the attributes bots read from a SnakeGame (``free_cells``,
+    ``body``, ``head``, ``direction``, ``length`` and ``food``), so any bot
+    can drive it unchanged. ``food`` is the food closest to the head.
+    """
+
+    def __init__(self, game, index, head):
+        self.game = game
+        self.index = index
+        self.free_cells = game.free_cells
+        self.body = deque([head])
+        self.direction = STOPPED
+        self.length = 1
+        self.alive = True
+
+    @property
+    def head(self):
+        return self.body[-1]
+
+    @property
+    def score(self):
+        return self.length - 1
+
+    @property
+    def food(self):
+        foods = self.game.foods
+        if not foods:
+            return None
+        columns = self.free_cells.columns
+        col, row = self.body[-1] % columns, self.body[-1] // columns
+        return min(foods, key=lambda cell: abs(cell % columns - col) + abs(cell // columns - row))
+
+
+class MultiSnakeGame:
+    """Several snakes on one board, all moved together every tick.
+
+    ``owner`` is the shared occupancy grid: the index of the snake covering
+    each cell, or -1. Collisions are found by looking up the cells the heads
+    move into, never by comparing snakes pairwise, so a tick costs O(number
+    of snakes) whatever their length. Each tick, in order:
+
+    - snakes leaving the board die;
+    - the tails move, so a head may enter a cell vacated in the same tick;
+    - heads entering the same cell all die, and food there stays uneaten;
+    - heads entering a cell covered by any snake die;
+    - surviving heads on food grow and the food respawns elsewhere;
+    - dead snakes are removed from the board.
+
+    The game is over when at most one snake is left, or none when playing
+    alone.
+    """
+
+    def __init__(self, columns, rows, players, rng=random, foods=1):
+        self.rng = rng
+        self.free_cells = FreeCells(columns, rows)
+        self.owner = array("h", [-1]) * (columns * rows)
+        self.ticks = 0
+        self.over = False
+
+        self.snakes = []
+        for index in range(players):
+            head = self.free_cells.sample(rng)
+            self.free_cells.occupy(head)
+            self.owner[head] = index
+            self.snakes.append(Snake(self, index, head))
+
+        self.foods = set()
+        for _ in range(foods):
+            self._spawn_food()
+
+    @property
+    def alive(self):
+        return [snake for snake in self.snakes if snake.alive]
+
+    def owner_of(self, cell):
+        owner = self.owner[cell]
+        return None if owner < 0 else owner
+
+    def is_food(self, cell):
+        return cell in self.foods
+
+    def _spawn_food(self):
+        # Food goes on a free cell without food, if there is one left
+        free_cells = self.free_cells
+        if len(free_cells) <= len(self.foods):
+            return None
+        while True:
+            cell = free_cells.sample(self.rng)
+            if cell not in self.foods:
+                self.foods.add(cell)
+                return cell
+
+    def _free(self, cell, freed):
+        self.free_cells.release(cell)
+        self.owner[cell] = -1
+        freed.append(cell)
+
+    def step(self, directions):
+        """Advance one tick; ``directions[i]`` turns snake i, None keeps its way.
+
+        Returns the BoardStep with the changed cells, or None once the game
+        is over.
+        """
+        if self.over:
+            return None
+        self.ticks += 1
+        free_cells = self.free_cells
+        columns, rows = free_cells.columns, free_cells.rows
+        moves = []
+        deaths = []
+        freed = []
+
+        for snake in self.snakes:
+            if not snake.alive:
+                continue
+            direction = directions[snake.index]
+            if direction is not None:
+                snake.direction = direction
+            col, row = free_cells.position(snake.body[-1])
+            col += snake.direction[0]
+            row += snake.direction[1]
+            if col < 0 or col >= columns or row < 0 or row >= rows:
+                deaths.append(snake)
+            else:
+                moves.append((snake, free_cells.cell(col, row)))
+
+        # Move the tails first, a head may enter a cell vacated this tick
+        targets = {}
+        for snake, head in moves:
+            if len(snake.body) >= snake.length:
+                self._free(snake.body.popleft(), freed)
+            targets[head] = targets.get(head, 0) + 1
+
+        heads = []
+        eaten = 0
+        for snake, head in moves:
+            if targets[head] > 1 or not free_cells.is_free(head):
+                deaths.append(snake)
+                continue
+            free_cells.occupy(head)
+            self.owner[head] = snake.index
+            snake.body.append(head)
+            heads.append((snake.index, head))
+            if head in self.foods:
+                self.foods.discard(head)
+                snake.length += 1
+                eaten += 1
+
+        for snake in deaths:
+            snake.alive = False
+            for cell in snake.body:
+                self._free(cell, freed)
+            snake.body.clear()
+
+        food = [cell for cell in (self._spawn_food() for _ in range(eaten)) if cell is not None]
+
+        alive = sum(1 for snake in self.snakes if snake.alive)
+        self.over = alive == 0 or (len(self.snakes) > 1 and alive <= 1)
+        return BoardStep(heads, freed, food, [snake.index for snake in deaths])
@@ -0,0 +1,61 @@
+import random
+from array import array
+
+
+class FreeCells:
+    """Index of the empty cells of a columns x rows board.
+
+    Cells are numbered ``col + row * columns``. The free ones are kept packed
+    at the front of ``_cells`` and ``_index`` maps every cell to its slot in
+    that array (or -1 when the cell is occupied), so occupying, releasing,
+    membership checks and uniform sampling are all O(1).
+    """
+
+    def __init__(self, columns, rows):
+        self.columns = columns
+        self.rows = rows
+        self._cells = array("i", range(columns * rows))
+        self._index = array("i", range(columns * rows))
+        self._size = columns * rows
+
+    def __len__(self):
+        return self._size
+
+    def cell(self, col, row):
+        return col + row * self.columns
+
+    def position(self, cell):
+        return cell % self.columns, cell // self.columns
+
+    @property
+    def slots(self):
+        """The cell to slot array, -1 for occupied cells; read it, do not change it"""
+        return self._index
+
+    def is_free(self, cell):
+        return self._index[cell] >= 0
+
+    def occupy(self, cell):
+        # Swap the cell with the last free one and shrink the free region
+        slot = self._index[cell]
+        if slot < 0:
+            return
+        self._size -= 1
+        last = self._cells[self._size]
+        self._cells[slot] = last
+        self._index[last] = slot
+        self._cells[self._size] = cell
+        self._index[cell] = -1
+
+    def release(self, cell):
+        if self._index[cell] >= 0:
+            return
+        self._cells[self._size] = cell
+        self._index[cell] = self._size
+        self._size += 1
+
+    def sample(self, rng=random):
+        """Return a uniformly chosen free cell, or None if the board is full."""
+        if self._size == 0:
+            return None
+        return self._cells[rng.randrange(self._size)]
@@ -0,0 +1,94 @@
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+
+from protocol import HELLO, TICK, FrameReader
+from replay import DIRECTIONS
+
+
+class SimulatedClient:
+    """Reads the delta stream like a real client and turns at random"""
+
+    def __init__(self, rng, turn_chance):
+        self.rng = rng
+        self.turn_chance = turn_chance
+        self.bytes = 0
+        self.ticks = 0
+        self.hellos = 0
+
+    async def run(self, host, port, until):
+        reader, writer = await asyncio.open_connection(host, port)
+        frames = FrameReader()
+        try:
+            while time.perf_counter() < until:
+                try:
+                    data = await asyncio.wait_for(reader.read(65536), until - time.perf_counter())
+                except asyncio.TimeoutError:
+                    break
+                if not data:
+                    break
+                self.bytes += len(data)
+                for payload in frames.feed(data):
+                    if payload[0] == HELLO:
+                        self.hellos += 1
+                    elif payload[0] == TICK:
+                        self.ticks += 1
+                        if self.rng.random() < self.turn_chance:
+                            writer.write(bytes([self.rng.randrange(len(DIRECTIONS))]))
+        finally:
+            writer.close()
+
+
+async def load_test(host, port, clients, duration, turn_chance=0.2, seed=0):
+    """Connect ``clients`` simulated clients for ``duration`` seconds.
+
+    Returns the mean ticks per second and bytes per second seen by a client.
+    """
+    rng = random.Random(seed)
+    simulated = [SimulatedClient(random.Random(rng.random()), turn_chance) for _ in range(clients)]
+    start = time.perf_counter()
+    until = start + duration
+    await asyncio.gather(*(client.run(host, port, until) for client in simulated), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    return {
+        "clients": clients,
+        "ticks_per_second": sum(c.ticks for c in simulated) / clients / elapsed,
+        "bytes_per_second_per_client": sum(c.bytes for c in simulated) / clients / elapsed,
+        "rounds_per_client": sum(c.hellos for c in simulated) / clients,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for server.py with simulated clients")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=300)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--spawn-server", action="store_true",
+                        help="start server.py in a subprocess for the duration of the test")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn_server:
+        server_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py")
+        server = subprocess.Popen([sys.executable, server_script, "--port", str(args.port),
+                                   "--max-clients", str(args.clients)])
+        time.sleep(1.0)
+    try:
+        result = asyncio.run(load_test(args.host, args.port, args.clients, args.duration))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print("{clients} clients: {ticks_per_second:.1f} ticks/s per client, "
+          "{bytes_per_second_per_client:.0f} bytes/s per client, "
+          "{rounds_per_client:.1f} rounds per client".format(**result))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,26 @@
-import pygame
+import argparse
+import os
 import random
+import socket
+import sys
+import time
+from collections import deque
+
+import pygame
+
+from bots import BOTS
+from engine import DOWN, LEFT, RIGHT, UP, MultiSnakeGame
+from protocol import HELLO, BoardMirror, FrameReader, encode_turn
+from renderer import DirtyRenderer, TextCache
+from replay import Replay
+from timing import FrameStats
+
+# Scores go to the leaderboard shared with the other games, when it is there
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "python_jogos_alura_curso"))
+try:
+    from placar import placar_padrao
+except ImportError:
+    placar_padrao = None
 
 # Initialize the game
 pygame.init()
@@ -15,141 +36,358 @@ screen_width = 800
 screen_height = 600
 block_size = 20
 
-# Set the initial speed of the snake
+# Size of the board in cells, larger boards scroll along with the snake
+grid_columns = screen_width // block_size
+grid_rows = screen_height // block_size
+max_grid_size = 1000
+
+# Set the initial speed of the snake, in simulation ticks per second
 snake_speed = 15
 
+# Every round is saved here as a replay file, set to None to disable it
+replay_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replays")
+
 # Create the screen
 screen = pygame.display.set_mode((screen_width, screen_height))
 pygame.display.set_caption("Snake Game")
 
+# Fonts and rendered texts are shared by the whole game
+text_cache = TextCache()
+renderer = DirtyRenderer(screen, block_size, text_cache)
+
+# Frame and tick timings of the running game
+frame_stats = FrameStats()
+
+
+# Game over screen, rendered once and reused
+game_over_screen = None
+
+# Events after which the window content must be drawn again
+expose_events = {pygame.VIDEOEXPOSE, getattr(pygame, "WINDOWEXPOSED", pygame.VIDEOEXPOSE)}
+
 
 # Function to display game over message
 def game_over():
-    font = pygame.font.Font(None, 72)
-    text = font.render("Game Over", True, RED)
-    text_rect = text.get_rect(center=(screen_width / 2, screen_height / 2 - text.get_height()))
-    screen.blit(text, text_rect)
+    global game_over_screen
+    if game_over_screen is None:
+        game_over_screen = pygame.Surface((screen_width, screen_height))
+        game_over_screen.fill(BLACK)
 
-    # Display the options
-    font = pygame.font.Font(None, 36)
-    text = font.render("Press ''Esc'' to exit", True, WHITE)
-    text_rect = text.get_rect(center=(screen_width / 2, screen_height / 2))
-    screen.blit(text, text_rect)
+        text = text_cache.render("Game Over", 72, RED)
+        text_rect = text.get_rect(center=(screen_width / 2, screen_height / 2 - text.get_height()))
+        game_over_screen.blit(text, text_rect)
 
-    text = font.render("Press ''Enter'' to play again", True, WHITE)
-    text_rect = text.get_rect(center=(screen_width / 2, screen_height / 2 + text.get_height()))
-    screen.blit(text, text_rect)
+        # Display the options
+        text = text_cache.render("Press ''Esc'' to exit", 36, WHITE)
+        text_rect = text.get_rect(center=(screen_width / 2, screen_height / 2))
+        game_over_screen.blit(text, text_rect)
 
+        text = text_cache.render("Press ''Enter'' to play again", 36, WHITE)
+        text_rect = text.get_rect(center=(screen_width / 2, screen_height / 2 + text.get_height()))
+        game_over_screen.blit(text, text_rect)
+
+    screen.blit(game_over_screen, (0, 0))
     pygame.display.flip()
 
 
-# Function to display the score
-def show_score(score):
-    font = pygame.font.Font(None, 36)
-    text = font.render("Score: " + str(score), True, WHITE)
-    screen.blit(text, (10, 10))
+# Map the arrow keys to snake directions
+key_directions = {
+    pygame.K_LEFT: LEFT,
+    pygame.K_RIGHT: RIGHT,
+    pygame.K_UP: UP,
+    pygame.K_DOWN: DOWN,
+}
+
+# Key presses waiting for a simulation tick, extra presses are dropped
+max_queued_turns = 3
+
+# Ticks to catch up on after a slow frame before the simulation slows down
+max_ticks_per_frame = 5
+
+# Colors of the snakes in a versus game, the player is the white one
+snake_colors = (WHITE, (255, 200, 0), (0, 160, 255), (255, 0, 255), (255, 120, 0), (0, 255, 255))
+
+
+def render_refresh_rate():
+    """Refresh rate of the display, falling back to 60 Hz when unknown"""
+    get_rate = getattr(pygame.display, "get_current_refresh_rate", None)
+    rate = get_rate() if get_rate else 0
+    return rate or 60
+
+
+# Function to queue the turns pressed since the last frame, returns True on quit
+def read_events(queued_turns):
+    quit_requested = False
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            quit_requested = True
+        elif event.type == pygame.KEYDOWN and event.key in key_directions:
+            if len(queued_turns) < max_queued_turns:
+                queued_turns.append(key_directions[event.key])
+    return quit_requested
+
+
+# Function to show the game over screen until the player decides, returns True to play again
+def wait_for_restart():
+    # Draw the game over screen once, then sleep until an event arrives
+    game_over()
+    while True:
+        event = pygame.event.wait()
+        if event.type == pygame.QUIT:
+            return False
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                return False
+            elif event.key == pygame.K_RETURN:
+                return True
+        elif event.type in expose_events:
+            game_over()
+
+
+# Function to save the replay of a finished round
+def save_replay(replay):
+    if replay_dir is None or not replay.actions:
+        return
+    os.makedirs(replay_dir, exist_ok=True)
+    name = "{}-{}.snkr".format(time.strftime("%Y%m%d-%H%M%S"), replay.seed)
+    replay.save(os.path.join(replay_dir, name))
+
+
+# Function to record a finished round on the leaderboard, per board size
+def record_score(score, bot, columns, rows):
+    if placar_padrao is None:
+        return
+    placar_padrao().registra("snake", score, "{}x{}".format(columns, rows), bot.name if bot is not None else "")
 
 
-# Define main game function
-def game():
+# Function to draw one simulation step, interpolated between two ticks
+def draw_step(snake, step, fraction):
+    free_cells = snake.free_cells
+    if step.tail is not None and step.tail != step.head and step.tail != snake.food:
+        tail_col, tail_row = free_cells.position(step.tail)
+        new_col, new_row = free_cells.position(snake.body[0])
+        renderer.draw_cell_fraction(tail_col, tail_row, new_col - tail_col, new_row - tail_row, fraction, BLACK)
+    renderer.draw_cell_fraction(*free_cells.position(step.head), *snake.direction, fraction, WHITE)
+
+
+# Define main game function, a bot plays instead of the keyboard if given
+def game(tick_rate=snake_speed, bot=None, columns=grid_columns, rows=grid_rows):
     game_over_flag = False
     game_exit = False
 
+    clock = pygame.time.Clock()
+    render_rate = render_refresh_rate()
+    tick_ms = 1000.0 / tick_rate
+
     while not game_exit:
-        # Set initial position of the snake
-        x1 = screen_width / 2
-        y1 = screen_height / 2
+        # Create the snake in the middle of the board and place the food,
+        # the round is seeded and every tick recorded so it can be replayed
+        replay = Replay(columns, rows, random.randrange(2 ** 32))
+        snake = replay.new_game()
+        if bot is not None:
+            bot.reset()
+        queued_turns = deque()
+        last_step = None
+        accumulator = 0.0
+
+        # Draw the view around the snake, only changed cells are drawn from now on
+        renderer.center_on(*snake.free_cells.position(snake.head), snake)
+        clock.tick()
+
+        while not game_exit and not game_over_flag:
+            # Queue every turn so quick key sequences between ticks are kept
+            game_exit = read_events(queued_turns)
+
+            # Run as many fixed simulation ticks as the elapsed time covers
+            frame_ms = clock.tick(render_rate)
+            frame_stats.record_frame(frame_ms)
+            accumulator = min(accumulator + frame_ms, tick_ms * max_ticks_per_frame)
+            while accumulator >= tick_ms:
+                accumulator -= tick_ms
+                if last_step is not None:
+                    draw_step(snake, last_step, 1.0)
+                if bot is not None:
+                    turn = bot.decide(snake)
+                else:
+                    turn = queued_turns.popleft() if queued_turns else None
+                replay.record(turn)
+                last_step = snake.step(turn)
+                frame_stats.record_tick()
+                if last_step is None:
+                    game_over_flag = True
+                    break
+                if last_step.food is not None:
+                    renderer.draw_cell(*snake.free_cells.position(last_step.food), GREEN)
+                renderer.follow(*snake.free_cells.position(last_step.head), snake)
+
+            if game_over_flag:
+                break
+
+            # Draw the current move part way, as far as the next tick is
+            if last_step is not None:
+                draw_step(snake, last_step, accumulator / tick_ms)
+
+            # Update only the changed parts of the screen
+            renderer.draw_score(snake.score, snake)
+            renderer.flush()
+
+            if frame_stats.frames % render_rate == 0:
+                pygame.display.set_caption("Snake Game - {:.0f} fps".format(frame_stats.fps))
+
+        save_replay(replay)
 
-        # Set initial change in position of the snake
-        x1_change = 0
-        y1_change = 0
+        if game_over_flag:
+            record_score(snake.score, bot, columns, rows)
+            game_exit = not wait_for_restart()
+            game_over_flag = False
 
-        # Create snake body
-        snake_list = []
-        length_of_snake = 1
+    # Quit the game
+    pygame.quit()
+    quit()
 
-        # Set initial position of the food
-        foodx = round(random.randrange(0, screen_width - block_size) / 20.0) * 20.0
-        foody = round(random.randrange(0, screen_height - block_size) / 20.0) * 20.0
+
+# Define the versus game function: the player (or a bot) and bot opponents share one board
+def versus(opponents, tick_rate=snake_speed, bot=None, columns=grid_columns, rows=grid_rows):
+    game_over_flag = False
+    game_exit = False
+
+    clock = pygame.time.Clock()
+    render_rate = render_refresh_rate()
+    tick_ms = 1000.0 / tick_rate
+    renderer.snake_colors = snake_colors
+    players = [bot] + list(opponents)
+
+    while not game_exit:
+        # Snakes start on random cells, with one food per snake
+        board = MultiSnakeGame(columns, rows, len(players), foods=len(players))
+        you = board.snakes[0]
+        for player in players:
+            if player is not None:
+                player.reset()
+        queued_turns = deque()
+        accumulator = 0.0
+
+        renderer.center_on(*board.free_cells.position(you.head), board)
+        clock.tick()
 
         while not game_exit and not game_over_flag:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    game_exit = True
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_LEFT:
-                        x1_change = -block_size
-                        y1_change = 0
-                    elif event.key == pygame.K_RIGHT:
-                        x1_change = block_size
-                        y1_change = 0
-                    elif event.key == pygame.K_UP:
-                        y1_change = -block_size
-                        x1_change = 0
-                    elif event.key == pygame.K_DOWN:
-                        y1_change = block_size
-                        x1_change = 0
-
-            # Check if the snake hits the walls
-            if x1 >= screen_width or x1 < 0 or y1 >= screen_height or y1 < 0:
-                game_over_flag = True
-
-            # Update the position of the snake
-            x1 += x1_change
-            y1 += y1_change
-            screen.fill(BLACK)
-
-            # Draw food
-            pygame.draw.rect(screen, GREEN, [foodx, foody, block_size, block_size])
-
-            # Draw snake
-            snake_head = [x1, y1]
-            snake_list.append(snake_head)
-            if len(snake_list) > length_of_snake:
-                del snake_list[0]
-
-            # Check if the snake hits itself
-            for segment in snake_list[:-1]:
-                if segment == snake_head:
+            game_exit = read_events(queued_turns)
+
+            frame_ms = clock.tick(render_rate)
+            frame_stats.record_frame(frame_ms)
+            accumulator = min(accumulator + frame_ms, tick_ms * max_ticks_per_frame)
+            while accumulator >= tick_ms:
+                accumulator -= tick_ms
+                directions = [None] * len(players)
+                for snake in board.alive:
+                    player = players[snake.index]
+                    if player is not None:
+                        directions[snake.index] = player.decide(snake)
+                    elif queued_turns:
+                        directions[snake.index] = queued_turns.popleft()
+                step = board.step(directions)
+                frame_stats.record_tick()
+
+                # Erase freed cells before drawing, heads and food may reuse them
+                for cell in step.freed:
+                    renderer.erase_cell(*board.free_cells.position(cell))
+                for index, cell in step.heads:
+                    renderer.draw_cell(*board.free_cells.position(cell), snake_colors[index % len(snake_colors)])
+                for cell in step.food:
+                    renderer.draw_cell(*board.free_cells.position(cell), GREEN)
+
+                if board.over or not you.alive:
                     game_over_flag = True
+                    break
+                renderer.follow(*board.free_cells.position(you.head), board)
 
-            # Draw the snake body
-            for segment in snake_list:
-                pygame.draw.rect(screen, WHITE, [segment[0], segment[1], block_size, block_size])
-
-            # Check if the snake eats the food
-            if x1 == foodx and y1 == foody:
-                foodx = round(random.randrange(0, screen_width - block_size) / 20.0) * 20.0
-                foody = round(random.randrange(0, screen_height - block_size) / 20.0) * 20.0
-                length_of_snake += 1
-
-            # Update the screen
-            show_score(length_of_snake - 1)
-            pygame.display.update()
-
-            # Set the snake speed
-            clock = pygame.time.Clock()
-            clock.tick(snake_speed)
-
-        while game_over_flag:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    game_exit = True
-                    game_over_flag = False
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        game_exit = True
-                        game_over_flag = False
-                    elif event.key == pygame.K_RETURN:
-                        game_over_flag = False
-
-            screen.fill(BLACK)
-            game_over()
+            renderer.draw_score(you.score, board)
+            renderer.flush()
+
+        if game_over_flag:
+            record_score(you.score, bot, columns, rows)
+            game_exit = not wait_for_restart()
+            game_over_flag = False
+
+    # Quit the game
+    pygame.quit()
+    quit()
+
+
+# Define the network game function: the server runs the game, this window only draws its deltas
+def network_game(host, port):
+    connection = socket.create_connection((host, port))
+    connection.setblocking(False)
+    frames = FrameReader()
+    board = None
+    clock = pygame.time.Clock()
+    render_rate = render_refresh_rate()
+    renderer.snake_colors = snake_colors
+    pygame.display.set_caption("Snake Game - {}:{}".format(host, port))
+
+    while True:
+        # Turns go to the server right away, it queues them for its next tick
+        turns = deque()
+        if read_events(turns):
+            break
+        try:
+            for turn in turns:
+                connection.send(encode_turn(turn))
+            data = connection.recv(65536)
+        except BlockingIOError:
+            data = None
+        except ConnectionError:
+            break
+        if data == b"":
+            break
+
+        for payload in frames.feed(data or b""):
+            if payload[0] == HELLO:
+                board = BoardMirror(payload)
+                # Your snake is always the white one
+                shift = board.you or 0
+                renderer.snake_colors = [snake_colors[(i - shift) % len(snake_colors)] for i in range(len(snake_colors))]
+                renderer.center_on(*board.free_cells.position(board.head or 0), board)
+                continue
+            heads, freed, food = board.apply_tick(payload)
+            for cell in freed:
+                renderer.erase_cell(*board.free_cells.position(cell))
+            for index, cell in heads:
+                color = renderer.snake_colors[index % len(snake_colors)]
+                renderer.draw_cell(*board.free_cells.position(cell), color)
+            for cell in food:
+                renderer.draw_cell(*board.free_cells.position(cell), GREEN)
+            if board.head is not None:
+                renderer.follow(*board.free_cells.position(board.head), board)
+
+        if board is not None:
+            renderer.draw_score(board.score, board)
+            renderer.flush()
+        frame_stats.record_frame(clock.tick(render_rate))
 
     # Quit the game
+    connection.close()
     pygame.quit()
     quit()
 
 
 # Start the game
-game()
\ No newline at end of file
+parser = argparse.ArgumentParser(description="Snake Game")
+parser.add_argument("--bot", choices=sorted(BOTS), help="let a bot play instead of the keyboard")
+parser.add_argument("--speed", type=int, default=snake_speed, help="simulation ticks per second")
+parser.add_argument("--columns", type=int, default=grid_columns, help="board width in cells")
+parser.add_argument("--rows", type=int, default=grid_rows, help="board height in cells")
+parser.add_argument("--opponents", nargs="+", choices=sorted(BOTS), metavar="BOT",
+                    help="bot snakes to play against on the same board")
+parser.add_argument("--connect", metavar="HOST:PORT", help="play on a snake server (see server.py)")
+args = parser.parse_args()
+if not (2 <= args.columns <= max_grid_size and 2 <= args.rows <= max_grid_size):
+    parser.error("the board must have between 2 and {} columns and rows".format(max_grid_size))
+player_bot = BOTS[args.bot]() if args.bot else None
+if args.connect:
+    host, _, port = args.connect.rpartition(":")
+    network_game(host or "127.0.0.1", int(port))
+elif args.opponents:
+    versus([BOTS[name]() for name in args.opponents], args.speed, player_bot, args.columns, args.rows)
+else:
+    game(args.speed, player_bot, args.columns, args.rows)
\ No newline at end of file
@@ -0,0 +1,256 @@
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+import pygame
+
+from bots import BOTS
+from engine import SnakeGame
+from renderer import GREEN, DirtyRenderer, TextCache
+
+# Gray level of each kind of cell in a grid observation. Scaling a grid
+# down keeps the brightest cell of every block, so heads and food are never
+# lost: the brighter, the more it matters
+EMPTY = 0
+OTHER_BODY = 64
+BODY = 128
+OTHER_HEAD = 160
+FOOD = 208
+HEAD = 255
+
+
+class FrameStack:
+    """The last ``depth`` frames, oldest first, in one buffer allocated up front.
+
+    Every frame is written twice, at ``slot`` and ``slot + depth`` of a
+    buffer of 2 x depth frames, so the latest ``depth`` frames are always
+    one contiguous slice of it and ``push`` never allocates or shifts.
+    """
+
+    def __init__(self, depth, shape, dtype=np.uint8):
+        self.depth = depth
+        self._frames = np.zeros((2 * depth,) + tuple(shape), dtype)
+        self._slot = 0
+
+    def push(self, frame):
+        """Add a frame; returns a (depth, ...) view that the next push overwrites"""
+        slot = self._slot
+        self._frames[slot] = frame
+        self._frames[slot + self.depth] = frame
+        self._slot = (slot + 1) % self.depth
+        return self._frames[slot + 1:slot + 1 + self.depth]
+
+    def clear(self):
+        self._frames.fill(0)
+        self._slot = 0
+
+
+def _block_starts(size, target):
+    # First source row (or column) of each of the ``target`` output blocks
+    return np.arange(target, dtype=np.intp) * size // target
+
+
+class GridObserver:
+    """Observations drawn straight from the engine state, without a window.
+
+    An observation is a (rows, columns) uint8 image with one pixel per cell
+    and the gray levels above, optionally scaled to ``size`` = (width,
+    height) and stacked with the ``stack`` - 1 observations before it.
+    Occupancy is read through zero-copy NumPy views of the engine arrays
+    (``owner`` of a multi-snake board, the free cell slots of a single
+    snake game) and only the heads and food are set one by one, so a call
+    costs a few passes over the board and allocates nothing.
+
+    Works with SnakeGame, MultiSnakeGame and the client BoardMirror. The
+    returned array is overwritten by the next call; copy it to keep it.
+    """
+
+    def __init__(self, columns, rows, size=None, stack=1):
+        self.columns = columns
+        self.rows = rows
+        self.grid = np.zeros((rows, columns), np.uint8)
+        self._cells = self.grid.reshape(-1)
+        self._mask = np.empty((rows, columns), np.bool_)
+        self._source = None
+        self._occupancy = None
+
+        width, height = size or (columns, rows)
+        self._scaled = None
+        if (width, height) != (columns, rows):
+            self._row_starts = _block_starts(rows, height)
+            self._column_starts = _block_starts(columns, width)
+            self._tall = np.empty((height, columns), np.uint8)
+            self._scaled = np.empty((height, width), np.uint8)
+        self.frames = FrameStack(stack, (height, width)) if stack > 1 else None
+
+    def reset(self):
+        """Forget the stacked frames, call it when a new game starts"""
+        if self.frames is not None:
+            self.frames.clear()
+
+    def _view(self, source):
+        # The view is remade only when the game, and so its array, changes
+        if source is not self._source:
+            self._source = source
+            self._occupancy = np.frombuffer(source, np.dtype(source.typecode)).reshape(self.rows, self.columns)
+        return self._occupancy
+
+    def observe(self, game, player=None):
+        """Observation of ``game`` as seen by snake ``player``.
+
+        On shared boards the other snakes get the OTHER_ levels; ``player``
+        defaults to your snake on a BoardMirror and to snake 0 otherwise.
+        """
+        grid = self.grid
+        cells = self._cells
+        mask = self._mask
+        owner = getattr(game, "owner", None)
+
+        if owner is None:
+            np.less(self._view(game.free_cells.slots), 0, out=mask)
+            grid.fill(EMPTY)
+            np.copyto(grid, BODY, where=mask)
+            cells[game.head] = HEAD
+            if game.food is not None:
+                cells[game.food] = FOOD
+        else:
+            if player is None:
+                player = getattr(game, "you", 0)
+            occupancy = self._view(owner)
+            np.greater_equal(occupancy, 0, out=mask)
+            grid.fill(EMPTY)
+            np.copyto(grid, OTHER_BODY, where=mask)
+            if player is not None:
+                np.equal(occupancy, player, out=mask)
+                np.copyto(grid, BODY, where=mask)
+            if hasattr(game, "snakes"):
+                for snake in game.snakes:
+                    if snake.alive:
+                        cells[snake.body[-1]] = HEAD if snake.index == player else OTHER_HEAD
+            else:
+                for index, cell in enumerate(game.heads):
+                    if game.alive[index] and cell is not None:
+                        cells[cell] = HEAD if index == player else OTHER_HEAD
+            for cell in game.foods:
+                cells[cell] = FOOD
+
+        frame = grid
+        if self._scaled is not None:
+            np.maximum.reduceat(frame, self._row_starts, axis=0, out=self._tall)
+            np.maximum.reduceat(self._tall, self._column_starts, axis=1, out=self._scaled)
+            frame = self._scaled
+        if self.frames is not None:
+            return self.frames.push(frame)
+        return frame
+
+
+class PixelObserver:
+    """Observations read from the pixels of a pygame surface, such as the window.
+
+    Frames are (height, width, 3) uint8 arrays, rows first like the grid
+    observations. Without ``size`` or ``stack`` the observation is
+    ``pygame.surfarray.pixels3d`` itself: a view of the surface memory, no
+    copy at all. Such a view keeps the surface locked, and pygame refuses
+    to blit onto a locked surface, so drop it before drawing text again.
+
+    With ``size`` the surface is smooth-scaled into a surface allocated
+    once, whose pixels are viewed the same way; with ``stack`` each frame
+    is copied into a FrameStack and the source surface is unlocked right
+    away. Works on any surface, including the display of SDL's dummy
+    video driver.
+    """
+
+    def __init__(self, surface, size=None, stack=1):
+        self.surface = surface
+        self._small = None
+        height = surface.get_height()
+        width = surface.get_width()
+        if size is not None and tuple(size) != (width, height):
+            width, height = size
+            self._small = pygame.Surface((width, height), 0, surface)
+            self._small_pixels = pygame.surfarray.pixels3d(self._small).transpose(1, 0, 2)
+        self.frames = FrameStack(stack, (height, width, 3)) if stack > 1 else None
+
+    def reset(self):
+        if self.frames is not None:
+            self.frames.clear()
+
+    def observe(self):
+        if self._small is not None:
+            pygame.transform.smoothscale(self.surface, self._small.get_size(), self._small)
+            pixels = self._small_pixels
+        else:
+            pixels = pygame.surfarray.pixels3d(self.surface).transpose(1, 0, 2)
+        if self.frames is None:
+            return pixels
+        return self.frames.push(pixels)
+
+
+def benchmark(bot_name="greedy", ticks=10000, columns=40, rows=30, size=None, stack=1, pixels=False,
+              block_size=20, seed=0):
+    """Let a bot play headless and time one observation per tick.
+
+    Pixel observations read a dummy display drawn by the DirtyRenderer, as
+    in the game. Returns (observations, seconds spent observing, shape).
+    """
+    bot = BOTS[bot_name]()
+    rng = random.Random(seed)
+    game = SnakeGame(columns, rows, rng)
+    if pixels:
+        screen = pygame.display.set_mode((columns * block_size, rows * block_size))
+        renderer = DirtyRenderer(screen, block_size, TextCache())
+        observer = PixelObserver(screen, size, stack)
+        renderer.center_on(*game.free_cells.position(game.head), game)
+    else:
+        observer = GridObserver(columns, rows, size, stack)
+    observing = 0.0
+    shape = None
+    clock = time.perf_counter
+
+    for _ in range(ticks):
+        step = game.step(bot.decide(game))
+        if step is None:
+            game = SnakeGame(columns, rows, rng)
+            bot.reset()
+            observer.reset()
+            if pixels:
+                renderer.redraw(game)
+        elif pixels:
+            if step.tail is not None:
+                renderer.erase_cell(*game.free_cells.position(step.tail))
+            renderer.draw_cell(*game.free_cells.position(step.head), renderer.snake_colors[0])
+            if step.food is not None:
+                renderer.draw_cell(*game.free_cells.position(step.food), GREEN)
+        start = clock()
+        observation = observer.observe() if pixels else observer.observe(game)
+        observing += clock() - start
+        shape = observation.shape
+        del observation
+    return ticks, observing, shape
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time board observations for pixel-based agents")
+    parser.add_argument("--bot", choices=sorted(BOTS), default="greedy")
+    parser.add_argument("--ticks", type=int, default=10000)
+    parser.add_argument("--columns", type=int, default=40)
+    parser.add_argument("--rows", type=int, default=30)
+    parser.add_argument("--size", type=int, nargs=2, metavar=("WIDTH", "HEIGHT"), help="scale observations")
+    parser.add_argument("--stack", type=int, default=1, help="frames per observation")
+    parser.add_argument("--pixels", action="store_true", help="read the rendered screen instead of the grid")
+    args = parser.parse_args()
+
+    # No window needed: SDL's dummy video driver unless another one is set
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    ticks, seconds, shape = benchmark(args.bot, args.ticks, args.columns, args.rows, args.size, args.stack,
+                                      args.pixels)
+    print("{} observations of shape {} in {:.2f} s: {:.1f} us each, {:.0f}/s".format(
+        ticks, shape, seconds, 1e6 * seconds / ticks, ticks / seconds))
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
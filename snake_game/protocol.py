@@ -0,0 +1,174 @@
+from array import array
+
+from free_cells import FreeCells
+from replay import DIRECTIONS, read_varint, write_varint
+
+# Server to client messages are framed as a varint length followed by the
+# payload, whose first byte is the message type. All numbers are varints.
+#
+# HELLO: columns, rows, your snake index + 1 (0 when watching), tick, the
+#   snakes as (alive, cell count, cells from tail to head), the food cells.
+#   Sent when a client joins and when a new round starts.
+# TICK: tick, the heads as (snake index, cell), the freed cells, the new
+#   food cells and the indexes of the snakes that died. Sent every tick,
+#   encoded once and shared by every client of a room.
+#
+# Clients send turns as single bytes holding the direction code of replay.py.
+HELLO = 1
+TICK = 2
+
+
+def _write_cells(out, cells):
+    write_varint(out, len(cells))
+    for cell in cells:
+        write_varint(out, cell)
+
+
+def _read_cells(data, pos):
+    count, pos = read_varint(data, pos)
+    cells = []
+    for _ in range(count):
+        cell, pos = read_varint(data, pos)
+        cells.append(cell)
+    return cells, pos
+
+
+def frame(payload):
+    out = bytearray()
+    write_varint(out, len(payload))
+    out += payload
+    return bytes(out)
+
+
+def encode_hello(game, you=None):
+    free_cells = game.free_cells
+    out = bytearray([HELLO])
+    for value in (free_cells.columns, free_cells.rows, 0 if you is None else you + 1, game.ticks,
+                  len(game.snakes)):
+        write_varint(out, value)
+    for snake in game.snakes:
+        out.append(1 if snake.alive else 0)
+        _write_cells(out, snake.body)
+    _write_cells(out, sorted(game.foods))
+    return frame(out)
+
+
+def encode_tick(tick, step):
+    out = bytearray([TICK])
+    write_varint(out, tick)
+    write_varint(out, len(step.heads))
+    for index, cell in step.heads:
+        write_varint(out, index)
+        write_varint(out, cell)
+    _write_cells(out, step.freed)
+    _write_cells(out, step.food)
+    _write_cells(out, step.deaths)
+    return frame(out)
+
+
+def encode_turn(direction):
+    return bytes([DIRECTIONS.index(direction)])
+
+
+class FrameReader:
+    """Splits a byte stream into message payloads"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        buffer = self._buffer
+        buffer += data
+        pos = 0
+        payloads = []
+        while pos < len(buffer):
+            # Wait for more data if the length itself is not complete yet
+            end = pos
+            while end < len(buffer) and buffer[end] & 0x80:
+                end += 1
+            if end >= len(buffer):
+                break
+            length, start = read_varint(buffer, pos)
+            if start + length > len(buffer):
+                break
+            payloads.append(bytes(buffer[start:start + length]))
+            pos = start + length
+        del buffer[:pos]
+        return payloads
+
+
+class BoardMirror:
+    """Client-side copy of a server board, kept up to date from the deltas.
+
+    It answers ``owner_of`` and ``is_food`` like the engine games, so the
+    DirtyRenderer can draw it directly.
+    """
+
+    def __init__(self, payload):
+        pos = 1
+        header = []
+        for _ in range(5):
+            value, pos = read_varint(payload, pos)
+            header.append(value)
+        columns, rows, you, self.ticks, snake_count = header
+        self.you = you - 1 if you else None
+        self.free_cells = FreeCells(columns, rows)
+        self.owner = array("h", [-1]) * (columns * rows)
+        self.alive = []
+        self.heads = []
+        self.sizes = []
+
+        for index in range(snake_count):
+            self.alive.append(bool(payload[pos]))
+            body, pos = _read_cells(payload, pos + 1)
+            for cell in body:
+                self.free_cells.occupy(cell)
+                self.owner[cell] = index
+            self.heads.append(body[-1] if body else None)
+            self.sizes.append(len(body))
+        foods, pos = _read_cells(payload, pos)
+        self.foods = set(foods)
+
+    @property
+    def head(self):
+        return None if self.you is None else self.heads[self.you]
+
+    @property
+    def score(self):
+        return 0 if self.you is None else max(0, self.sizes[self.you] - 1)
+
+    def owner_of(self, cell):
+        owner = self.owner[cell]
+        return None if owner < 0 else owner
+
+    def is_food(self, cell):
+        return cell in self.foods
+
+    def apply_tick(self, payload):
+        """Apply a TICK payload; returns (heads, freed, food) to redraw"""
+        self.ticks, pos = read_varint(payload, 1)
+        count, pos = read_varint(payload, pos)
+        heads = []
+        for _ in range(count):
+            index, pos = read_varint(payload, pos)
+            cell, pos = read_varint(payload, pos)
+            heads.append((index, cell))
+        freed, pos = _read_cells(payload, pos)
+        food, pos = _read_cells(payload, pos)
+        deaths, pos = _read_cells(payload, pos)
+
+        # Same order as the server: freed cells first, then the new heads
+        for cell in freed:
+            self.sizes[self.owner[cell]] -= 1
+            self.owner[cell] = -1
+            self.free_cells.release(cell)
+        for index, cell in heads:
+            self.owner[cell] = index
+            self.free_cells.occupy(cell)
+            self.heads[index] = cell
+            self.sizes[index] += 1
+            self.foods.discard(cell)
+        self.foods.update(food)
+        for index in deaths:
+            self.alive[index] = False
+        return heads, freed, food
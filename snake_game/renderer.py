@@ -0,0 +1,184 @@
+import pygame
+
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+GREEN = (0, 255, 0)
+WALL = (40, 40, 40)
+
+
+class TextCache:
+    """Keeps fonts per size and rendered text surfaces per (text, size, color)."""
+
+    max_surfaces = 256
+
+    def __init__(self):
+        self._fonts = {}
+        self._surfaces = {}
+
+    def font(self, size):
+        font = self._fonts.get(size)
+        if font is None:
+            font = self._fonts[size] = pygame.font.Font(None, size)
+        return font
+
+    def render(self, text, size, color):
+        key = (text, size, color)
+        surface = self._surfaces.get(key)
+        if surface is None:
+            # Scores keep changing, so do not let the cache grow without bound
+            if len(self._surfaces) >= self.max_surfaces:
+                self._surfaces.clear()
+            surface = self._surfaces[key] = self.font(size).render(text, True, color)
+        return surface
+
+
+class DirtyRenderer:
+    """Draws only the cells that changed since the last frame.
+
+    Every draw call records the rectangle it touched, and ``flush`` hands
+    just those rectangles to ``pygame.display.update``, so the cost of a
+    frame depends on how many cells changed, not on the size of the board.
+
+    The screen is a view on the board whose top-left cell is
+    (``view_col``, ``view_row``). Cells outside the view are skipped and
+    ``follow`` moves the view along with the snake, so boards much larger
+    than the window only cost what is visible.
+
+    When cells have to be painted from scratch the renderer asks the game,
+    through ``owner_of(cell)`` and ``is_food(cell)``, and colours each snake
+    with ``snake_colors[owner]``.
+    """
+
+    def __init__(self, screen, block_size, text_cache, score_position=(10, 10), follow_margin=5,
+                 snake_colors=(WHITE,)):
+        self.screen = screen
+        self.block_size = block_size
+        self.text_cache = text_cache
+        self.score_position = score_position
+        self.snake_colors = snake_colors
+        self.view_col = 0
+        self.view_row = 0
+        self.view_columns = -(-screen.get_width() // block_size)
+        self.view_rows = -(-screen.get_height() // block_size)
+        self.follow_margin = min(follow_margin, self.view_columns // 4, self.view_rows // 4)
+        self._dirty = []
+        self._score_text = None
+        self._score_rect = pygame.Rect(score_position, (0, 0))
+
+    def center_on(self, col, row, game):
+        """Move the view so (col, row) is in its middle and draw it all again.
+
+        The view never goes past the edges of the board; a board smaller
+        than the screen stays at the top-left corner, surrounded by wall.
+        """
+        free_cells = game.free_cells
+        self.view_col = max(0, min(col - self.view_columns // 2, free_cells.columns - self.view_columns))
+        self.view_row = max(0, min(row - self.view_rows // 2, free_cells.rows - self.view_rows))
+        self.redraw(game)
+
+    def follow(self, col, row, game):
+        """Recenter the view when (col, row) gets close to its edge"""
+        view_col = col - self.view_col
+        view_row = row - self.view_row
+        margin = self.follow_margin
+        if margin <= view_col < self.view_columns - margin and margin <= view_row < self.view_rows - margin:
+            return False
+        old_view = self.view_col, self.view_row
+        self.center_on(col, row, game)
+        return (self.view_col, self.view_row) != old_view
+
+    def redraw(self, game):
+        """Draw the whole view from the game state, in O(visible cells)"""
+        self._paint(self.screen.get_rect(), game)
+        self._dirty = [self.screen.get_rect()]
+        self._score_text = None
+        self._score_rect = pygame.Rect(self.score_position, (0, 0))
+
+    def _paint(self, area, game):
+        # Paint the board cells under a screen area from the game state
+        free_cells = game.free_cells
+        size = self.block_size
+        board = pygame.Rect(-self.view_col * size, -self.view_row * size,
+                            free_cells.columns * size, free_cells.rows * size)
+        self.screen.fill(WALL, area)
+        area = area.clip(board)
+        if not area.width or not area.height:
+            return
+        self.screen.fill(BLACK, area)
+        for row in range(self.view_row + area.top // size, self.view_row + (area.bottom - 1) // size + 1):
+            for col in range(self.view_col + area.left // size, self.view_col + (area.right - 1) // size + 1):
+                cell = free_cells.cell(col, row)
+                owner = game.owner_of(cell)
+                if owner is not None:
+                    color = self.snake_colors[owner % len(self.snake_colors)]
+                elif game.is_food(cell):
+                    color = GREEN
+                else:
+                    continue
+                self.screen.fill(color, ((col - self.view_col) * size, (row - self.view_row) * size, size, size))
+
+    def _cell_rect(self, col, row):
+        col -= self.view_col
+        row -= self.view_row
+        if not (0 <= col < self.view_columns and 0 <= row < self.view_rows):
+            return None
+        return pygame.Rect(col * self.block_size, row * self.block_size, self.block_size, self.block_size)
+
+    def draw_cell(self, col, row, color):
+        rect = self._cell_rect(col, row)
+        if rect is None:
+            return
+        self.screen.fill(color, rect)
+        self._dirty.append(rect)
+
+    def erase_cell(self, col, row):
+        self.draw_cell(col, row, BLACK)
+
+    def draw_cell_fraction(self, col, row, dx, dy, fraction, color):
+        """Fill the part of a cell swept by something moving in direction (dx, dy).
+
+        The filled strip starts at the edge the movement comes from and covers
+        ``fraction`` of the cell, which is how moves are interpolated between
+        two simulation ticks.
+        """
+        rect = self._cell_rect(col, row)
+        if rect is None:
+            return
+        size = self.block_size
+        depth = max(1, min(size, round(size * fraction)))
+        if dx > 0:
+            rect.width = depth
+        elif dx < 0:
+            rect.left = rect.right - depth
+            rect.width = depth
+        elif dy > 0:
+            rect.height = depth
+        elif dy < 0:
+            rect.top = rect.bottom - depth
+            rect.height = depth
+        self.screen.fill(color, rect)
+        self._dirty.append(rect)
+
+    def draw_score(self, score, game):
+        """Keep the score on top of the board, repainting it only when needed.
+
+        The text is redrawn when it changes or when a cell drawn this frame
+        overlaps it; the board cells under the old text are restored from the
+        game state first.
+        """
+        text = "Score: " + str(score)
+        if text == self._score_text and self._score_rect.collidelist(self._dirty) < 0:
+            return
+
+        area = self._score_rect
+        self._paint(area, game)
+
+        surface = self.text_cache.render(text, 36, WHITE)
+        self.screen.blit(surface, self.score_position)
+        self._score_text = text
+        self._score_rect = surface.get_rect(topleft=self.score_position)
+        self._dirty.append(area.union(self._score_rect))
+
+    def flush(self):
+        pygame.display.update(self._dirty)
+        self._dirty = []
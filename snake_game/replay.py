@@ -0,0 +1,235 @@
+import argparse
+import copy
+import random
+import time
+
+from engine import DOWN, LEFT, RIGHT, UP, SnakeGame
+
+# File layout: MAGIC, VERSION, then varints for columns, rows, seed, ticks
+# and the number of turns, followed by one varint per turn holding
+# (ticks since the previous turn << 2 | direction code)
+MAGIC = b"SNKR"
+VERSION = 1
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+DIRECTION_CODES = {direction: code for code, direction in enumerate(DIRECTIONS)}
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class Replay:
+    """RNG seed and per-tick turns of one snake game.
+
+    ``actions`` holds what was passed to ``SnakeGame.step`` on every tick:
+    a direction, or None when the player did not turn. Replaying them on a
+    game seeded the same way reproduces the original game exactly.
+    """
+
+    def __init__(self, columns, rows, seed, actions=None):
+        self.columns = columns
+        self.rows = rows
+        self.seed = seed
+        self.actions = actions if actions is not None else []
+
+    def __len__(self):
+        return len(self.actions)
+
+    def new_game(self):
+        return SnakeGame(self.columns, self.rows, random.Random(self.seed))
+
+    def record(self, direction):
+        self.actions.append(direction)
+
+    def to_bytes(self):
+        turns = [(tick, action) for tick, action in enumerate(self.actions) if action is not None]
+        out = bytearray(MAGIC)
+        out.append(VERSION)
+        for value in (self.columns, self.rows, self.seed, len(self.actions), len(turns)):
+            write_varint(out, value)
+        previous = 0
+        for tick, action in turns:
+            write_varint(out, (tick - previous) << 2 | DIRECTION_CODES[action])
+            previous = tick
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:len(MAGIC)] != MAGIC or data[len(MAGIC)] != VERSION:
+            raise ValueError("not a snake replay (version {})".format(VERSION))
+        pos = len(MAGIC) + 1
+        header = []
+        for _ in range(5):
+            value, pos = read_varint(data, pos)
+            header.append(value)
+        columns, rows, seed, ticks, turn_count = header
+
+        actions = [None] * ticks
+        tick = 0
+        for _ in range(turn_count):
+            value, pos = read_varint(data, pos)
+            tick += value >> 2
+            actions[tick] = DIRECTIONS[value & 3]
+        return cls(columns, rows, seed, actions)
+
+    def save(self, path):
+        with open(path, "wb") as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as file:
+            return cls.from_bytes(file.read())
+
+
+def play(replay):
+    """Re-simulate a replay as fast as possible and return the final game."""
+    game = replay.new_game()
+    step = game.step
+    for action in replay.actions:
+        step(action)
+    return game
+
+
+class ReplayPlayer:
+    """Steps through a replay and can seek to any tick.
+
+    A copy of the game is kept every ``keyframe_interval`` ticks, so seeking
+    restores the closest earlier keyframe and simulates the rest instead of
+    starting over from the first tick.
+    """
+
+    keyframe_interval = 500
+
+    def __init__(self, replay):
+        self.replay = replay
+        self.game = replay.new_game()
+        self._keyframes = {0: copy.deepcopy(self.game)}
+
+    @property
+    def tick(self):
+        return self.game.ticks
+
+    def step(self):
+        if self.game.over or self.game.ticks >= len(self.replay.actions):
+            return None
+        step = self.game.step(self.replay.actions[self.game.ticks])
+        if self.game.ticks % self.keyframe_interval == 0 and self.game.ticks not in self._keyframes:
+            self._keyframes[self.game.ticks] = copy.deepcopy(self.game)
+        return step
+
+    def seek(self, tick):
+        tick = max(0, min(tick, len(self.replay.actions)))
+        # Restore a keyframe when going back, or when one is ahead of the current tick
+        start = max(t for t in self._keyframes if t <= tick)
+        if tick < self.game.ticks or start > self.game.ticks:
+            self.game = copy.deepcopy(self._keyframes[start])
+        while self.game.ticks < tick and not self.game.over:
+            self.step()
+
+
+def view(replay, block_size=20, tick_rate=15):
+    """Show a replay in a window.
+
+    Space pauses, Left/Right seek five seconds, Home/End jump to the start
+    or the end, Up/Down change the playback speed and Esc closes the window.
+    """
+    import pygame
+
+    from renderer import GREEN, WHITE, DirtyRenderer, TextCache
+
+    pygame.init()
+    screen = pygame.display.set_mode((min(replay.columns * block_size, 800), min(replay.rows * block_size, 600)))
+    renderer = DirtyRenderer(screen, block_size, TextCache())
+    player = ReplayPlayer(replay)
+    clock = pygame.time.Clock()
+    paused = False
+    redraw = True
+
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                return
+            if event.type != pygame.KEYDOWN:
+                continue
+            if event.key == pygame.K_ESCAPE:
+                pygame.quit()
+                return
+            elif event.key == pygame.K_SPACE:
+                paused = not paused
+            elif event.key == pygame.K_UP:
+                tick_rate *= 2
+            elif event.key == pygame.K_DOWN:
+                tick_rate = max(1, tick_rate // 2)
+            elif event.key in (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_HOME, pygame.K_END):
+                target = {
+                    pygame.K_LEFT: player.tick - tick_rate * 5,
+                    pygame.K_RIGHT: player.tick + tick_rate * 5,
+                    pygame.K_HOME: 0,
+                    pygame.K_END: len(replay),
+                }[event.key]
+                player.seek(target)
+                redraw = True
+
+        game = player.game
+        free_cells = game.free_cells
+        if redraw:
+            # After a seek the view is drawn again from the game state
+            renderer.center_on(*free_cells.position(game.head), game)
+            redraw = False
+        elif not paused:
+            step = player.step()
+            if step is not None:
+                if step.tail is not None and step.tail != step.head:
+                    renderer.erase_cell(*free_cells.position(step.tail))
+                renderer.draw_cell(*free_cells.position(step.head), WHITE)
+                if step.food is not None:
+                    renderer.draw_cell(*free_cells.position(step.food), GREEN)
+                renderer.follow(*free_cells.position(step.head), game)
+
+        renderer.draw_score(game.score, game)
+        renderer.flush()
+        pygame.display.set_caption("Snake replay - tick {} of {}".format(player.tick, len(replay)))
+        clock.tick(tick_rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play back recorded snake games")
+    parser.add_argument("command", choices=["play", "view"],
+                        help="'play' re-simulates the replays headless, 'view' shows the first one")
+    parser.add_argument("replays", nargs="+", help="replay files")
+    args = parser.parse_args()
+
+    if args.command == "view":
+        view(Replay.load(args.replays[0]))
+        return
+
+    total_ticks = 0
+    start = time.perf_counter()
+    for path in args.replays:
+        game = play(Replay.load(path))
+        total_ticks += game.ticks
+        print("{}: score {} after {} ticks".format(path, game.score, game.ticks))
+    elapsed = time.perf_counter() - start
+    print("{} replays, {} ticks in {:.3f}s ({:.0f} ticks/s)".format(
+        len(args.replays), total_ticks, elapsed, total_ticks / elapsed if elapsed else 0))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import argparse
+import asyncio
+import random
+import time
+from collections import deque
+
+from engine import MultiSnakeGame
+from protocol import encode_hello, encode_tick
+from replay import DIRECTIONS
+
+
+class Connection:
+    """A connected client: its queued turns and the snake it drives"""
+
+    max_queued_turns = 3
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.turns = deque()
+        self.snake = None
+        self.closed = False
+
+    def send(self, data, server):
+        if self.closed:
+            return
+        # A client that cannot keep up is dropped instead of buffering forever
+        if self.writer.transport.get_write_buffer_size() > server.max_buffer:
+            self.close()
+            return
+        self.writer.write(data)
+        server.bytes_sent += len(data)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.writer.close()
+
+
+class Room:
+    """One authoritative MultiSnakeGame and the clients watching it.
+
+    Clients that join during a round watch it and get a snake in the next
+    round. A new round starts as soon as the previous one is over.
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.clients = []
+        self.players = []
+        self.game = None
+
+    def start_round(self):
+        server = self.server
+        self.players = list(self.clients)
+        self.game = MultiSnakeGame(server.columns, server.rows, len(self.players), random.Random(),
+                                   foods=len(self.players))
+        for index, client in enumerate(self.players):
+            client.snake = index
+            client.turns.clear()
+            client.send(encode_hello(self.game, index), server)
+
+    def join(self, client):
+        self.clients.append(client)
+        if self.game is not None and not self.game.over:
+            client.send(encode_hello(self.game), self.server)
+
+    def leave(self, client):
+        self.clients.remove(client)
+        client.snake = None
+
+    def tick(self):
+        if self.game is None or self.game.over:
+            if self.clients:
+                self.start_round()
+            return
+        directions = [None] * len(self.players)
+        for index, client in enumerate(self.players):
+            if client.snake == index and client.turns:
+                directions[index] = client.turns.popleft()
+        step = self.game.step(directions)
+        data = encode_tick(self.game.ticks, step)
+        for client in self.clients:
+            client.send(data, self.server)
+
+
+class SnakeServer:
+    """Runs the rooms at a fixed tick rate and streams their deltas to clients.
+
+    Clients fill rooms of ``room_size`` snakes in arrival order. Every tick,
+    each room is stepped once and its TICK message is encoded once and
+    written to all of its clients.
+    """
+
+    def __init__(self, columns=40, rows=30, tick_rate=15, room_size=8, max_clients=1000,
+                 max_buffer=64 * 1024):
+        self.columns = columns
+        self.rows = rows
+        self.tick_rate = tick_rate
+        self.room_size = room_size
+        self.max_clients = max_clients
+        self.max_buffer = max_buffer
+        self.rooms = []
+        self.clients = 0
+        self.ticks = 0
+        self.bytes_sent = 0
+        self.started = time.perf_counter()
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            "clients": self.clients,
+            "rooms": len(self.rooms),
+            "ticks_per_second": self.ticks / elapsed,
+            "bytes_per_second": self.bytes_sent / elapsed,
+        }
+
+    def _room_for_new_client(self):
+        for room in self.rooms:
+            if len(room.clients) < self.room_size:
+                return room
+        room = Room(self)
+        self.rooms.append(room)
+        return room
+
+    async def handle_client(self, reader, writer):
+        if self.clients >= self.max_clients:
+            writer.close()
+            return
+        client = Connection(writer)
+        room = self._room_for_new_client()
+        room.join(client)
+        self.clients += 1
+        try:
+            while True:
+                data = await reader.read(64)
+                if not data:
+                    break
+                for code in data:
+                    if code < len(DIRECTIONS) and len(client.turns) < client.max_queued_turns:
+                        client.turns.append(DIRECTIONS[code])
+        except ConnectionError:
+            pass
+        finally:
+            room.leave(client)
+            self.clients -= 1
+            client.close()
+
+    async def run_ticks(self):
+        loop = asyncio.get_running_loop()
+        interval = 1.0 / self.tick_rate
+        next_tick = loop.time()
+        while True:
+            for room in self.rooms:
+                room.tick()
+            self.ticks += 1
+
+            # Keep a fixed rate, but do not try to catch up after a long stall
+            next_tick += interval
+            delay = next_tick - loop.time()
+            if delay < -5 * interval:
+                next_tick = loop.time()
+            await asyncio.sleep(max(0.0, delay))
+
+    async def serve(self, host="127.0.0.1", port=8765, report_every=5.0):
+        """Accept clients and run the ticks, printing stats every ``report_every`` seconds"""
+        server = await asyncio.start_server(self.handle_client, host, port)
+        ticker = asyncio.create_task(self.run_ticks())
+        try:
+            async with server:
+                if not report_every:
+                    await server.serve_forever()
+                while True:
+                    await asyncio.sleep(report_every)
+                    print("{clients} clients in {rooms} rooms, {ticks_per_second:.1f} ticks/s, "
+                          "{bytes_per_second:.0f} bytes/s".format(**self.stats()))
+        finally:
+            ticker.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snake server streaming per-tick deltas over TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--columns", type=int, default=40)
+    parser.add_argument("--rows", type=int, default=30)
+    parser.add_argument("--speed", type=int, default=15, help="ticks per second")
+    parser.add_argument("--room-size", type=int, default=8, help="snakes per board")
+    parser.add_argument("--max-clients", type=int, default=1000)
+    args = parser.parse_args()
+
+    server = SnakeServer(args.columns, args.rows, args.speed, args.room_size, args.max_clients)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+from collections import deque
+
+
+class FrameStats:
+    """Rolling frame-time statistics over the last ``window`` rendered frames."""
+
+    def __init__(self, window=240):
+        self.frame_times = deque(maxlen=window)
+        self.frames = 0
+        self.ticks = 0
+
+    def record_frame(self, ms):
+        self.frame_times.append(ms)
+        self.frames += 1
+
+    def record_tick(self):
+        self.ticks += 1
+
+    @property
+    def mean_ms(self):
+        if not self.frame_times:
+            return 0.0
+        return sum(self.frame_times) / len(self.frame_times)
+
+    @property
+    def max_ms(self):
+        return max(self.frame_times, default=0.0)
+
+    @property
+    def fps(self):
+        mean = self.mean_ms
+        return 1000.0 / mean if mean else 0.0
+
+    def percentile(self, p):
+        if not self.frame_times:
+            return 0.0
+        ordered = sorted(self.frame_times)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    def summary(self):
+        return {
+            "frames": self.frames,
+            "ticks": self.ticks,
+            "fps": self.fps,
+            "mean_ms": self.mean_ms,
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms,
+        }